@@ -0,0 +1,252 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import html
+import os
+import threading
+import time
+
+import sublime
+
+
+_REGION_KEY = 'phpunit_failures'
+
+
+# The minimum time between two updates of the open views.
+_FRAME_INTERVAL = 0.1
+
+
+# The maximum number of views updated in one frame. The views of any other
+# files with new failures are updated in the following frames.
+_MAX_VIEWS_PER_FRAME = 8
+
+
+# The maximum number of phantoms drawn in a view. Every failure is still
+# marked with a gutter icon and an underline.
+_MAX_PHANTOMS = 100
+
+
+_annotations = {}  # type: dict
+
+
+class FailureAnnotations():
+    """
+    Draw the failures of a test run in the views of the failing files.
+
+    Failures can be added from any thread as they are read from the results.
+    The views of the files with new failures are redrawn in batches at a
+    bounded frame rate, each with a single update of its regions and
+    phantoms however many failures it has. Files that are not open are
+    drawn when they are loaded.
+    """
+
+    def __init__(self, window, frame_interval: float = _FRAME_INTERVAL):
+        self.window = window
+        self.frame_interval = frame_interval
+        self.updates = 0
+        self._failures = {}  # type: dict
+        self._expanded = set()  # type: set
+        self._phantom_sets = {}  # type: dict
+        self._dirty = []  # type: list
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, failures: list) -> None:
+        with self._lock:
+            for failure in failures:
+                if not failure.file or failure.line < 1:
+                    continue
+
+                if failure.file not in self._failures:
+                    self._failures[failure.file] = []
+
+                self._failures[failure.file].append(failure)
+                if failure.file not in self._dirty:
+                    self._dirty.append(failure.file)
+
+            if self._scheduled or not self._dirty:
+                return
+
+            self._scheduled = True
+            delay = self._last_flush + self.frame_interval - time.perf_counter()
+
+        sublime.set_timeout(self._flush, max(0, int(delay * 1000)))
+
+    def clear(self, working_dir=None) -> None:
+        """Remove the annotations of the files in {working_dir}, or of all files, ready for a new run."""
+        prefix = os.path.join(working_dir, '') if working_dir else ''
+        with self._lock:
+            files = [file for file in self._failures if file.startswith(prefix)]
+            for file in files:
+                del self._failures[file]
+                if file in self._dirty:
+                    self._dirty.remove(file)
+
+            self._expanded = set(key for key in self._expanded if not key[0].startswith(prefix))
+
+        views = _find_open_views(self.window, files)
+        for file in files:
+            for view in views.get(file, ()):
+                view.erase_regions(_REGION_KEY)
+                phantom_set = self._phantom_sets.pop(view.id(), None)
+                if phantom_set:
+                    phantom_set.update([])
+
+    def on_load(self, view) -> None:
+        with self._lock:
+            has_failures = view.file_name() in self._failures
+
+        if has_failures:
+            self._draw(view, view.file_name())
+
+    def on_close(self, view) -> None:
+        self._phantom_sets.pop(view.id(), None)
+
+    def _flush(self) -> None:
+        with self._lock:
+            files = self._dirty[:_MAX_VIEWS_PER_FRAME]
+            del self._dirty[:_MAX_VIEWS_PER_FRAME]
+            self._last_flush = time.perf_counter()
+            self._scheduled = bool(self._dirty)
+
+        views = _find_open_views(self.window, files)
+        for file in files:
+            for view in views.get(file, ()):
+                if not view.is_loading():
+                    self._draw(view, file)
+
+        if self._scheduled:
+            sublime.set_timeout(self._flush, int(self.frame_interval * 1000))
+
+    def _draw(self, view, file: str) -> None:
+        with self._lock:
+            failures = list(self._failures.get(file, ()))
+
+        self.updates += 1
+
+        lines = {}  # type: dict
+        for failure in failures:
+            if failure.line not in lines:
+                lines[failure.line] = []
+            lines[failure.line].append(failure)
+
+        regions = []
+        phantoms = []  # type: list
+        for line, line_failures in sorted(lines.items()):
+            region = view.line(view.text_point(line - 1, 0))
+            regions.append(region)
+            if len(phantoms) < _MAX_PHANTOMS:
+                phantoms.append(sublime.Phantom(
+                    sublime.Region(region.end()),
+                    self._render(file, line, line_failures),
+                    sublime.LAYOUT_BELOW,
+                    lambda href, file=file, line=line: self._toggle(file, line)))
+
+        view.add_regions(
+            _REGION_KEY,
+            regions,
+            'region.redish',
+            'circle',
+            sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE | sublime.DRAW_SQUIGGLY_UNDERLINE)
+
+        phantom_set = self._phantom_sets.get(view.id())
+        if phantom_set is None:
+            phantom_set = self._phantom_sets[view.id()] = sublime.PhantomSet(view, _REGION_KEY)
+
+        phantom_set.update(phantoms)
+
+    def _render(self, file: str, line: int, failures: list) -> str:
+        expanded = (file, line) in self._expanded
+        message = failures[0].message or failures[0].id
+        collapsible = len(failures) > 1 or '\n' in message.strip()
+
+        if expanded:
+            content = '<br><br>'.join(
+                '<b>{}</b><br>{}'.format(html.escape(failure.id), html.escape(failure.message.strip()))
+                for failure in failures).replace('\n', '<br>')
+        else:
+            content = html.escape(message.strip().split('\n')[0])
+            if len(failures) > 1:
+                content += ' <i>(+{} more)</i>'.format(len(failures) - 1)
+
+        if collapsible:
+            content = '<a href="toggle">{}</a> {}'.format('&#9662;' if expanded else '&#9656;', content)
+
+        return (
+            '<body id="phpunit-failure">'
+            '<style>'
+            'div.failure {'
+            ' padding: 0.2rem 0.6rem;'
+            ' border-radius: 0.2rem;'
+            ' background-color: color(var(--redish) alpha(0.15));'
+            '}'
+            'a { text-decoration: none; }'
+            '</style>'
+            '<div class="failure">' + content + '</div>'
+            '</body>'
+        )
+
+    def _toggle(self, file: str, line: int) -> None:
+        key = (file, line)
+        if key in self._expanded:
+            self._expanded.remove(key)
+        else:
+            self._expanded.add(key)
+
+        for view in _find_open_views(self.window, [file]).get(file, ()):
+            self._draw(view, file)
+
+
+def _find_open_views(window, files: list) -> dict:
+    """Return the views of each of {files} open in {window}, including the clones of a split layout."""
+    views = {}  # type: dict
+    if files:
+        file_names = set(files)
+        for view in window.views():
+            file = view.file_name()
+            if file in file_names:
+                views.setdefault(file, []).append(view)
+
+    return views
+
+
+def get_failure_annotations(window) -> FailureAnnotations:
+    annotations = _annotations.get(window.id())
+    if annotations is None:
+        annotations = _annotations[window.id()] = FailureAnnotations(window)
+
+    return annotations
+
+
+def annotate_view(view) -> None:
+    """Draw the failures of the last run in a view that has just been loaded."""
+    window = view.window()
+    if window:
+        annotations = _annotations.get(window.id())
+        if annotations:
+            annotations.on_load(view)
+
+
+def forget_annotated_view(view) -> None:
+    """Forget the phantoms of a view that is closing, which may no longer have a window."""
+    for annotations in list(_annotations.values()):
+        annotations.on_close(view)
+
+
+def forget_annotations(window) -> None:
+    _annotations.pop(window.id(), None)
@@ -0,0 +1,86 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import threading
+
+
+def stat_signature(path: str):
+    """
+    Return a signature that changes whenever {path} changes on disk.
+
+    Return None if {path} does not exist. A directory's signature changes when
+    entries are added to or removed from it.
+    """
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class StatCache():
+    """
+    A cache of values that depend on the state of paths on disk.
+
+    Each entry records the stat signature of the paths it was computed from and
+    is discarded as soon as any one of those signatures changes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # type: dict
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Return the cached value for {key}.
+
+        On a miss, {compute} is called and must return a tuple of the value and
+        the list of paths the value depends on. Exceptions raised by {compute}
+        are not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            value, signatures = entry
+            if all(stat_signature(path) == signature for path, signature in signatures):
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        value, paths = compute()
+        signatures = [(path, stat_signature(path)) for path in paths]
+
+        with self._lock:
+            self._entries[key] = (value, signatures)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> str:
+        return '{} cache: {} entries, {} hits, {} misses'.format(self.name, len(self), self.hits, self.misses)
@@ -0,0 +1,181 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.lib.mapping import resolve_path_mapping
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.ssh import build_ssh_options
+from PHPUnitKit.lib.ssh import find_ssh_master
+from PHPUnitKit.lib.utils import build_cmd_options
+from PHPUnitKit.lib.utils import debug_message
+from PHPUnitKit.lib.utils import get_osx_term_script_path
+
+
+# Options that vary from one run to the next and so are not compiled into
+# a plan. They are substituted into the command when the plan is built.
+_RUN_TIME_OPTIONS = ('filter',)
+
+
+class _RunTimeOption():
+    """The position of a run-time option in a compiled command."""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+_MAX_PLANS = 32
+
+
+_plans = {}  # type: dict
+
+
+class CommandPlan():
+    """
+    A compiled test command.
+
+    Everything that depends only on the project, settings and options (the
+    prepended command, strategy, SSH, Docker, executable, options and path
+    mappings) is resolved once. Only the files and filter are substituted when
+    the command is built, with the filter in the same position among the
+    options as it was given.
+    """
+
+    def __init__(self, cmd: list, env: dict, working_dir: str):
+        self.cmd = cmd
+        self.env = env
+        self.working_dir = working_dir
+
+    def build(self, file=None, options=None, run_options=None) -> list:
+        """Return the command for {file}, or list of files, with the run-time {options} and any {run_options}."""
+        run_time_options = {k: v for k, v in options.items() if k in _RUN_TIME_OPTIONS} if options else {}
+
+        cmd = []  # type: list
+        for param in self.cmd:
+            if isinstance(param, _RunTimeOption):
+                build_cmd_options({param.name: run_time_options.pop(param.name, None)}, cmd)
+            else:
+                cmd.append(param)
+
+        if run_time_options:
+            build_cmd_options(run_time_options, cmd)
+
+        if run_options:
+            build_cmd_options(run_options, cmd)
+
+        if isinstance(file, list):
+            cmd += [os.path.relpath(f, self.working_dir) for f in file]
+        elif file:
+            cmd.append(os.path.relpath(file, self.working_dir))
+
+        return cmd
+
+
+def _compile(view, working_dir: str, php_executable, phpunit_executable: list, options: dict) -> CommandPlan:
+    settings = get_settings(view)
+
+    env = {}
+    if php_executable:
+        env['PATH'] = os.path.dirname(php_executable) + os.pathsep + os.environ['PATH']
+
+    cmd = []
+
+    try:
+        cmd += settings.get('prepend_cmd')
+    except TypeError:
+        pass
+
+    # Strategy
+    strategy_name = settings.get('strategy')
+    if strategy_name == 'kitty':
+        cmd += ['kitty', '--hold']
+    elif strategy_name == 'iterm':
+        cmd.append(get_osx_term_script_path())
+    elif strategy_name == 'powershell':
+        cmd += ['powershell', '-Command']
+    elif strategy_name == 'xterm':
+        cmd += ['xterm', '-hold', '-e']
+    elif strategy_name == 'cmd':
+        cmd += ['cmd.exe', '/c']
+
+    if settings.get('ssh'):
+        cmd += ['ssh']
+        cmd += build_ssh_options(settings.get('ssh_options'))
+        ssh_master_index = len(cmd)
+
+        cmd += ['{}@{}'.format(
+            settings.get('ssh_user'),
+            settings.get('ssh_host'))
+        ]
+
+        cmd += ['cd {working_dir};']
+
+    if settings.get('docker'):
+        cmd += settings.get('docker_command')
+
+    cmd += phpunit_executable
+
+    for k, v in options.items():
+        if k in _RUN_TIME_OPTIONS:
+            cmd.append(_RunTimeOption(k))
+        else:
+            build_cmd_options({k: v}, cmd)
+
+    # The file is always relative to the working directory, so path mappings
+    # never apply to it and can be resolved when the plan is compiled.
+    if settings.get('ssh'):
+        cmd = resolve_path_mapping(view, 'ssh_paths', cmd, working_dir)
+
+        # The control path is a local path, so it is added after the path
+        # mappings are resolved. It follows the user's options because ssh
+        # uses the first value given for an option.
+        ssh_master = find_ssh_master(view)
+        if ssh_master:
+            cmd[ssh_master_index:ssh_master_index] = ssh_master.options()
+
+    if settings.get('docker'):
+        cmd = resolve_path_mapping(view, 'docker_paths', cmd, working_dir)
+
+    return CommandPlan(cmd, env, working_dir)
+
+
+def get_command_plan(view, working_dir: str, php_executable, phpunit_executable: list, options: dict) -> CommandPlan:
+    key = (
+        working_dir,
+        get_settings(view).fingerprint,
+        php_executable,
+        tuple(phpunit_executable),
+        repr([(k, None if k in _RUN_TIME_OPTIONS else v) for k, v in options.items()]),
+        os.environ.get('PATH')
+    )
+
+    plan = _plans.get(key)
+    if plan is None:
+        debug_message('compiling command plan for %s', working_dir)
+        if len(_plans) >= _MAX_PLANS:
+            _plans.clear()
+
+        plan = _plans[key] = _compile(view, working_dir, php_executable, phpunit_executable, options)
+
+    return plan
+
+
+def clear_command_plans() -> None:
+    _plans.clear()
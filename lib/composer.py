@@ -0,0 +1,215 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+
+from PHPUnitKit.lib.cache import StatCache
+from PHPUnitKit.lib.trie import PathTrie
+
+
+_composer_file_cache = StatCache('composer file')
+_psr4_cache = StatCache('psr-4')
+
+
+def _psr4(composer: dict, section: str) -> list:
+    autoload = composer.get(section)
+    if not isinstance(autoload, dict):
+        return []
+
+    psr4 = autoload.get('psr-4')
+    if not isinstance(psr4, dict):
+        return []
+
+    mappings = []
+    for prefix, paths in psr4.items():
+        if isinstance(paths, str):
+            paths = [paths]
+        for path in paths:
+            if isinstance(path, str):
+                mappings.append((prefix, path))
+
+    return mappings
+
+
+class Psr4Map():
+    """
+    A bidirectional map between source and test files from composer.json.
+
+    The autoload PSR-4 prefixes are the source roots and the autoload-dev
+    prefixes are the test roots. A file is mapped to its class name by its
+    longest matching root, and a class name is mapped to the files that can
+    declare it under each root with its prefix.
+    """
+
+    def __init__(self, working_dir: str, autoload: list, autoload_dev: list):
+        self.working_dir = working_dir
+        self.source_roots = []  # type: list
+        self.test_roots = []  # type: list
+        self._trie = PathTrie()
+
+        for roots, mappings, is_test in ((self.source_roots, autoload, False), (self.test_roots, autoload_dev, True)):
+            for prefix, path in mappings:
+                root = os.path.normpath(os.path.join(working_dir, path))
+                roots.append((prefix, root))
+                if root not in self._trie:
+                    self._trie.insert(root, (prefix, is_test))
+
+        # Test roots are often split by test suite, for example tests/Unit
+        # and tests/Feature, without a matching namespace segment.
+        self._test_suite_dirs = {}  # type: dict
+        for _, root in self.test_roots:
+            self._test_suite_dirs[root] = _list_dirs(root)
+
+    def class_name(self, file: str):
+        """Return the (class name, prefix, root, is test) of {file}, or None."""
+        match = self._trie.longest_prefix(file)
+        if not match:
+            return None
+
+        root, (prefix, is_test) = match
+        relative, ext = os.path.splitext(os.path.relpath(file, root))
+        if ext != '.php':
+            return None
+
+        return prefix + relative.replace(os.sep, '\\'), prefix, root, is_test
+
+    def find_tests(self, relative_class_name: str) -> list:
+        """Return the existing test files of the class {relative_class_name}, relative to its prefix."""
+        relative_file = relative_class_name.replace('\\', os.sep) + 'Test.php'
+        files = []
+        for _, root in self.test_roots:
+            for directory in [root] + self._test_suite_dirs[root]:
+                file = os.path.join(directory, relative_file)
+                if file not in files and os.path.isfile(file):
+                    files.append(file)
+
+        return files
+
+    def find_sources(self, relative_class_name: str) -> list:
+        """Return the existing source files of the class {relative_class_name}, relative to its prefix."""
+        # A test root split by test suite adds a leading namespace segment,
+        # for example Tests\Unit\Foo\BarTest tests App\Foo\Bar.
+        relative_class_names = [relative_class_name]
+        if '\\' in relative_class_name:
+            relative_class_names.append(relative_class_name.split('\\', 1)[1])
+
+        files = []
+        for name in relative_class_names:
+            relative_file = name.replace('\\', os.sep) + '.php'
+            for _, root in self.source_roots:
+                file = os.path.join(root, relative_file)
+                if file not in files and os.path.isfile(file):
+                    files.append(file)
+
+        return files
+
+    def find_switchables(self, file: str) -> list:
+        """Return the existing test files of a source {file}, or the source files of a test {file}."""
+        match = self.class_name(file)
+        if not match:
+            return []
+
+        name, prefix, _, is_test = match
+        relative_class_name = name[len(prefix):]
+
+        if file.endswith('Test.php'):
+            return self.find_sources(relative_class_name[:-4])
+
+        if is_test:
+            return []
+
+        return self.find_tests(relative_class_name)
+
+
+def _list_dirs(path: str) -> list:
+    try:
+        return sorted(entry.path for entry in os.scandir(path) if entry.is_dir() and entry.name[0] != '.')
+    except OSError:
+        return []
+
+
+def _load(composer_file: str) -> tuple:
+    try:
+        with open(composer_file, encoding='utf-8') as f:
+            composer = json.load(f)
+    except (OSError, ValueError):
+        return None, [composer_file]
+
+    if not isinstance(composer, dict):
+        return None, [composer_file]
+
+    psr4_map = Psr4Map(
+        os.path.dirname(composer_file),
+        _psr4(composer, 'autoload'),
+        _psr4(composer, 'autoload-dev'))
+
+    # Adding a test suite directory changes the modification time of its
+    # test root, so the test roots are dependencies too.
+    return psr4_map, [composer_file] + [root for _, root in psr4_map.test_roots]
+
+
+def get_psr4_map(composer_file):
+    """
+    Return the PSR-4 map of {composer_file}.
+
+    The map is cached until composer.json changes. Return None if
+    {composer_file} is None or cannot be read.
+    """
+    if not composer_file:
+        return None
+
+    return _psr4_cache.get(composer_file, lambda: _load(composer_file))
+
+
+def _find_composer_file(parent: str) -> tuple:
+    searched_folders = []
+    while True:
+        searched_folders.append(parent)
+        composer_file = os.path.join(parent, 'composer.json')
+        if os.path.isfile(composer_file):
+            return composer_file, searched_folders
+
+        next_parent = os.path.dirname(parent)
+        if next_parent == parent:
+            return None, searched_folders
+
+        parent = next_parent
+
+
+def find_composer_file(file_name: str):
+    """Return the nearest composer.json in the ancestors of {file_name}, or None."""
+    parent = os.path.dirname(file_name)
+
+    return _composer_file_cache.get(parent, lambda: _find_composer_file(parent))
+
+
+def find_psr4_switchables(file_name) -> list:
+    """Return the PSR-4 test files of a source file, or source files of a test file."""
+    if not file_name:
+        return []
+
+    psr4_map = get_psr4_map(find_composer_file(file_name))
+    if not psr4_map:
+        return []
+
+    return psr4_map.find_switchables(file_name)
+
+
+def clear_composer_caches() -> None:
+    _composer_file_cache.clear()
+    _psr4_cache.clear()
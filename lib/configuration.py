@@ -0,0 +1,178 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import glob
+import os
+from xml.etree.ElementTree import ParseError
+from xml.etree.ElementTree import iterparse
+
+from PHPUnitKit.lib.cache import StatCache
+from PHPUnitKit.lib.utils import debug_message
+
+
+_configuration_cache = StatCache('configuration')
+
+
+class Directory():
+
+    def __init__(self, path: str, prefix: str = '', suffix: str = 'Test.php'):
+        self.path = path
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def includes(self, file_name: str) -> bool:
+        if not file_name.startswith(self.path + os.sep):
+            return False
+
+        base_name = os.path.basename(file_name)
+
+        return base_name.startswith(self.prefix) and base_name.endswith(self.suffix)
+
+    def __repr__(self) -> str:
+        return 'Directory({!r}, prefix={!r}, suffix={!r})'.format(self.path, self.prefix, self.suffix)
+
+
+class TestSuite():
+
+    def __init__(self, name: str):
+        self.name = name
+        self.directories = []  # type: list
+        self.files = []  # type: list
+        self.excludes = []  # type: list
+
+    def includes(self, file_name: str) -> bool:
+        for exclude in self.excludes:
+            if file_name == exclude or file_name.startswith(exclude + os.sep):
+                return False
+
+        if file_name in self.files:
+            return True
+
+        for directory in self.directories:
+            if directory.includes(file_name):
+                return True
+
+        return False
+
+
+class Configuration():
+    """A model of the parts of a PHPUnit XML configuration file the plugin uses."""
+
+    def __init__(self, file: str):
+        self.file = file
+        self.working_dir = os.path.dirname(file)
+        self.bootstrap = None
+        self.testsuites = []  # type: list
+        self.groups = []  # type: list
+        self.exclude_groups = []  # type: list
+
+    def testsuite_names(self) -> list:
+        return [testsuite.name for testsuite in self.testsuites]
+
+    def find_testsuites(self, file_name: str) -> list:
+        return [testsuite for testsuite in self.testsuites if testsuite.includes(file_name)]
+
+    def includes(self, file_name: str) -> bool:
+        """
+        Return True if {file_name} belongs to a test suite.
+
+        A configuration without test suites includes every file because the
+        tests to run are then given on the command line.
+        """
+        if not self.testsuites:
+            return True
+
+        return bool(self.find_testsuites(os.path.abspath(file_name)))
+
+
+def _resolve_paths(working_dir: str, path: str) -> list:
+    path = os.path.normpath(os.path.join(working_dir, path.strip()))
+    if glob.has_magic(path):
+        return sorted(glob.glob(path))
+
+    return [path]
+
+
+def _parse(file: str) -> Configuration:
+    configuration = Configuration(file)
+    working_dir = configuration.working_dir
+    testsuite = None
+    parents = []  # type: list
+
+    for event, element in iterparse(file, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element.tag)
+            if element.tag == 'phpunit':
+                configuration.bootstrap = element.get('bootstrap')
+            elif element.tag == 'testsuite':
+                testsuite = TestSuite(element.get('name', ''))
+                configuration.testsuites.append(testsuite)
+            continue
+
+        parents.pop()
+        text = element.text.strip() if element.text else ''
+        parent = parents[-1] if parents else None
+
+        if element.tag == 'testsuite':
+            testsuite = None
+        elif testsuite is not None and text:
+            if element.tag == 'directory':
+                for path in _resolve_paths(working_dir, text):
+                    testsuite.directories.append(Directory(
+                        path,
+                        element.get('prefix', ''),
+                        element.get('suffix', 'Test.php')))
+            elif element.tag == 'file':
+                testsuite.files.extend(_resolve_paths(working_dir, text))
+            elif element.tag == 'exclude':
+                testsuite.excludes.extend(_resolve_paths(working_dir, text))
+        elif element.tag == 'group' and text and len(parents) > 1 and parents[-2] == 'groups':
+            if parent == 'include':
+                configuration.groups.append(text)
+            elif parent == 'exclude':
+                configuration.exclude_groups.append(text)
+
+        # Only the model is kept, so release the element as soon as it has
+        # been processed to keep memory flat for large configuration files.
+        element.clear()
+
+    return configuration
+
+
+def load_configuration(file):
+    """
+    Load a PHPUnit XML configuration file.
+
+    The parsed model is cached until the file is modified. Return None if
+    {file} is None or cannot be parsed.
+    """
+    if not file:
+        return None
+
+    def _load() -> tuple:
+        try:
+            return _parse(file), [file]
+        except (OSError, ParseError) as e:
+            debug_message('could not parse configuration \'%s\': %s', file, e)
+            return None, [file]
+
+    configuration = _configuration_cache.get(file, _load)
+
+    debug_message('%s', _configuration_cache.stats())
+
+    return configuration
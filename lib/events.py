@@ -14,23 +14,107 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+import os
 
-
-from PHPUnitKit.lib.runner import PHPUnit
+from PHPUnitKit.lib.annotations import annotate_view
+from PHPUnitKit.lib.annotations import forget_annotated_view
+from PHPUnitKit.lib.annotations import forget_annotations
+from PHPUnitKit.lib.configuration import load_configuration
+from PHPUnitKit.lib.metadata import forget_view
+from PHPUnitKit.lib.prewarm import prewarm_async
+from PHPUnitKit.lib.scheduler import forget_save_scheduler
+from PHPUnitKit.lib.scheduler import forget_saved_view
+from PHPUnitKit.lib.scheduler import get_save_scheduler
+from PHPUnitKit.lib.scheduler import is_changed_since_last_save
+from PHPUnitKit.lib.settings import forget_settings
+from PHPUnitKit.lib.symbols import invalidate_open_file_symbols
+from PHPUnitKit.lib.symbols import invalidate_symbols
+from PHPUnitKit.lib.testindex import update_test_index_async
+from PHPUnitKit.lib.testindex import update_test_index_file_async
+from PHPUnitKit.lib.utils import CONFIGURATION_FILE_NAMES
+from PHPUnitKit.lib.utils import debug_message
+from PHPUnitKit.lib.utils import find_switchable
 from PHPUnitKit.lib.utils import get_setting
+from PHPUnitKit.lib.utils import has_test
+from PHPUnitKit.lib.workspace import add_to_workspace_index
+from PHPUnitKit.lib.workspace import find_configuration_file
+from PHPUnitKit.lib.workspace import remove_workspace_index
+from PHPUnitKit.lib.workspace import update_workspace_index
 
 
 class Listener():
 
-    def on_post_save(self, view) -> None:
+    def on_load_project_async(self, window) -> None:
+        prewarm_async(window)
+
+    def on_pre_close_window(self, window) -> None:
+        remove_workspace_index(window)
+        forget_annotations(window)
+        forget_save_scheduler(window)
+
+    def on_activated_async(self, view) -> None:
+        # Unsaved edits to open files are only looked up again once another
+        # view is activated, so typing does not invalidate every lookup.
+        invalidate_open_file_symbols()
+
+        # Folders added to or removed from the window are indexed as soon as
+        # the window is focused again, rather than on the next lookup.
+        window = view.window()
+        if window:
+            update_workspace_index(window)
+
+    def on_load(self, view) -> None:
+        invalidate_symbols()
+        annotate_view(view)
+
+    def on_close(self, view) -> None:
+        forget_annotated_view(view)
+        forget_settings(view)
+        forget_view(view)
+        forget_saved_view(view)
+        invalidate_symbols()
+
+    def on_post_save_async(self, view) -> None:
         file_name = view.file_name()
         if not file_name:
             return
 
+        invalidate_symbols()
+
+        if os.path.basename(file_name) in CONFIGURATION_FILE_NAMES:
+            add_to_workspace_index(view.window(), file_name)
+            update_test_index_async(file_name)
+            return
+
         if not file_name.endswith('.php'):
             return
 
+        update_test_index_file_async(find_configuration_file(view.window(), file_name), file_name)
+
         on_post_save_events = get_setting(view, 'on_post_save')
         if on_post_save_events:
             if 'phpunit_test_file' in on_post_save_events:
-                PHPUnit(view.window()).run_file()
+                if not is_changed_since_last_save(view):
+                    debug_message('%s has not changed since it was last saved', file_name)
+                    return
+
+                self._schedule_test_file(view, file_name)
+
+    def _schedule_test_file(self, view, file_name: str) -> None:
+        window = view.window()
+        delay = get_setting(view, 'on_post_save_delay')
+
+        def _schedule(test_file: str) -> None:
+            configuration_file = find_configuration_file(window, test_file)
+            configuration = load_configuration(configuration_file)
+            if configuration and not configuration.includes(test_file):
+                debug_message('%s is not in any test suite', test_file)
+                return
+
+            get_save_scheduler(window).add(configuration_file, test_file, delay)
+
+        # Non-test files run their switchable test file instead.
+        if has_test(view):
+            _schedule(file_name)
+        else:
+            find_switchable(view, on_select=lambda switchable: _schedule(switchable.file))
@@ -0,0 +1,194 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import re
+
+from PHPUnitKit.lib.trie import PathTrie
+from PHPUnitKit.lib.utils import filter_path
+from PHPUnitKit.lib.utils import get_setting
+
+
+# Characters after which a path can start inside a parameter, for example
+# "--bootstrap=/path" or "include_path=/path:/other/path".
+_PATH_BOUNDARIES = '=: ;,'
+
+
+_mappings = {}  # type: dict
+
+
+class PathMapping():
+    """
+    A compiled set of local to remote path mappings.
+
+    The local paths are stored in a trie so every path in a parameter is
+    translated independently using its longest matching local path.
+    """
+
+    def __init__(self, mappings: dict):
+        self._trie = PathTrie()
+        for local_path, remote_path in mappings.items():
+            local_path = filter_path(local_path)
+            self._trie.insert(local_path.rstrip('/\\') or local_path, remote_path)
+
+        self._first_chars = set(local_path[:1] for local_path, remote_path in self._trie.items())
+
+    def _match(self, param: str, i: int):
+        if param[i] not in self._first_chars:
+            return None
+
+        # A path ends at the next separator of a list of paths, except for the
+        # colon of a Windows drive, e.g. "C:\\".
+        end = i
+        while end < len(param):
+            if param[end] in '=;,':
+                break
+            if param[end] == ':' and not (end == i + 1 and param[end + 1:end + 2] in ('/', '\\')):
+                break
+            end += 1
+
+        match = self._trie.longest_prefix(param[i:end])
+        if not match:
+            return None
+
+        local_path, remote_path = match
+        end = i + len(local_path)
+        if not param.startswith(local_path, i):
+            return None
+
+        # Only match whole path components.
+        if end < len(param) and param[end] not in '/\\' + _PATH_BOUNDARIES:
+            return None
+
+        return local_path, remote_path
+
+    def translate(self, param: str) -> str:
+        if not len(self._trie):
+            return param
+
+        translated = []
+        start = i = 0
+        while i < len(param):
+            if i == 0 or param[i - 1] in _PATH_BOUNDARIES:
+                match = self._match(param, i)
+                if match:
+                    translated.append(param[start:i])
+                    translated.append(match[1])
+                    i = start = i + len(match[0])
+                    continue
+            i += 1
+
+        if not translated:
+            return param
+
+        translated.append(param[start:])
+
+        return ''.join(translated)
+
+    def translate_params(self, params: list, working_dir=None) -> list:
+        # The {working_dir} placeholder is the remote path of the mapping that
+        # contains the working directory, not the translated working directory.
+        match = self._match(working_dir, 0) if working_dir and len(self._trie) else None
+        remote_working_dir = match[1] if match else None
+
+        def translate_param(param):
+            if not isinstance(param, str):
+                return param
+
+            param = self.translate(param)
+
+            if remote_working_dir and '{working_dir}' in param:
+                param = param.replace('{working_dir}', remote_working_dir)
+
+            return param
+
+        return [translate_param(param) for param in params]
+
+
+def get_path_mapping(mappings: dict) -> PathMapping:
+    key = tuple(sorted(mappings.items()))
+    mapping = _mappings.get(key)
+    if mapping is None:
+        mapping = _mappings[key] = PathMapping(mappings)
+
+    return mapping
+
+
+def resolve_path_mapping(view, paths: str, command_params: list, working_dir=None) -> list:
+    path_mappings = get_setting(view, paths)
+    if not path_mappings:
+        return command_params
+
+    return get_path_mapping(path_mappings).translate_params(command_params, working_dir)
+
+
+class OutputPathMapping():
+    """
+    The inverse of one or more path mappings, for translating test output.
+
+    The remote paths of each mapping are compiled into a single regular
+    expression so translating output costs one scan per mapping, regardless
+    of the number of paths mapped. Mappings are applied in order, so an
+    inner mapping (Docker) can be followed by an outer one (SSH).
+    """
+
+    def __init__(self, mappings: list):
+        self._passes = []  # type: list
+        for path_mappings in mappings:
+            local_paths = {}  # type: dict
+            for local_path, remote_path in path_mappings.items():
+                remote_path = remote_path.rstrip('/\\') or remote_path
+                local_paths.setdefault(remote_path, filter_path(local_path).rstrip('/\\'))
+
+            # Longest first so the most specific remote path wins. A remote
+            # path only matches at the start of a path, never inside one.
+            remote_paths = sorted(local_paths, key=len, reverse=True)
+            pattern = re.compile('(?<![\\w./\\\\-])(?:{})(?=[/\\\\:\\s]|$)'.format(
+                '|'.join(re.escape(remote_path) for remote_path in remote_paths)))
+
+            self._passes.append((pattern, local_paths))
+
+    def translate(self, text: str) -> str:
+        for pattern, local_paths in self._passes:
+            text = pattern.sub(lambda match: local_paths[match.group(0)], text)
+
+        return text
+
+
+def get_output_path_mappings(view) -> list:
+    """Return the path mappings that apply to the test output of {view}."""
+    mappings = []
+    if get_setting(view, 'docker') and get_setting(view, 'docker_paths'):
+        mappings.append(get_setting(view, 'docker_paths'))
+
+    if get_setting(view, 'ssh') and get_setting(view, 'ssh_paths'):
+        mappings.append(get_setting(view, 'ssh_paths'))
+
+    return mappings
+
+
+def get_output_path_mapping(mappings: list):
+    """Return the compiled inverse of {mappings}, or None if there are none."""
+    if not mappings:
+        return None
+
+    key = ('output',) + tuple(tuple(sorted(m.items())) for m in mappings)
+    mapping = _mappings.get(key)
+    if mapping is None:
+        mapping = _mappings[key] = OutputPathMapping(mappings)
+
+    return mapping
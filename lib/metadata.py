@@ -0,0 +1,225 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import re
+from bisect import bisect_right
+
+from sublime import Region
+from sublime import version
+
+from PHPUnitKit.lib.tokenizer import parse_pest_tests
+
+
+_PHP_IDENTIFIER_PATTERN = re.compile('^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+_views = {}  # type: dict
+_hits = 0
+_misses = 0
+
+
+def memoize(view, name: str, compute):
+    """
+    Return the value of {compute}(view), cached until the view changes.
+
+    Values are cached per view by {name} and are discarded whenever the view's
+    change count or syntax changes.
+    """
+    key = (view.change_count(), view.settings().get('syntax'))
+    entry = _views.get(view.id())
+    if entry is None or entry[0] != key:
+        entry = _views[view.id()] = (key, {})
+
+    global _hits, _misses
+
+    values = entry[1]  # type: dict
+    if name in values:
+        _hits += 1
+    else:
+        _misses += 1
+        values[name] = compute(view)
+
+    return values[name]
+
+
+def forget_view(view) -> None:
+    _views.pop(view.id(), None)
+
+
+def clear_views() -> None:
+    global _hits, _misses
+
+    _views.clear()
+    _hits = 0
+    _misses = 0
+
+
+def stats() -> str:
+    return 'view metadata cache: {} views, {} hits, {} misses'.format(len(_views), _hits, _misses)
+
+
+class FunctionIndex():
+    """
+    A sorted index of the function declarations in a view.
+
+    Each function is stored as the interval of its meta.function area and the
+    region of its name. Finding the function at a point is a binary search.
+    """
+
+    def __init__(self, function_areas: list, function_regions: list):
+        self._starts = []  # type: list
+        self._ends = []  # type: list
+        self._regions = []  # type: list
+
+        function_region_ends = [r.end() for r in function_regions]
+
+        for area in function_areas:
+            # The function regions are sorted and disjoint so the first one
+            # that can intersect the area is found by a binary search.
+            i = bisect_right(function_region_ends, area.begin())
+            if i >= len(function_regions) or not area.intersects(function_regions[i]):
+                continue
+
+            # An area nested in a previous area can never be found because
+            # the outer area always contains the same points.
+            if self._ends and area.end() <= self._ends[-1]:
+                continue
+
+            self._starts.append(area.begin())
+            self._ends.append(area.end())
+            self._regions.append(function_regions[i])
+
+    def find(self, pt: int):
+        """Return the name region of the function containing {pt}, or None."""
+        i = bisect_right(self._starts, pt) - 1
+        if i >= 0 and pt <= self._ends[i]:
+            return self._regions[i]
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+def get_function_index(view) -> FunctionIndex:
+    return memoize(view, 'function_index', lambda view: FunctionIndex(
+        view.find_by_selector('meta.function'),
+        view.find_by_selector('entity.name.function')))
+
+
+class PhpMetadata():
+    """
+    The namespaces and classes of a view.
+
+    Classes are stored as (namespace, name, region) tuples, where namespace is
+    the first namespace declared in the view.
+    """
+
+    def __init__(self, namespaces: list, classes: list):
+        self.namespaces = namespaces
+        self.classes = classes
+
+    @property
+    def namespace(self):
+        return self.namespaces[0][0] if self.namespaces else None
+
+    def class_names(self) -> list:
+        return [name for _, name, _ in self.classes]
+
+    def has_test_class(self) -> bool:
+        return any(name[-4:] == 'Test' for _, name, _ in self.classes)
+
+
+def _is_valid_php_identifier(string: str) -> bool:
+    return bool(_PHP_IDENTIFIER_PATTERN.match(string))
+
+
+def _find_php_metadata(view) -> PhpMetadata:
+    # See https://github.com/sublimehq/sublime_text/issues/5499
+    if int(version()) >= 4134:
+        namespace_selector = 'embedding.php meta.namespace meta.path'
+        class_selector = 'embedding.php entity.name.class - meta.use'
+    else:
+        namespace_selector = 'source.php entity.name.namespace'
+        class_selector = 'source.php entity.name.class - meta.use'
+
+    namespaces = [(view.substr(r), r) for r in view.find_by_selector(namespace_selector)]
+    namespace = namespaces[0][0] if namespaces else None  # TODO handle files with multiple namespaces
+
+    class_regions = view.find_by_selector(class_selector)
+    if int(version()) <= 3114:  # no pragma
+        if not class_regions:
+            class_regions = view.find_by_selector('source.php entity.name.type.class - meta.use')
+
+    classes = []
+    for region in class_regions:
+        name = view.substr(region)
+        if _is_valid_php_identifier(name):
+            classes.append((namespace, name, region))
+
+    return PhpMetadata(namespaces, classes)
+
+
+def get_php_metadata(view) -> PhpMetadata:
+    return memoize(view, 'php_metadata', _find_php_metadata)
+
+
+class PestTest():
+
+    def __init__(self, name: str, describe: tuple, begin: int, end: int):
+        self.name = name
+        self.describe = describe
+        self.begin = begin
+        self.end = end
+
+    def __repr__(self) -> str:
+        return 'PestTest({!r}, describe={!r}, begin={}, end={})'.format(self.name, self.describe, self.begin, self.end)
+
+
+class PestIndex():
+    """
+    An index of the Pest it() and test() declarations in a view.
+
+    Declarations are found with a single pass of the tokenizer and stored in
+    order, so finding the declaration nearest to a point is a binary search.
+    Each test records the names of the describe() blocks it is nested in,
+    which are found by the parentheses of the describe() calls.
+    """
+
+    def __init__(self, text: str):
+        self.tests = []  # type: list
+        self._ends = []  # type: list
+
+        for test in parse_pest_tests(text):
+            self.tests.append(PestTest(test['name'], tuple(test['describe']), test['begin'], test['end']))
+            self._ends.append(test['end'])
+
+    def find(self, pt: int):
+        """Return the last test declared before {pt}, or None."""
+        i = bisect_right(self._ends, pt) - 1
+        if i >= 0:
+            return self.tests[i]
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.tests)
+
+
+def get_pest_index(view) -> PestIndex:
+    return memoize(view, 'pest_index', lambda view: PestIndex(view.substr(Region(0, view.size()))))
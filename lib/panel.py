@@ -0,0 +1,149 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import collections
+import threading
+import time
+from typing import Optional
+
+from sublime import Region
+from sublime import set_timeout
+
+
+# The minimum time between two appends to a panel, which bounds the rate the
+# panel is redrawn at to 20 frames per second however fast output arrives.
+_FRAME_INTERVAL = 0.05
+
+
+class PanelWriter():
+    """
+    Append text to an output panel from any thread.
+
+    Writes are buffered and flushed to the panel at a bounded frame rate, with
+    all the text written since the last flush appended in a single command.
+
+    If {max_lines} is set, only the first half of that many lines and a
+    rolling tail of the last half stay unfolded. Everything written between
+    the two is folded as it scrolls out of the tail, so the panel shows the
+    start of the output and the progress while the tests run, and the summary
+    and failures at the end. The folded output is kept and can be unfolded.
+    """
+
+    def __init__(self, view, max_lines: int = 0, frame_interval: float = _FRAME_INTERVAL):
+        self.view = view
+        self.frame_interval = frame_interval
+        self.flushes = 0
+        self.elided = 0
+        self._head_lines = max_lines - max_lines // 2 if max_lines else 0
+        self._tail_lines = max_lines // 2
+        self._pending = []  # type: list
+        self._scheduled = False
+        self._closed = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+        # The number of lines and characters of the head, the length of each
+        # tail line, whether the last tail line is complete, and the number
+        # of characters between the head and the tail.
+        self._lines = 0
+        self._head_size = 0
+        self._tail = collections.deque()  # type: collections.deque
+        self._tail_complete = True
+        self._elided_size = 0
+
+        # Only touched on the UI thread: where the output starts in the panel
+        # and the number of characters folded so far.
+        self._begin: Optional[int] = None
+        self._folded_size = 0
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            if self._closed:
+                return
+
+            self._pending.append(text)
+            if self._head_lines:
+                self._count(text)
+
+            if self._scheduled:
+                return
+
+            self._scheduled = True
+            delay = self._last_flush + self.frame_interval - time.perf_counter()
+
+        set_timeout(self._flush, max(0, int(delay * 1000)))
+
+    def _count(self, text: str) -> None:
+        i = 0
+        while self._lines < self._head_lines:
+            j = text.find('\n', i)
+            if j < 0:
+                self._head_size += len(text)
+                return
+
+            self._lines += 1
+            i = j + 1
+
+        self._head_size += i
+
+        for line in text[i:].splitlines(True):
+            if self._tail_complete:
+                self._tail.append(len(line))
+                if len(self._tail) > self._tail_lines:
+                    self._elided_size += self._tail.popleft()
+                    self.elided += 1
+            else:
+                self._tail[-1] += len(line)
+
+            self._tail_complete = line[-1] == '\n'
+
+    def close(self) -> None:
+        """Flush the buffered output and stop accepting writes."""
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+            if self._scheduled:
+                return
+
+            self._scheduled = True
+
+        set_timeout(self._flush, 0)
+
+    def _flush(self) -> None:
+        with self._lock:
+            text = ''.join(self._pending)
+            self._pending.clear()
+            head_size = self._head_size
+            elided_size = self._elided_size
+            self._scheduled = False
+            self._last_flush = time.perf_counter()
+
+        begin = self._begin
+        if begin is None:
+            begin = self._begin = self.view.size()
+
+        if text:
+            self.flushes += 1
+            self.view.run_command('append', {'characters': text, 'force': True, 'scroll_to_end': True})
+
+        if elided_size > self._folded_size:
+            # The new fold overlaps the previous one, which it replaces.
+            fold_begin = begin + head_size
+            self.view.fold(Region(fold_begin, fold_begin + elided_size))
+            self._folded_size = elided_size
@@ -0,0 +1,147 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+
+import sublime
+
+from PHPUnitKit.lib.testindex import get_test_index
+from PHPUnitKit.lib.testindex import update_test_index_async
+
+
+_items = {}  # type: dict
+
+
+class PickedTest():
+
+    def __init__(self, configuration_file: str, file: str, class_name, name: str, line: int):
+        self.configuration_file = configuration_file
+        self.working_dir = os.path.dirname(configuration_file)
+        self.file = file
+        self.class_name = class_name
+        self.name = name
+        self.line = line
+
+    def caption(self) -> str:
+        if self.class_name is None:
+            return self.name
+
+        return '{}::{}'.format(self.class_name.rsplit('\\', 1)[-1], self.name)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PickedTest) and \
+            (self.file, self.class_name, self.name) == (other.file, other.class_name, other.name)
+
+    def __repr__(self) -> str:
+        return 'PickedTest({!r}, {!r}, {!r})'.format(self.file, self.class_name, self.name)
+
+
+def get_picker_items(configuration_files: list) -> tuple:
+    """
+    Return the tests in the indexes of {configuration_files} and their quick panel items.
+
+    The lists are cached until one of the indexes changes, so the quick panel
+    opens instantly however many tests there are.
+    """
+    indexes = [get_test_index(configuration_file) for configuration_file in configuration_files]
+    key = tuple((index.configuration_file, index.generation) for index in indexes)
+
+    if key not in _items:
+        tests = []
+        items = []
+        for index in indexes:
+            for file, class_name, name, line in index.tests():
+                test = PickedTest(index.configuration_file, file, class_name, name, line)
+                tests.append(test)
+                items.append([test.caption(), '{}:{}'.format(os.path.relpath(file, test.working_dir), line)])
+
+        _items.clear()
+        _items[key] = (tests, items)
+
+    return _items[key]
+
+
+def build_pick_filter_option(tests: list) -> str:
+    """Return a --filter option that matches exactly the picked {tests}."""
+    names = []
+    for test in tests:
+        if test.class_name is None:
+            names.append(re.escape(test.name))
+        else:
+            names.append(re.escape(test.class_name) + '::' + re.escape(test.name))
+
+    if all(test.class_name is None for test in tests):
+        return '(' + '|'.join(names) + ')'
+
+    return '^(' + '|'.join(names) + ')( with data set .+)?$'
+
+
+def show_test_picker(window, configuration_files: list, on_done, selected=None, selected_index: int = 0) -> None:
+    """
+    Show a quick panel of every indexed test.
+
+    Selecting a test calls {on_done} with the list of picked tests. Selecting
+    with the primary modifier key (ctrl or cmd) adds the test to the picked
+    tests and reopens the panel, with an extra first item to run them all.
+    """
+    for configuration_file in configuration_files:
+        update_test_index_async(configuration_file)
+
+    tests, items = get_picker_items(configuration_files)
+    if not tests:
+        sublime.status_message('PHPUnit: no tests found, the test index may still be building')
+        return
+
+    selected = selected or []
+    if selected:
+        items = [['Run {} selected test(s)'.format(len(selected)), ', '.join(t.caption() for t in selected)]] + items
+
+    def _on_select(index: int, event=None) -> None:
+        if index < 0:
+            return
+
+        if selected:
+            if index == 0:
+                on_done(selected)
+                return
+            index -= 1
+
+        test = tests[index]
+        if event and event.get('modifier_keys', {}).get('primary'):
+            if test in selected:
+                selected.remove(test)
+            elif selected and test.configuration_file != selected[0].configuration_file:
+                sublime.status_message('PHPUnit: can only run picked tests from one working directory')
+            else:
+                selected.append(test)
+
+            sublime.set_timeout(lambda: show_test_picker(
+                window, configuration_files, on_done, selected, index + 1 if selected else index))
+            return
+
+        picked = list(selected)
+        if test not in picked:
+            if picked and test.configuration_file != picked[0].configuration_file:
+                picked = []
+            picked.append(test)
+
+        on_done(picked)
+
+    flags = getattr(sublime, 'WANT_EVENT', 0)
+
+    window.show_quick_panel(items, _on_select, flags, selected_index)
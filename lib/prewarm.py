@@ -0,0 +1,77 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import time
+
+from PHPUnitKit.lib import strategy
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.testindex import update_test_index_async
+from PHPUnitKit.lib.utils import debug_message
+from PHPUnitKit.lib.utils import get_php_executable
+from PHPUnitKit.lib.utils import get_phpunit_executable
+from PHPUnitKit.lib.workspace import get_workspace_index
+from PHPUnitKit.lib.workspace import update_workspace_index
+
+
+def prewarm_async(window) -> None:
+    """Prewarm {window} on the workspace index worker thread, once its folders are indexed."""
+    if window:
+        update_workspace_index(window, lambda: prewarm(window))
+
+
+def prewarm(window) -> None:
+    """
+    Resolve everything a test run needs for each folder in {window}.
+
+    This is expensive and should be run off the UI thread. It warms the
+    workspace index, the test indexes, the settings snapshot, the executable
+    caches and the output panel color scheme, so that the first test run in a
+    session is as fast as any other.
+    """
+    if not window:
+        return
+
+    start = time.perf_counter()
+
+    index = get_workspace_index(window)
+    index.update(window.folders())
+    configuration_files = index.configuration_files()
+
+    for configuration_file in configuration_files:
+        update_test_index_async(configuration_file)
+
+    view = window.active_view()
+    if view:
+        get_settings(view)
+
+        for configuration_file in configuration_files:
+            working_dir = os.path.dirname(configuration_file)
+            try:
+                get_php_executable(view, working_dir)
+                get_phpunit_executable(view, working_dir)
+            except ValueError as e:
+                debug_message('prewarm: %s: %s', working_dir, e)
+
+        strategy._get_color_scheme(view)
+
+    debug_message(
+        'prewarm: %d working dir(s) in %d folder(s) in %.2fms',
+        len(configuration_files),
+        len(window.folders()),
+        (time.perf_counter() - start) * 1000)
@@ -0,0 +1,312 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import codecs
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import Optional
+
+
+# The size of each read from the process output.
+_READ_SIZE = 65536
+
+
+# The maximum number of test processes that run at the same time, across all
+# windows. Runs started beyond it wait until a running process exits.
+_MAX_RUNNING = max(1, os.cpu_count() or 1)
+
+
+_processes = {}  # type: dict
+_queue = []  # type: list
+_processes_lock = threading.Lock()
+
+
+class ProcessListener():
+    """
+    The lifecycle events of a TestProcess.
+
+    All events except on_spawned are called on the reader thread. A process
+    that was queued behind the maximum number of running processes is
+    spawned on the reader thread of the process it was waiting for.
+    """
+
+    def on_spawned(self, process) -> None:
+        pass
+
+    def on_first_byte(self, process) -> None:
+        pass
+
+    def on_lines(self, process, lines: list) -> None:
+        """Receive a batch of complete lines, without line endings."""
+        pass
+
+    def on_exit(self, process, returncode) -> None:
+        """Handle the exit of the process, once all output has been read.
+
+        {returncode} is None if the process could not be started.
+        """
+        pass
+
+
+def _expand_env(env: dict) -> dict:
+    proc_env = os.environ.copy()
+    for key, value in env.items():
+        proc_env[key] = os.path.expandvars(value)
+
+    return proc_env
+
+
+class TestProcess():
+    """
+    A test command run with subprocess.Popen.
+
+    The output is read in large chunks on a reader thread, decoded, split into
+    complete lines and passed to the listener in batches, so a process that
+    writes hundreds of thousands of lines never blocks the UI thread.
+    """
+
+    def __init__(self, cmd: list, env: dict, working_dir: str, listener: ProcessListener):
+        self.cmd = cmd
+        self.env = env
+        self.working_dir = working_dir
+        self.listener = listener
+        self.key = ()  # type: tuple
+        self.proc: Optional[subprocess.Popen] = None
+        self.queued = False
+        self.killed = False
+        self.start_time: Optional[float] = None
+        self.first_byte_time: Optional[float] = None
+        self.exit_time: Optional[float] = None
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+
+        startupinfo = None
+        if os.name == 'nt':
+            startupinfo = subprocess.STARTUPINFO()  # type: ignore[attr-defined]
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore[attr-defined]
+
+        try:
+            proc = subprocess.Popen(
+                self.cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                startupinfo=startupinfo,
+                env=_expand_env(self.env),
+                cwd=self.working_dir,
+                # A new session makes the process the leader of a new process
+                # group, so killing the group also kills its children.
+                start_new_session=os.name != 'nt')
+        except (OSError, ValueError) as e:
+            self.exit_time = time.perf_counter()
+            self.listener.on_lines(self, [str(e)])
+            self.listener.on_exit(self, None)
+            _process_exited(self)
+            return
+
+        self.proc = proc
+        self.listener.on_spawned(self)
+
+        self._reader = threading.Thread(target=self._read, args=(proc,), name='PHPUnitKit reader', daemon=True)
+        self._reader.start()
+
+    def _read(self, proc: subprocess.Popen) -> None:
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        pending = ''
+        stdout = proc.stdout
+        if stdout is None:
+            return
+
+        fd = stdout.fileno()
+
+        while True:
+            try:
+                data = os.read(fd, _READ_SIZE)
+            except OSError:
+                data = b''
+
+            if data and self.first_byte_time is None:
+                self.first_byte_time = time.perf_counter()
+                self.listener.on_first_byte(self)
+
+            text = pending + decoder.decode(data, final=not data)
+
+            # A carriage return at the end may be the first half of a \r\n
+            # split across two reads, so it is held back until the next read.
+            held = ''
+            if data and text.endswith('\r'):
+                text, held = text[:-1], '\r'
+
+            # A bare carriage return, which progress output uses to redraw a
+            # line, is a line break, the way the exec command treats it.
+            lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+            # The last line is incomplete until the end of the output.
+            pending = lines.pop() + held if data else ''
+            if not data and lines and lines[-1] == '':
+                lines.pop()
+
+            if lines:
+                self.listener.on_lines(self, lines)
+
+            if not data:
+                break
+
+        stdout.close()
+        returncode = proc.wait()
+        self.exit_time = time.perf_counter()
+        self.listener.on_exit(self, returncode)
+        _process_exited(self)
+
+    def poll(self) -> bool:
+        """Return True if the process is running."""
+        return self.proc is not None and self.proc.poll() is None
+
+    def kill(self) -> None:
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            return
+
+        self.killed = True
+        if os.name == 'nt':
+            # Kill the whole process tree, the way the exec command does.
+            startupinfo = subprocess.STARTUPINFO()  # type: ignore[attr-defined]
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore[attr-defined]
+            subprocess.Popen(['taskkill', '/T', '/F', '/PID', str(proc.pid)], startupinfo=startupinfo)
+        else:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+            except OSError:
+                proc.terminate()
+
+    def wait(self, timeout=None) -> None:
+        """Wait until the output has been read and the process has exited."""
+        if self._reader is not None:
+            self._reader.join(timeout)
+
+    def elapsed(self) -> float:
+        if self.start_time is None:
+            return 0.0
+
+        end = self.exit_time if self.exit_time is not None else time.perf_counter()
+
+        return end - self.start_time
+
+
+def _is_running(process: TestProcess) -> bool:
+    return not process.queued and process.exit_time is None
+
+
+def start_process(window, cmd: list, env: dict, working_dir: str, listener: ProcessListener,
+                  tag: str = '') -> TestProcess:
+    """
+    Start a test process in {working_dir} for {window}.
+
+    The processes that {window} was running in {working_dir} are killed, and
+    processes running in other working directories are left running. A
+    {tag} names one of several processes that run together in the same
+    working directory, such as the shards of a sharded run, and only a
+    process with the same tag is killed. If the maximum number of processes
+    are already running, the process is queued and started when one of them
+    exits.
+    """
+    process = TestProcess(cmd, env, working_dir, listener)
+    process.key = (window.id(), working_dir, tag)
+
+    with _processes_lock:
+        if tag:
+            previous = [key for key in _processes if key == process.key]
+        else:
+            previous = [key for key in _processes if key[:2] == process.key[:2]]
+
+        previous_processes = [_processes.pop(key) for key in previous]
+        _processes[process.key] = process
+
+    for previous_process in previous_processes:
+        _kill(previous_process)
+
+    with _processes_lock:
+        if sum(1 for p in _processes.values() if _is_running(p)) > _MAX_RUNNING:
+            process.queued = True
+            _queue.append(process)
+            return process
+
+    process.start()
+
+    return process
+
+
+def _process_exited(process: TestProcess) -> None:
+    with _processes_lock:
+        if _processes.get(process.key) is process:
+            del _processes[process.key]
+
+        running = sum(1 for p in _processes.values() if _is_running(p))
+        ready = []
+        while _queue and running < _MAX_RUNNING:
+            next_process = _queue.pop(0)
+            next_process.queued = False
+            ready.append(next_process)
+            running += 1
+
+    for next_process in ready:
+        next_process.start()
+
+
+def _kill(process: TestProcess) -> None:
+    with _processes_lock:
+        queued = process in _queue
+        if queued:
+            _queue.remove(process)
+
+    if queued:
+        process.killed = True
+        process.listener.on_exit(process, None)
+    else:
+        process.kill()
+
+
+def get_processes(window) -> list:
+    """Return the working directories and processes, running or queued, of {window}."""
+    with _processes_lock:
+        processes = [(key[1], p) for key, p in _processes.items() if key[0] == window.id()]
+
+    return sorted(processes, key=lambda item: (item[0] or '', item[1].key[2]))
+
+
+def kill_process(window, working_dir=None) -> None:
+    """Kill the process of {window} in {working_dir}, or all of the processes of {window}."""
+    with _processes_lock:
+        keys = [key for key in _processes if key[0] == window.id() and working_dir in (None, key[1])]
+        processes = [_processes.pop(key) for key in keys]
+
+    for process in processes:
+        _kill(process)
+
+
+def kill_all_processes() -> None:
+    with _processes_lock:
+        processes = list(_processes.values())
+        _processes.clear()
+
+    for process in processes:
+        _kill(process)
@@ -0,0 +1,423 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import codecs
+import itertools
+import os
+import re
+import tempfile
+import threading
+from typing import BinaryIO
+from typing import Optional
+from xml.etree import ElementTree
+
+
+PASSED = 'passed'
+FAILED = 'failed'
+ERROR = 'error'
+SKIPPED = 'skipped'
+
+
+_TEAMCITY_MESSAGE_PATTERN = re.compile('^##teamcity\\[(\\w+)(.*)\\]\\s*$')
+_TEAMCITY_ATTRIBUTE_PATTERN = re.compile('(\\w+)=\'((?:[^\'|]|\\|.)*)\'')
+_TEAMCITY_ESCAPE_PATTERN = re.compile('\\|(0x[0-9a-fA-F]{4}|.)')
+_TEAMCITY_ESCAPES = {'n': '\n', 'r': '\r', '\'': '\'', '|': '|', '[': '[', ']': ']'}
+_LOCATION_HINT_PATTERN = re.compile('^\\w+_qn://(.+?)::(.+)$')
+_FILE_LINE_PATTERN = re.compile('^\\s*(?:at )?(.+?):(\\d+)\\s*$', re.MULTILINE)
+_DATA_SET_PATTERN = re.compile(' with data set .+$')
+
+
+_counter = itertools.count(1)
+
+
+_results = {}  # type: dict
+
+
+class TestResult():
+    """The outcome of a test that did not pass."""
+
+    __slots__ = ('id', 'status', 'duration', 'message', 'file', 'line')
+
+    def __init__(self, id: str, status: str, duration: float, message: str, file, line: int):
+        self.id = id
+        self.status = status
+        self.duration = duration
+        self.message = message
+        self.file = file
+        self.line = line
+
+    def __repr__(self) -> str:
+        return 'TestResult({!r}, {!r}, {!r}, {!r}, {!r}, {!r})'.format(
+            self.id, self.status, self.duration, self.message, self.file, self.line)
+
+
+class TestResults():
+    """
+    The results of a test run.
+
+    Passed tests are only counted, and their durations summed per file, so the
+    memory used by a run grows with the number of failures and test files, not
+    the number of tests. Results are added on the process reader thread and
+    read on the UI thread.
+    """
+
+    def __init__(self, working_dir: str):
+        self.working_dir = working_dir
+        self.counts = {PASSED: 0, FAILED: 0, ERROR: 0, SKIPPED: 0}
+        self.file_durations = {}  # type: dict
+        self.finished = False
+        self.cursor = -1
+        self._failures = []  # type: list
+        self._lock = threading.Lock()
+
+    def add(self, id: str, status: str, duration: float = 0.0, message: str = '', file=None, line: int = 0,
+            test_file=None) -> None:
+        """Add the result of a test, with {test_file} the file that declares it if it is not {file}."""
+        test_file = test_file or file
+        with self._lock:
+            self.counts[status] += 1
+            if test_file:
+                self.file_durations[test_file] = self.file_durations.get(test_file, 0.0) + duration
+
+            if status in (FAILED, ERROR):
+                self._failures.append(TestResult(id, status, duration, message, file, line))
+
+    def merge(self, results) -> None:
+        """Add all the results of another run, for example of one shard of a run."""
+        failures = results.failures()
+        with self._lock:
+            for status, count in results.counts.items():
+                self.counts[status] += count
+
+            for file, duration in results.file_durations.items():
+                self.file_durations[file] = self.file_durations.get(file, 0.0) + duration
+
+            self._failures.extend(failures)
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def failures(self, start: int = 0) -> list:
+        """Return the failures, or only those after the first {start}."""
+        with self._lock:
+            return self._failures[start:]
+
+    def next_failure(self, step: int = 1):
+        """Move the failure cursor by {step} and return the failure at it, wrapping around."""
+        with self._lock:
+            if not self._failures:
+                return None
+
+            if self.cursor < 0 and step < 0:
+                self.cursor = 0
+
+            self.cursor = (self.cursor + step) % len(self._failures)
+
+            return self._failures[self.cursor]
+
+    def summary(self) -> str:
+        parts = ['{} tests'.format(self.total())]
+        for status in (FAILED, ERROR, SKIPPED):
+            if self.counts[status]:
+                parts.append('{} {}'.format(self.counts[status], status))
+
+        return ', '.join(parts)
+
+
+def _unescape_teamcity(value: str) -> str:
+    if '|' not in value:
+        return value
+
+    def _replace(match):
+        escape = match.group(1)
+        if len(escape) > 1:
+            return chr(int(escape[2:], 16))
+
+        return _TEAMCITY_ESCAPES.get(escape, escape)
+
+    return _TEAMCITY_ESCAPE_PATTERN.sub(_replace, value)
+
+
+def _find_file_line(details: str, file, working_dir: str) -> tuple:
+    """Return the file and line of the first frame in {details}, preferring frames in {file}."""
+    first = None
+    for match in _FILE_LINE_PATTERN.finditer(details):
+        frame = (os.path.join(working_dir, match.group(1)), int(match.group(2)))
+        if file is None or frame[0] == file:
+            return frame
+
+        if first is None:
+            first = frame
+
+    return first if first else (file, 0)
+
+
+class ResultsParser():
+    """An incremental parser of a results log that adds the results to a TestResults."""
+
+    def __init__(self, results: TestResults):
+        self.results = results
+
+    def feed(self, data) -> None:
+        """Parse the next chunk of the log, which may end part way through a result."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Parse anything that is left once the whole log has been fed."""
+        pass
+
+
+class TeamCityParser(ResultsParser):
+    """
+    An incremental parser of PHPUnit, Paratest and Pest TeamCity logs.
+
+    Text is fed as it is written, in chunks of any size, and each complete
+    service message is parsed as soon as its line is complete.
+    """
+
+    def __init__(self, results: TestResults):
+        super().__init__(results)
+        self._partial = ''
+        self._test: Optional[tuple] = None
+        self._status = PASSED
+        self._message = ''
+        self._details = ''
+
+    def feed(self, data) -> None:
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.parse_line(line)
+
+    def close(self) -> None:
+        if self._partial:
+            self.parse_line(self._partial)
+            self._partial = ''
+
+    def parse_line(self, line: str) -> None:
+        if not line.startswith('##teamcity['):
+            return
+
+        match = _TEAMCITY_MESSAGE_PATTERN.match(line)
+        if not match:
+            return
+
+        event = match.group(1)
+        attributes = {k: _unescape_teamcity(v) for k, v in _TEAMCITY_ATTRIBUTE_PATTERN.findall(match.group(2))}
+
+        if event == 'testStarted':
+            self._test = self._parse_location(attributes)
+            self._status = PASSED
+            self._message = ''
+            self._details = ''
+        elif event == 'testFailed':
+            self._status = FAILED
+            self._message = attributes.get('message', '')
+            self._details = attributes.get('details', '')
+        elif event == 'testIgnored':
+            self._status = SKIPPED
+            self._message = attributes.get('message', '')
+        elif event == 'testFinished' and self._test:
+            id, test_file = self._test
+            file, file_line = test_file, 0
+            if self._status != PASSED:
+                file, file_line = _find_file_line(self._details, test_file, self.results.working_dir)
+
+            try:
+                duration = int(attributes.get('duration', 0)) / 1000
+            except ValueError:
+                duration = 0.0
+
+            self.results.add(id, self._status, duration, self._message, file, file_line, test_file)
+            self._test = None
+
+    def _parse_location(self, attributes: dict) -> tuple:
+        name = attributes.get('name', '')
+        match = _LOCATION_HINT_PATTERN.match(attributes.get('locationHint', ''))
+        if not match:
+            return (name, None)
+
+        file, id = match.groups()
+        if file and not os.path.isabs(file):
+            file = os.path.join(self.results.working_dir, file)
+
+        return (id.lstrip('\\'), file)
+
+
+class JUnitParser(ResultsParser):
+    """
+    An incremental parser of JUnit XML logs.
+
+    Each <testcase> element is discarded as soon as it has been parsed so the
+    document is never held in memory.
+    """
+
+    def __init__(self, results: TestResults):
+        super().__init__(results)
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._stack = []  # type: list
+
+    def feed(self, data) -> None:
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self) -> None:
+        try:
+            self._parser.close()
+        except ElementTree.ParseError:
+            pass
+
+        self._read_events()
+
+    def _read_events(self) -> None:
+        try:
+            for event, element in self._parser.read_events():
+                if event == 'start':
+                    self._stack.append(element)
+                    continue
+
+                self._stack.pop()
+                if element.tag == 'testcase':
+                    self._add(element)
+                    if self._stack:
+                        self._stack[-1].remove(element)
+        except ElementTree.ParseError:
+            pass
+
+    def _add(self, element) -> None:
+        class_name = element.get('class') or element.get('classname', '').replace('.', '\\')
+        name = element.get('name', '')
+        id = class_name + '::' + name if class_name else name
+        test_file = file = element.get('file')
+        line = int(element.get('line') or 0)
+
+        try:
+            duration = float(element.get('time') or 0)
+        except ValueError:
+            duration = 0.0
+
+        status = PASSED
+        message = ''
+        for child in element:
+            if child.tag in ('failure', 'error'):
+                status = FAILED if child.tag == 'failure' else ERROR
+                message = child.get('message') or (child.text or '').strip().split('\n')[0]
+                if child.text:
+                    file, line = _find_file_line(child.text, file, self.results.working_dir)
+                break
+            if child.tag == 'skipped':
+                status = SKIPPED
+
+        self.results.add(id, status, duration, message, file, line, test_file)
+
+
+class ResultsLog():
+    """
+    A TeamCity or JUnit log file written by a test run.
+
+    The log is read incrementally while the tests run, so results are
+    available as soon as they are logged and the log is never read twice.
+    """
+
+    def __init__(self, format: str, path: str, results: TestResults, owned: bool = True):
+        self.format = format
+        self.path = path
+        self.results = results
+        self.owned = owned
+        self._file: Optional[BinaryIO] = None
+        self._parser: ResultsParser
+        if format == 'junit':
+            self._parser = JUnitParser(results)
+            self._decoder = None
+        else:
+            self._parser = TeamCityParser(results)
+            self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def options(self) -> dict:
+        """Return the options that make the run write the log, unless it already does."""
+        if not self.owned:
+            return {}
+
+        return {'log-' + self.format: self.path}
+
+    def poll(self) -> None:
+        """Parse anything written to the log since it was last polled."""
+        if self._file is None:
+            try:
+                self._file = open(self.path, 'rb')
+            except OSError:
+                return
+
+        data = self._file.read()
+        if data:
+            self._parser.feed(self._decoder.decode(data) if self._decoder else data)
+
+    def close(self) -> None:
+        self.poll()
+        self._parser.close()
+        self.results.finished = True
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        if self.owned:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def create_results_log(format: str, working_dir: str, options: dict) -> ResultsLog:
+    """
+    Return a results log for a run in {working_dir}.
+
+    A log option already in {options} is read but left in place, otherwise the
+    log is written to a temporary file that is removed when the log is closed.
+    """
+    results = TestResults(working_dir)
+
+    path = options.get('log-' + format)
+    if isinstance(path, str):
+        return ResultsLog(format, os.path.join(working_dir, path), results, owned=False)
+
+    path = os.path.join(tempfile.gettempdir(), 'phpunitkit-{}-{}.{}'.format(
+        os.getpid(), next(_counter), 'xml' if format == 'junit' else 'log'))
+
+    return ResultsLog(format, path, results)
+
+
+def build_failures_filter_option(failures: list) -> str:
+    """Return a --filter option that matches the tests of {failures}, with all their data sets."""
+    ids = []
+    for failure in failures:
+        id = re.escape(_DATA_SET_PATTERN.sub('', failure.id))
+        if id not in ids:
+            ids.append(id)
+
+    if all('::' not in failure.id for failure in failures):
+        return '(' + '|'.join(ids) + ')'
+
+    return '^(' + '|'.join(ids) + ')( with data set .+)?$'
+
+
+def set_results(window, results: TestResults) -> None:
+    _results[window.id()] = results
+
+
+def get_results(window):
+    return _results.get(window.id())
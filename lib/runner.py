@@ -22,29 +22,42 @@ from sublime import ENCODED_POSITION
 from sublime import status_message
 
 from PHPUnitKit.lib import strategy
-from PHPUnitKit.lib.utils import build_cmd_options
+from PHPUnitKit.lib.command import get_command_plan
+from PHPUnitKit.lib.picker import build_pick_filter_option
+from PHPUnitKit.lib.picker import show_test_picker
+from PHPUnitKit.lib.process import get_processes
+from PHPUnitKit.lib.process import kill_process
+from PHPUnitKit.lib.results import build_failures_filter_option
+from PHPUnitKit.lib.results import create_results_log
+from PHPUnitKit.lib.results import get_results
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.shards import get_shard_count
+from PHPUnitKit.lib.shards import load_durations
+from PHPUnitKit.lib.shards import plan_shards
+from PHPUnitKit.lib.ssh import ensure_ssh_master_async
+from PHPUnitKit.lib.ssh import find_ssh_master
+from PHPUnitKit.lib.testindex import get_test_index
 from PHPUnitKit.lib.utils import build_filter_option
 from PHPUnitKit.lib.utils import debug_message
 from PHPUnitKit.lib.utils import debug_settings
 from PHPUnitKit.lib.utils import find_nearest_tests
-from PHPUnitKit.lib.utils import find_phpunit_working_directory
 from PHPUnitKit.lib.utils import find_switchable
 from PHPUnitKit.lib.utils import get_active_view
 from PHPUnitKit.lib.utils import get_last_run
-from PHPUnitKit.lib.utils import get_osx_term_script_path
 from PHPUnitKit.lib.utils import get_php_executable
 from PHPUnitKit.lib.utils import get_phpunit_executable
 from PHPUnitKit.lib.utils import get_phpunit_options
 from PHPUnitKit.lib.utils import get_setting
 from PHPUnitKit.lib.utils import has_test
-from PHPUnitKit.lib.utils import is_debug
 from PHPUnitKit.lib.utils import kill_any_running_tests
 from PHPUnitKit.lib.utils import put_views_side_by_side
-from PHPUnitKit.lib.utils import resolve_path_mapping
 from PHPUnitKit.lib.utils import resolve_working_dir
 from PHPUnitKit.lib.utils import save_views
 from PHPUnitKit.lib.utils import set_last_run
 from PHPUnitKit.lib.utils import set_session
+from PHPUnitKit.lib.workspace import find_configuration_file
+from PHPUnitKit.lib.workspace import find_working_directory
+from PHPUnitKit.lib.workspace import get_workspace_index
 
 
 class PHPUnit():
@@ -53,75 +66,31 @@ class PHPUnit():
         self.window = window
         self.view = get_active_view(window)
 
-    def run(self, working_dir=None, file=None, options=None) -> None:
+    def run(self, working_dir=None, file=None, options=None):
+        """Run the tests and return the test process, or None if the tests could not be run."""
+        settings = get_settings(self.view)
+
         debug_message('run working_dir=%s, file=%s, options=%s', working_dir, file, options)
         debug_settings(self.view)
 
-        kill_any_running_tests(self.window)
-
-        env = {}
-
         try:
+            if not working_dir:
+                working_dir = find_working_directory(self.window, self.view.file_name())
+
             working_dir = resolve_working_dir(self.view, working_dir)
             php_executable = get_php_executable(self.view, working_dir)
-            if php_executable:
-                env['PATH'] = os.path.dirname(php_executable) + os.pathsep + os.environ['PATH']
             phpunit_executable = get_phpunit_executable(self.view, working_dir)
             options = get_phpunit_options(self.view, options)
 
-            cmd = []
-
-            try:
-                cmd += get_setting(self.view, 'prepend_cmd')
-            except TypeError:
-                pass
-
-            # Strategy
-            if get_setting(self.view, 'strategy') == 'kitty':
-                cmd += ['kitty', '--hold']
-            elif get_setting(self.view, 'strategy') == 'iterm':
-                cmd.append(get_osx_term_script_path())
-            elif get_setting(self.view, 'strategy') == 'powershell':
-                cmd += ['powershell', '-Command']
-            elif get_setting(self.view, 'strategy') == 'xterm':
-                cmd += ['xterm', '-hold', '-e']
-            elif get_setting(self.view, 'strategy') == 'cmd':
-                cmd += ['cmd.exe', '/c']
-
-            if get_setting(self.view, 'ssh'):
-                cmd += ['ssh']
-                for ssh_option, ssh_option_value in get_setting(self.view, 'ssh_options').items():
-                    cmd += [ssh_option]
-                    if isinstance(ssh_option_value, str):
-                        cmd += [ssh_option_value]
-
-                cmd += ['{}@{}'.format(
-                    get_setting(self.view, 'ssh_user'),
-                    get_setting(self.view, 'ssh_host'))
-                ]
-
-                cmd += ['cd {working_dir};']
-
-            if get_setting(self.view, 'docker'):
-                cmd += get_setting(self.view, 'docker_command')
-
-            cmd += phpunit_executable
-
-            build_cmd_options(options, cmd)
-
-            if file:
-                cmd.append(os.path.relpath(file, working_dir))
-
-            if get_setting(self.view, 'ssh'):
-                cmd = resolve_path_mapping(self.view, 'ssh_paths', cmd)
-
-            if get_setting(self.view, 'docker'):
-                cmd = resolve_path_mapping(self.view, 'docker_paths', cmd)
+            plan = get_command_plan(self.view, working_dir, php_executable, phpunit_executable, options)
+            env = plan.env
+            results_log = strategy.create_results_log(self.view, working_dir, options)
+            cmd = plan.build(file, options, results_log.options() if results_log else None)
 
         except Exception as e:
             status_message('PHPUnit: {}'.format(e))
             print('PHPUnit: \'{}\''.format(e))
-            if is_debug(self.view):
+            if settings.get('debug'):
                 raise e
             return
 
@@ -135,7 +104,7 @@ class PHPUnit():
             cmd
         )
 
-        if get_setting(self.view, 'save_all_on_run'):
+        if settings.get('save_all_on_run'):
             save_views(self.window)
 
         set_last_run({
@@ -144,10 +113,72 @@ class PHPUnit():
             'options': options
         })
 
-        if get_setting(self.view, 'strategy') == 'tmux':
+        if settings.get('strategy') == 'tmux':
             cmd = strategy.build_tmux_cmd(self.view, working_dir, cmd)
 
-        strategy.execute(self.window, self.view, env, cmd, working_dir)
+        # A run that starts before the master connection is up connects
+        # directly, so the master is started without delaying the run.
+        ssh_master = find_ssh_master(self.view)
+        if ssh_master:
+            ensure_ssh_master_async(ssh_master)
+
+        return strategy.execute(self.window, self.view, env, cmd, working_dir, results_log)
+
+    def run_sharded(self, options=None) -> None:
+        settings = get_settings(self.view)
+
+        try:
+            if settings.get('strategy') not in ('sublime', 'basic'):
+                raise ValueError('sharded runs require the sublime strategy')
+
+            if settings.get('ssh') or settings.get('docker'):
+                raise ValueError('sharded runs are not supported over SSH or in Docker')
+
+            configuration_file = find_configuration_file(self.window, self.view.file_name())
+            if not configuration_file:
+                raise ValueError('could not find a PHPUnit configuration file')
+
+            working_dir = resolve_working_dir(self.view, os.path.dirname(configuration_file))
+
+            # Each shard is given its own test files, PHPUnit and Pest alike,
+            # so it never loads the whole test suite.
+            test_files = sorted(set(test[0] for test in get_test_index(configuration_file).tests()))
+            if not test_files:
+                raise ValueError('no tests found, the test index may still be building')
+
+            durations = load_durations(working_dir)
+            shards = plan_shards(test_files, durations, get_shard_count(settings.get('shards')))
+
+            php_executable = get_php_executable(self.view, working_dir)
+            phpunit_executable = get_phpunit_executable(self.view, working_dir)
+            options = get_phpunit_options(self.view, options)
+            plan = get_command_plan(self.view, working_dir, php_executable, phpunit_executable, options)
+
+            cmds = []
+            results_logs = []
+            for _, files in shards:
+                results_log = create_results_log('junit', working_dir, {})
+                cmds.append(plan.build(files, options, results_log.options()))
+                results_logs.append(results_log)
+
+        except Exception as e:
+            status_message('PHPUnit: {}'.format(e))
+            print('PHPUnit: \'{}\''.format(e))
+            if settings.get('debug'):
+                raise e
+            return
+
+        debug_message('sharded run of %d test files in %s: %s', len(test_files), working_dir, [
+            ('{:.2f}s'.format(duration), len(files)) for duration, files in shards])
+
+        if settings.get('save_all_on_run'):
+            save_views(self.window)
+
+        header = 'Running {} test files in {} shards'.format(len(test_files), len(shards))
+        if durations:
+            header += ', about {:.1f}s each'.format(max(duration for duration, _ in shards))
+
+        strategy.execute_sharded(self.window, self.view, plan.env, cmds, working_dir, results_logs, header)
 
     def run_last(self) -> None:
         last_test_args = get_last_run()
@@ -197,14 +228,102 @@ class PHPUnit():
                     file=switchable.file,
                     options=options))
 
+    def pick(self, options=None) -> None:
+        if options is None:
+            options = {}
+
+        configuration_file = find_configuration_file(self.window, self.view.file_name())
+        if configuration_file:
+            configuration_files = [configuration_file]
+        else:
+            configuration_files = get_workspace_index(self.window).configuration_files()
+
+        if not configuration_files:
+            status_message('PHPUnit: could not find a PHPUnit working directory')
+            return
+
+        def _on_done(tests: list) -> None:
+            files = set(test.file for test in tests)
+            pick_options = options.copy()
+            pick_options['filter'] = build_pick_filter_option(tests)
+
+            self.run(
+                working_dir=tests[0].working_dir,
+                file=files.pop() if len(files) == 1 else None,
+                options=pick_options)
+
+        show_test_picker(self.window, configuration_files, _on_done)
+
+    def run_failed(self) -> None:
+        results = get_results(self.window)
+        failures = results.failures() if results else []
+        if not failures:
+            status_message('PHPUnit: no failed tests')
+            return
+
+        self.run(
+            working_dir=results.working_dir,
+            options={'filter': build_failures_filter_option(failures)})
+
+    def goto_failure(self, step: int = 1) -> None:
+        results = get_results(self.window)
+        failure = results.next_failure(step) if results else None
+        if not failure or not failure.file:
+            status_message('PHPUnit: no failed tests')
+            return
+
+        self.window.open_file('{}:{}'.format(failure.file, failure.line), ENCODED_POSITION)
+        status_message('PHPUnit: {}'.format(failure.message))
+
+    def execute(self, cmd=None, env=None, working_dir=None, kill=False) -> None:
+        if kill:
+            kill_process(self.window, working_dir)
+            return
+
+        if cmd:
+            strategy.execute(self.window, self.view, env or {}, cmd, working_dir)
+
     def show(self) -> None:
-        self.window.run_command('show_panel', {'panel': 'output.exec'})
+        strategy.show_output_panel(self.window)
 
     def cancel(self) -> None:
-        kill_any_running_tests(self.window)
+        runs = {}  # type: dict
+        for working_dir, process in get_processes(self.window):
+            runs.setdefault(working_dir, []).append(process)
+
+        if not runs:
+            status_message('PHPUnit: no tests are running')
+            return
+
+        if len(runs) == 1:
+            kill_any_running_tests(self.window)
+            return
+
+        working_dirs = sorted(runs, key=lambda working_dir: working_dir or '')
+        items = [['Cancel all test runs', '{} runs'.format(len(runs))]]
+        for working_dir in working_dirs:
+            processes = runs[working_dir]
+            if all(process.queued or process.start_time is None for process in processes):
+                state = 'waiting'
+            else:
+                state = 'running for {:.0f}s'.format(max(p.elapsed() for p in processes if p.start_time is not None))
+
+            if len(processes) > 1:
+                state += ', {} shards'.format(len(processes))
+
+            caption = os.path.basename(working_dir or '') or str(working_dir)
+            items.append([caption, '{} ({})'.format(working_dir, state)])
+
+        def _on_done(index: int) -> None:
+            if index == 0:
+                kill_any_running_tests(self.window)
+            elif index > 0:
+                kill_process(self.window, working_dirs[index - 1])
+
+        self.window.show_quick_panel(items, _on_done)
 
     def coverage(self) -> None:
-        working_dir = find_phpunit_working_directory(self.view.file_name(), self.window.folders())
+        working_dir = find_working_directory(self.window, self.view.file_name())
         if not working_dir:
             status_message('PHPUnit: could not find a PHPUnit working directory')
             return
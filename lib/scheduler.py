@@ -0,0 +1,201 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+import threading
+
+from sublime import set_timeout
+
+from PHPUnitKit.lib.runner import PHPUnit
+from PHPUnitKit.lib.testindex import get_test_index
+from PHPUnitKit.lib.utils import debug_message
+
+
+# The default number of milliseconds to wait for more saves before running.
+_DEFAULT_DELAY = 300
+
+
+# The number of milliseconds between checks for the exit of a run that other
+# runs in the same working directory are waiting for.
+_POLL_INTERVAL = 250
+
+
+_schedulers = {}  # type: dict
+
+
+_change_counts = {}  # type: dict
+
+
+class SaveScheduler():
+    """
+    Coalesce the test files saved in a window into as few runs as possible per working directory.
+
+    Every save restarts the delay, so saving many files at once, for example
+    with Save All, runs the tests once after the last save. The saved test
+    files are run together: a single file is run as is, several files are
+    run as their common directory filtered to their test classes. Files that
+    cannot be filtered by class, such as Pest files or files that are not
+    indexed yet, are run one at a time, each after the previous run in the
+    working directory exits, so a run never covers more than the saved files.
+    """
+
+    def __init__(self, window, run=None):
+        self.window = window
+        self.runs = 0
+        self._run = run or (lambda **kwargs: PHPUnit(window).run(**kwargs))
+        self._files = []  # type: list
+        self._token = 0
+        self._waiting = {}  # type: dict
+        self._lock = threading.Lock()
+
+    def add(self, configuration_file, file: str, delay=None) -> None:
+        if not isinstance(delay, int):
+            delay = _DEFAULT_DELAY
+
+        with self._lock:
+            if (configuration_file, file) not in self._files:
+                self._files.append((configuration_file, file))
+
+            self._token += 1
+            token = self._token
+
+        set_timeout(lambda: self._fire(token), max(0, delay))
+
+    def _fire(self, token: int) -> None:
+        with self._lock:
+            if token != self._token:
+                return
+
+            groups = {}  # type: dict
+            for configuration_file, file in self._files:
+                if configuration_file not in groups:
+                    groups[configuration_file] = []
+                groups[configuration_file].append(file)
+
+            del self._files[:]
+
+        for configuration_file, files in groups.items():
+            working_dir = os.path.dirname(configuration_file) if configuration_file else None
+            runs = _coalesce(configuration_file, working_dir, files)
+            debug_message('on save: running %d saved test file(s) as %s', len(files), runs)
+
+            with self._lock:
+                # Runs queued behind a run that is still going wait for it
+                # too, rather than replacing it.
+                if working_dir in self._waiting:
+                    self._waiting[working_dir][1].extend(runs)
+                    continue
+
+            self._start(working_dir, runs)
+
+    def _start(self, working_dir, runs: list) -> None:
+        file, options = runs[0]
+        self.runs += 1
+        process = self._run(working_dir=working_dir, file=file, options=options)
+
+        if len(runs) > 1 and not process:
+            # The run could not be started, so there is nothing to wait for.
+            debug_message('on save: %s could not be run, starting the next run', file)
+            self._start(working_dir, runs[1:])
+            return
+
+        if len(runs) > 1:
+            with self._lock:
+                polling = bool(self._waiting)
+                self._waiting[working_dir] = (process, runs[1:])
+
+            if not polling:
+                set_timeout(self._poll, _POLL_INTERVAL)
+
+    def _poll(self) -> None:
+        ready = []
+        with self._lock:
+            for working_dir, (process, runs) in list(self._waiting.items()):
+                if process.killed:
+                    # The run was cancelled, so the runs waiting for it are too.
+                    del self._waiting[working_dir]
+                elif process.exit_time is not None:
+                    del self._waiting[working_dir]
+                    ready.append((working_dir, runs))
+
+        for working_dir, runs in ready:
+            self._start(working_dir, runs)
+
+        with self._lock:
+            polling = bool(self._waiting)
+
+        if polling:
+            set_timeout(self._poll, _POLL_INTERVAL)
+
+
+def _coalesce(configuration_file, working_dir, files: list) -> list:
+    """Return the (file, options) of the fewest runs of the test {files} that run nothing else."""
+    if len(files) == 1 or not configuration_file:
+        return [(file, {}) for file in files]
+
+    test_index = get_test_index(configuration_file)
+    classes = []
+    filtered_files = []
+    runs = []  # type: list
+    for test_file in files:
+        file_classes = test_index.classes(test_file)
+        if file_classes:
+            classes.extend(file_classes)
+            filtered_files.append(test_file)
+        else:
+            # A file that is not indexed yet (or a Pest file) cannot be
+            # filtered by class, so it is run on its own.
+            runs.append((test_file, {}))
+
+    if len(filtered_files) == 1:
+        runs.insert(0, (filtered_files[0], {}))
+    elif filtered_files:
+        file = os.path.commonpath(filtered_files)
+        if working_dir and os.path.normcase(file) == os.path.normcase(working_dir):
+            file = None
+
+        runs.insert(0, (file, {'filter': '^(' + '|'.join(re.escape(name) for name in classes) + ')::'}))
+
+    return runs
+
+
+def get_save_scheduler(window) -> SaveScheduler:
+    scheduler = _schedulers.get(window.id())
+    if scheduler is None:
+        scheduler = _schedulers[window.id()] = SaveScheduler(window)
+
+    return scheduler
+
+
+def forget_save_scheduler(window) -> None:
+    _schedulers.pop(window.id(), None)
+
+
+def is_changed_since_last_save(view) -> bool:
+    """Return False if {view} has not changed since it was last saved, True otherwise."""
+    change_count = view.change_count()
+    if _change_counts.get(view.id()) == change_count:
+        return False
+
+    _change_counts[view.id()] = change_count
+
+    return True
+
+
+def forget_saved_view(view) -> None:
+    _change_counts.pop(view.id(), None)
@@ -0,0 +1,144 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from types import MappingProxyType
+
+from sublime import load_settings
+
+
+# All the settings in Preferences.sublime-settings, without the "phpunit." prefix.
+SETTINGS = (
+    'artisan',
+    'composer',
+    'debug',
+    'docker',
+    'docker_command',
+    'docker_paths',
+    'executable',
+    'failure_annotations',
+    'font_size',
+    'on_post_save',
+    'on_post_save_delay',
+    'options',
+    'output_max_lines',
+    'paratest',
+    'pest',
+    'php_executable',
+    'php_versions_path',
+    'prepend_cmd',
+    'results_log',
+    'save_all_on_run',
+    'shards',
+    'ssh',
+    'ssh_control_master',
+    'ssh_host',
+    'ssh_options',
+    'ssh_paths',
+    'ssh_user',
+    'strategy',
+    'switchable_rules',
+    'tmux_clear',
+    'tmux_clear_scrollback',
+    'tmux_target',
+)
+
+
+_ON_CHANGE_KEY = 'PHPUnitKit'
+
+
+_snapshots = {}  # type: dict
+_observed = set()  # type: set
+_debug = set()  # type: set
+_global_debug = []  # type: list
+
+
+class Settings():
+    """
+    An immutable snapshot of the phpunit.* settings of a view.
+
+    Snapshots are discarded whenever the settings of their view, or the global
+    preferences, change. Values are shared between callers and must be treated
+    as read-only.
+    """
+
+    def __init__(self, values: dict):
+        self._values = MappingProxyType(values)
+        self.fingerprint = repr(sorted(values.items()))
+
+    def get(self, name: str):
+        return self._values.get(name)
+
+    def items(self):
+        return self._values.items()
+
+
+def _read(view) -> Settings:
+    settings = view.settings()
+
+    return Settings({name: settings.get('phpunit.' + name) for name in SETTINGS})
+
+
+def get_settings(view) -> Settings:
+    view_id = view.id()
+    snapshot = _snapshots.get(view_id)
+    if snapshot is None:
+        snapshot = _snapshots[view_id] = _read(view)
+        if snapshot.get('debug'):
+            _debug.add(view_id)
+        else:
+            _debug.discard(view_id)
+
+        if view_id not in _observed:
+            _observed.add(view_id)
+            view.settings().add_on_change(_ON_CHANGE_KEY, lambda: _invalidate(view_id))
+
+    return snapshot
+
+
+def _invalidate(view_id: int) -> None:
+    _snapshots.pop(view_id, None)
+    _debug.discard(view_id)
+
+
+def forget_settings(view) -> None:
+    _invalidate(view.id())
+    _observed.discard(view.id())
+
+
+def clear_settings() -> None:
+    _snapshots.clear()
+    _debug.clear()
+    del _global_debug[:]
+
+
+def is_any_debug() -> bool:
+    """
+    Return True if debug is enabled globally or for any view with a snapshot.
+
+    This is a cheap check that avoids crossing the API boundary when debug is
+    disabled, which is almost always.
+    """
+    if not _global_debug:
+        preferences = load_settings('Preferences.sublime-settings')
+        if None not in _observed:
+            _observed.add(None)
+            preferences.add_on_change(_ON_CHANGE_KEY, clear_settings)
+
+        _global_debug.append(bool(preferences.get('phpunit.debug')))
+
+    return _global_debug[0] or bool(_debug)
@@ -0,0 +1,116 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import heapq
+import json
+import os
+import threading
+
+from sublime import cache_path
+
+from PHPUnitKit.lib.utils import debug_message
+
+
+# The weight given to the latest duration of a file over its history.
+_DURATION_SMOOTHING = 0.5
+
+
+_durations = {}  # type: dict
+_durations_lock = threading.Lock()
+
+
+def _durations_file(working_dir: str) -> str:
+    key = hashlib.sha1(working_dir.encode('utf-8')).hexdigest()
+
+    return os.path.join(cache_path(), __name__.split('.')[0], 'durations', key + '.json')
+
+
+def load_durations(working_dir: str) -> dict:
+    """Return the historical duration in seconds of each test file run in {working_dir}."""
+    with _durations_lock:
+        durations = _durations.get(working_dir)
+        if durations is None:
+            try:
+                with open(_durations_file(working_dir), encoding='utf-8') as f:
+                    durations = json.load(f)
+            except (OSError, ValueError):
+                durations = {}
+
+            _durations[working_dir] = durations
+
+        return dict(durations)
+
+
+def record_durations(working_dir: str, durations: dict) -> None:
+    """
+    Record the durations of the test files of a run in {working_dir}.
+
+    The recorded duration of a file is smoothed over its runs, so a single
+    slow or fast run does not skew the shards of the next sharded run.
+    """
+    if not durations:
+        return
+
+    history = load_durations(working_dir)
+    for file, duration in durations.items():
+        if file in history:
+            duration = _DURATION_SMOOTHING * duration + (1 - _DURATION_SMOOTHING) * history[file]
+        history[file] = round(duration, 4)
+
+    with _durations_lock:
+        _durations[working_dir] = history
+
+    durations_file = _durations_file(working_dir)
+    try:
+        os.makedirs(os.path.dirname(durations_file), exist_ok=True)
+        with open(durations_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(history, f, separators=(',', ':'))
+        os.replace(durations_file + '.tmp', durations_file)
+    except OSError as e:
+        debug_message('could not save test durations \'%s\': %s', durations_file, e)
+
+
+def plan_shards(files: list, durations: dict, count: int) -> list:
+    """
+    Split {files} into at most {count} shards of about the same total duration.
+
+    Uses longest processing time first scheduling: the files are taken from
+    the slowest to the fastest and each is added to the shard with the least
+    total duration so far. Files without a recorded duration are estimated
+    at the mean recorded duration. Returns a list of tuples of the estimated
+    duration and the files of each shard.
+    """
+    known = [durations[file] for file in files if file in durations]
+    default = sum(known) / len(known) if known else 1.0
+
+    count = max(1, min(count, len(files)))
+    shards = [(0.0, i, []) for i in range(count)]  # type: list
+    for duration, file in sorted(((durations.get(f, default), f) for f in files), key=lambda d: (-d[0], d[1])):
+        total, i, shard_files = heapq.heappop(shards)
+        shard_files.append(file)
+        heapq.heappush(shards, (total + duration, i, shard_files))
+
+    return [(total, sorted(shard_files)) for total, i, shard_files in sorted(shards, key=lambda s: s[1]) if shard_files]
+
+
+def get_shard_count(count) -> int:
+    """Return the number of shards to run, {count} or the number of CPU cores if it is not set."""
+    if isinstance(count, int) and count > 0:
+        return count
+
+    return max(1, os.cpu_count() or 1)
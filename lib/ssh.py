@@ -0,0 +1,212 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from sublime import cache_path
+
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.utils import debug_message
+
+
+# The number of seconds an idle master connection is kept open. Masters are
+# closed when the plugin is unloaded, this only bounds the lifetime of one
+# left behind if Sublime Text exits without unloading the plugin.
+_CONTROL_PERSIST = 600
+
+
+# The maximum length of a control socket path. Unix domain socket paths are
+# limited to 104 bytes on macOS and 108 bytes on Linux.
+_MAX_CONTROL_PATH_LENGTH = 100
+
+
+# The number of seconds to wait for a master connection to be established.
+_CONNECT_TIMEOUT = 30
+
+
+# The number of seconds to wait for a control command such as a health check.
+_CONTROL_TIMEOUT = 5
+
+
+# The number of seconds to wait before trying to start a master again after it
+# failed to start, so an unreachable host does not cost every run a connection
+# attempt.
+_RETRY_DELAY = 60
+
+
+_masters = {}  # type: dict
+_masters_lock = threading.Lock()
+
+
+def build_ssh_options(ssh_options: dict) -> list:
+    args = []
+    for ssh_option, ssh_option_value in ssh_options.items():
+        args.append(ssh_option)
+        if isinstance(ssh_option_value, str):
+            args.append(ssh_option_value)
+
+    return args
+
+
+def _control_path(key: str) -> str:
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    control_path = os.path.join(cache_path(), __name__.split('.')[0], 'ssh', name)
+    if len(control_path) > _MAX_CONTROL_PATH_LENGTH:
+        control_path = os.path.join(tempfile.gettempdir(), 'phpunitkit-ssh-' + name)
+
+    return control_path
+
+
+class SshMaster():
+    """
+    A persistent multiplexed SSH connection to a host.
+
+    Test runs connect through the master's control socket, which skips the
+    TCP connection, key exchange and authentication of a new connection. A
+    run started while the master is down connects directly, so the master
+    only ever makes runs faster.
+
+    A master that failed to start is not started again until _RETRY_DELAY
+    seconds have passed.
+    """
+
+    def __init__(self, destination: str, args: list, control_path: str, ssh: str = 'ssh'):
+        self.destination = destination
+        self.args = args
+        self.control_path = control_path
+        self.ssh = ssh
+        self.starts = 0
+        self._failure_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def options(self) -> list:
+        """Return the options that make an ssh command use the master, if it is running."""
+        return ['-o', 'ControlMaster=no', '-o', 'ControlPath=' + self.control_path]
+
+    def _run(self, args: list, timeout: int) -> int:
+        try:
+            return subprocess.run(
+                [self.ssh] + args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout).returncode
+        except (OSError, subprocess.TimeoutExpired) as e:
+            debug_message('ssh master %s: %s', self.destination, e)
+            return -1
+
+    def _control(self, command: str) -> int:
+        return self._run(self.args + ['-o', 'ControlPath=' + self.control_path, '-O', command, self.destination],
+                         _CONTROL_TIMEOUT)
+
+    def is_alive(self) -> bool:
+        return os.path.exists(self.control_path) and self._control('check') == 0
+
+    def start(self) -> bool:
+        os.makedirs(os.path.dirname(self.control_path), exist_ok=True)
+        self.starts += 1
+        returncode = self._run(self.args + [
+            '-o', 'BatchMode=yes',
+            '-o', 'ControlMaster=yes',
+            '-o', 'ControlPath=' + self.control_path,
+            '-o', 'ControlPersist={}'.format(_CONTROL_PERSIST),
+            '-f',
+            '-N',
+            self.destination
+        ], _CONNECT_TIMEOUT)
+
+        debug_message('ssh master %s: started with exit code %s', self.destination, returncode)
+
+        return returncode == 0
+
+    def is_retry_delayed(self) -> bool:
+        """Return True if the master failed to start less than _RETRY_DELAY seconds ago."""
+        failure_time = self._failure_time
+
+        return failure_time is not None and time.perf_counter() - failure_time < _RETRY_DELAY
+
+    def ensure(self) -> bool:
+        """Check that the master is running, starting it if it is not, and return True if it is running."""
+        with self._lock:
+            if self.is_alive():
+                return True
+
+            if self.is_retry_delayed():
+                return False
+
+            if self.start():
+                self._failure_time = None
+                return True
+
+            self._failure_time = time.perf_counter()
+
+            return False
+
+    def stop(self) -> None:
+        with self._lock:
+            if os.path.exists(self.control_path):
+                self._control('exit')
+
+
+def get_ssh_master(user: str, host: str, ssh_options: dict) -> SshMaster:
+    destination = '{}@{}'.format(user, host)
+    args = build_ssh_options(ssh_options)
+    key = repr((destination, args))
+
+    with _masters_lock:
+        master = _masters.get(key)
+        if master is None:
+            master = _masters[key] = SshMaster(destination, args, _control_path(key))
+
+    return master
+
+
+def find_ssh_master(view):
+    """Return the master connection for the SSH settings of {view}, or None if runs do not use one."""
+    settings = get_settings(view)
+    if not settings.get('ssh') or not settings.get('ssh_control_master') or not is_multiplexing_supported():
+        return None
+
+    return get_ssh_master(settings.get('ssh_user'), settings.get('ssh_host'), settings.get('ssh_options'))
+
+
+def ensure_ssh_master_async(master: SshMaster) -> None:
+    """Ensure {master} is running on a thread of its own, so a slow connection never blocks other work."""
+    if master.is_retry_delayed():
+        return
+
+    threading.Thread(target=master.ensure, name='PHPUnitKit ssh master', daemon=True).start()
+
+
+def is_multiplexing_supported() -> bool:
+    # The Windows port of OpenSSH does not support connection multiplexing.
+    return os.name != 'nt'
+
+
+def stop_ssh_masters() -> None:
+    with _masters_lock:
+        masters = list(_masters.values())
+        _masters.clear()
+
+    for master in masters:
+        master.stop()
@@ -15,57 +15,322 @@
 # You should have received a copy of the GNU General Public License
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
+import collections
 import os
 import re
 import shlex
+import threading
+import time
 
 from sublime import cache_path
 from sublime import load_resource
 from sublime import platform
-
+from sublime import status_message
+
+from PHPUnitKit.lib.annotations import get_failure_annotations
+from PHPUnitKit.lib.mapping import get_output_path_mapping
+from PHPUnitKit.lib.mapping import get_output_path_mappings
+from PHPUnitKit.lib.panel import PanelWriter
+from PHPUnitKit.lib.process import ProcessListener
+from PHPUnitKit.lib.process import kill_process
+from PHPUnitKit.lib.process import start_process
+from PHPUnitKit.lib.results import TestResults
+from PHPUnitKit.lib.results import create_results_log as _create_results_log
+from PHPUnitKit.lib.results import set_results
+from PHPUnitKit.lib.shards import record_durations
 from PHPUnitKit.lib.utils import debug_message
 from PHPUnitKit.lib.utils import get_setting
 from PHPUnitKit.lib.utils import is_debug
 
 
-def execute(window, view, env: dict, cmd: list, working_dir: str) -> None:
-    if get_setting(view, 'strategy') in ('cmd', 'external', 'iterm', 'kitty', 'powershell', 'tmux', 'xterm'):
-        window.run_command('exec', {
-            'env': env,
-            'cmd': cmd,
-            'quiet': not is_debug(view),
-            'shell': False,
-            'working_dir': working_dir
-        })
+_OUTPUT_PANEL_NAME = 'phpunit'
 
-        # Don't display exec output panel.
-        window.run_command('hide_panel', {'panel': 'output.exec'})
-    else:
-        window.run_command('exec', {
-            'env': env,
-            'cmd': cmd,
-            'file_regex': _exec_file_regex(),
-            'quiet': not is_debug(view),
-            'shell': False,
-            'syntax': 'Packages/{}/res/text-ui-result.sublime-syntax'.format(__name__.split('.')[0]),
-            'word_wrap': False,
-            'working_dir': working_dir
-        })
 
-        _create_exec_output_panel(view, env, cmd)
+_output_panel_names = {}  # type: dict
 
 
-def _create_exec_output_panel(view, env, cmd) -> None:
-    panel = view.window().create_output_panel('exec')
+_last_output_panel_names = {}  # type: dict
+
+
+_EXTERNAL_STRATEGIES = ('cmd', 'external', 'iterm', 'kitty', 'powershell', 'tmux', 'xterm')
+
+
+# The minimum number of seconds between status bar updates while tests run.
+_STATUS_INTERVAL = 0.25
+
+
+def _get_output_max_lines(view) -> int:
+    try:
+        return max(0, int(get_setting(view, 'output_max_lines') or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _PanelListener(ProcessListener):
+    """Write the output of a test run to the output panel."""
+
+    def __init__(self, view, panel, results_log=None, annotations=None):
+        self.writer = PanelWriter(panel, max_lines=_get_output_max_lines(view))
+        self.output_path_mapping = get_output_path_mapping(get_output_path_mappings(view))
+        self.results_log = results_log
+        self.annotations = annotations
+        self.annotated = 0
+        self.status_time = 0.0
+
+    def on_spawned(self, process) -> None:
+        debug_message('spawned pid %s in %.2fms', process.proc.pid, process.elapsed() * 1000)
+
+    def on_first_byte(self, process) -> None:
+        debug_message('first byte in %.2fms', process.elapsed() * 1000)
+
+    def on_lines(self, process, lines: list) -> None:
+        if process.killed:
+            return
+
+        text = '\n'.join(lines) + '\n'
+        if self.output_path_mapping:
+            text = self.output_path_mapping.translate(text)
+
+        self.writer.write(text)
+
+        if self.results_log:
+            self.results_log.poll()
+            self._annotate()
+            now = time.perf_counter()
+            if now - self.status_time >= _STATUS_INTERVAL:
+                self.status_time = now
+                status_message('PHPUnit: running, {}'.format(self.results_log.results.summary()))
+
+    def on_exit(self, process, returncode) -> None:
+        if self.results_log:
+            self.results_log.close()
+
+        if process.killed:
+            return
+
+        if self.results_log:
+            self._annotate()
+            record_durations(self.results_log.results.working_dir, self.results_log.results.file_durations)
+            status_message('PHPUnit: {}'.format(self.results_log.results.summary()))
+
+        if returncode is None:
+            self.writer.write('[Could not start the test process]\n')
+        elif returncode:
+            self.writer.write('[Finished in {:.1f}s with exit code {}]\n'.format(process.elapsed(), returncode))
+        else:
+            self.writer.write('[Finished in {:.1f}s]\n'.format(process.elapsed()))
+
+        self.writer.close()
+
+        if self.writer.elided:
+            debug_message('folded %d lines of output', self.writer.elided)
+
+    def _annotate(self) -> None:
+        if self.annotations:
+            failures = self.results_log.results.failures(self.annotated)
+            if failures:
+                self.annotated += len(failures)
+                self.annotations.add(failures)
+
+
+# The number of lines of output kept from each shard, shown if it fails
+# without reporting any test results, for example with a fatal error.
+_SHARD_OUTPUT_LINES = 20
+
+
+class _ShardedRun():
+    """Merge the results of the shards of a sharded run and report them when all have exited."""
+
+    def __init__(self, panel, results: TestResults, shards: int, annotations=None):
+        self.writer = PanelWriter(panel)
+        self.results = results
+        self.shards = shards
+        self.annotations = annotations
+        self.exited = 0
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def shard_exited(self, index: int, process, results: TestResults, returncode, output) -> None:
+        if process.killed:
+            return
+
+        self.results.merge(results)
+        if self.annotations:
+            self.annotations.add(results.failures())
+
+        text = 'Shard {}/{}: {} in {:.1f}s'.format(index + 1, self.shards, results.summary(), process.elapsed())
+        if returncode is None:
+            text += ', could not be started'
+        elif returncode:
+            text += ' with exit code {}'.format(returncode)
+
+        if returncode != 0 and not results.total():
+            text += '\n\n' + '\n'.join(output) + '\n'
+
+        self.writer.write(text + '\n')
+
+        with self._lock:
+            self.exited += 1
+            self.failed = self.failed or returncode != 0
+            done = self.exited == self.shards
+
+        if done:
+            self._report()
+
+    def _report(self) -> None:
+        self.results.finished = True
+        record_durations(self.results.working_dir, self.results.file_durations)
+
+        lines = ['']
+        failures = self.results.failures()
+        if failures:
+            lines.append('There {} {} failure{}:'.format(
+                'was' if len(failures) == 1 else 'were', len(failures), '' if len(failures) == 1 else 's'))
+            lines.append('')
+            for i, failure in enumerate(failures, 1):
+                lines.append('{}) {}'.format(i, failure.id))
+                lines.append(failure.message.rstrip())
+                lines.append('')
+                if failure.file:
+                    lines.append('{}:{}'.format(failure.file, failure.line))
+                    lines.append('')
+
+        counts = self.results.counts
+        if failures or self.failed:
+            lines.append('FAILURES!')
+            lines.append('Tests: {}, Failures: {}, Errors: {}, Skipped: {}.'.format(
+                self.results.total(), counts['failed'], counts['error'], counts['skipped']))
+        else:
+            lines.append('OK ({} tests)'.format(self.results.total()))
+
+        self.writer.write('\n'.join(lines) + '\n')
+        self.writer.close()
+        status_message('PHPUnit: {}'.format(self.results.summary()))
+
+
+class _ShardListener(ProcessListener):
+    """Read the output and JUnit results of one shard of a sharded run."""
+
+    def __init__(self, run: _ShardedRun, index: int, results_log):
+        self.run = run
+        self.index = index
+        self.results_log = results_log
+        self.output = collections.deque(maxlen=_SHARD_OUTPUT_LINES)  # type: collections.deque
+
+    def on_lines(self, process, lines: list) -> None:
+        self.output.extend(lines)
+
+    def on_exit(self, process, returncode) -> None:
+        self.results_log.close()
+        self.run.shard_exited(self.index, process, self.results_log.results, returncode, list(self.output))
+
+
+def execute_sharded(window, view, env: dict, cmds: list, working_dir: str, results_logs: list, header: str) -> None:
+    """Run each of {cmds} as a shard in {working_dir}, reading its results from its results log."""
+    name = _last_output_panel_names[window.id()] = _get_output_panel_name(window, working_dir)
+    panel = _create_output_panel(view, env, cmds[0], working_dir, name)
+    if view.settings().get('show_panel_on_build', True):
+        show_output_panel(window)
+
+    get_failure_annotations(window).clear(working_dir)
+    annotations = get_failure_annotations(window) if get_setting(view, 'failure_annotations') else None
+
+    results = TestResults(working_dir)
+    set_results(window, results)
+
+    run = _ShardedRun(panel, results, len(cmds), annotations)
+    run.writer.write(header + '\n\n')
+
+    kill_process(window, working_dir)
+    for i, (cmd, results_log) in enumerate(zip(cmds, results_logs)):
+        start_process(window, cmd, env, working_dir, _ShardListener(run, i, results_log), 'shard {}'.format(i + 1))
+
+
+def create_results_log(view, working_dir: str, options: dict):
+    """
+    Return the log to read the results of a run from, or None.
+
+    Results are only read from runs shown in the output panel, and not from
+    runs over SSH or in Docker because the log is written to a remote path.
+    """
+    format = get_setting(view, 'results_log')
+    if format not in ('junit', 'teamcity'):
+        return None
+
+    if get_setting(view, 'strategy') in _EXTERNAL_STRATEGIES:
+        return None
+
+    if get_setting(view, 'ssh') or get_setting(view, 'docker'):
+        return None
+
+    return _create_results_log(format, working_dir, options)
 
-    if is_debug(view):
-        header_text = []
-        if env:
-            header_text.append("env: {}\n".format(env))
-        header_text.append("{}\n\n".format(' '.join(cmd)))
-        panel.run_command('insert', {'characters': ''.join(header_text)})
+
+def _get_output_panel_name(window, working_dir) -> str:
+    """
+    Return the name of the output panel of the runs in {working_dir}.
+
+    The first working directory run in a window uses the "phpunit" panel, and
+    each other working directory gets a panel of its own, named after it.
+    """
+    names = _output_panel_names.setdefault(window.id(), {})
+    name = names.get(working_dir)
+    if name is None:
+        if not names:
+            name = _OUTPUT_PANEL_NAME
+        else:
+            name = '{} {}'.format(_OUTPUT_PANEL_NAME, os.path.basename(working_dir or '') or len(names))
+            if name in names.values():
+                name = '{} {}'.format(name, len(names))
+
+        names[working_dir] = name
+
+    return name
+
+
+def show_output_panel(window) -> None:
+    """Show the output panel of the last run in {window}."""
+    name = _last_output_panel_names.get(window.id(), _OUTPUT_PANEL_NAME)
+    window.run_command('show_panel', {'panel': 'output.' + name})
+
+
+def execute(window, view, env: dict, cmd: list, working_dir: str, results_log=None):
+    name = _last_output_panel_names[window.id()] = _get_output_panel_name(window, working_dir)
+    panel = _create_output_panel(view, env, cmd, working_dir, name)
+    annotations = None
+
+    # The tests of external strategies run in a terminal, so their output
+    # panel only shows failures to start it and is not shown.
+    if get_setting(view, 'strategy') not in _EXTERNAL_STRATEGIES:
+        if view.settings().get('show_panel_on_build', True):
+            show_output_panel(window)
+
+        annotations = get_failure_annotations(window)
+        annotations.clear(working_dir)
+        if not results_log or not get_setting(view, 'failure_annotations'):
+            annotations = None
+
+        if results_log:
+            set_results(window, results_log.results)
+
+    process = start_process(window, cmd, env, working_dir, _PanelListener(view, panel, results_log, annotations))
+
+    if process.queued:
+        status_message('PHPUnit: waiting for a running test run to finish')
+
+    return process
+
+
+def _create_output_panel(view, env, cmd, working_dir=None, name=_OUTPUT_PANEL_NAME):
+    panel = view.window().create_output_panel(name)
 
     panel_settings = panel.settings()
+    panel_settings.set('result_file_regex', _exec_file_regex())
+    panel_settings.set('result_base_dir', working_dir)
+    panel_settings.set('word_wrap', False)
+    panel_settings.set('line_numbers', False)
+    panel_settings.set('gutter', False)
+    panel_settings.set('scroll_past_end', False)
     panel_settings.set('rulers', [])
     panel_settings.set('highlight_line', False)
     panel_settings.set('draw_indent_guides', False)
@@ -77,6 +342,22 @@ def _create_exec_output_panel(view, env, cmd) -> None:
 
     panel_settings.set('color_scheme', _get_color_scheme(view))
 
+    panel.set_syntax_file('Packages/{}/res/text-ui-result.sublime-syntax'.format(__name__.split('.')[0]))
+    panel.set_read_only(True)
+
+    # Call create_output_panel() a second time after assigning the settings so
+    # that the panel is picked up as a result buffer by next_result (F4).
+    view.window().create_output_panel(name)
+
+    if is_debug(view):
+        header_text = []
+        if env:
+            header_text.append("env: {}\n".format(env))
+        header_text.append("{}\n\n".format(' '.join(cmd)))
+        panel.run_command('append', {'characters': ''.join(header_text), 'force': True})
+
+    return panel
+
 
 def _exec_file_regex() -> str:
     if platform() == 'windows':
@@ -85,6 +366,9 @@ def _exec_file_regex() -> str:
         return '(\\/[a-zA-Z0-9 \\.\\/_-]+)(?: on line |\\:)([0-9]+)'
 
 
+_color_schemes = {}  # type: dict
+
+
 def _get_color_scheme(view):
     color_scheme = view.settings().get('color_scheme')
 
@@ -92,6 +376,16 @@ def _get_color_scheme(view):
     if color_scheme.endswith('.sublime-color-scheme'):
         return color_scheme
 
+    # Patching a color scheme is expensive so only do it once per session.
+    if color_scheme in _color_schemes:
+        return _color_schemes[color_scheme]
+
+    _color_schemes[color_scheme] = _patch_color_scheme(color_scheme)
+
+    return _color_schemes[color_scheme]
+
+
+def _patch_color_scheme(color_scheme: str):
     try:
         color_scheme_resource = load_resource(color_scheme)
 
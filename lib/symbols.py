@@ -0,0 +1,127 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+from sublime import set_timeout
+from sublime import set_timeout_async
+
+
+# Sublime Text doesn't expose when its symbol index changes, so the generation
+# is incremented whenever a file is loaded, saved or closed, which is when the
+# results of a symbol lookup can change. Lookups in open files also depend on
+# unsaved edits, so they are keyed on the edit generation too, which is
+# incremented whenever a view is activated, rather than on every keystroke.
+# Empty results are never cached because Sublime Text may still be indexing.
+_generation = 0
+
+_edit_generation = 0
+
+_MAX_LOOKUPS = 512
+
+_lookups = {}  # type: dict
+
+hits = 0
+misses = 0
+
+
+def invalidate_symbols() -> None:
+    global _generation
+
+    _generation += 1
+
+
+def invalidate_open_file_symbols() -> None:
+    global _edit_generation
+
+    _edit_generation += 1
+
+
+def _lookup(window, kind: str, symbol: str) -> list:
+    global hits, misses
+
+    key = (window.id(), kind, symbol, _generation, _edit_generation if kind == 'open_files' else 0)
+
+    locations = _lookups.get(key)
+    if locations is not None:
+        hits += 1
+        return locations
+
+    misses += 1
+    if kind == 'index':
+        locations = window.lookup_symbol_in_index(symbol)
+    else:
+        locations = window.lookup_symbol_in_open_files(symbol)
+
+    if not locations:
+        return locations
+
+    if len(_lookups) >= _MAX_LOOKUPS:
+        _lookups.clear()
+
+    _lookups[key] = locations
+
+    return locations
+
+
+def lookup_symbols_in_index(window, symbols: list) -> list:
+    """
+    Return the locations of {symbols} in the symbol index.
+
+    Duplicate symbols are looked up once, and each lookup that finds locations
+    is cached until the next symbol generation.
+    """
+    locations = []  # type: list
+    for symbol in _unique(symbols):
+        locations += _lookup(window, 'index', symbol)
+
+    return locations
+
+
+def lookup_symbol_in_open_files(window, symbol: str) -> list:
+    """Return the locations of {symbol} in open files, cached until the next symbol or edit generation."""
+    return _lookup(window, 'open_files', symbol)
+
+
+def lookup_symbols_in_index_async(window, symbols: list, callback) -> None:
+    """Look up {symbols} in the symbol index off the UI thread, and call {callback} with the locations on it."""
+    def _run() -> None:
+        locations = lookup_symbols_in_index(window, symbols)
+        set_timeout(lambda: callback(locations))
+
+    set_timeout_async(_run)
+
+
+def _unique(symbols: list) -> list:
+    unique = []
+    seen = set()  # type: set
+    for symbol in symbols:
+        if symbol not in seen:
+            seen.add(symbol)
+            unique.append(symbol)
+
+    return unique
+
+
+def clear_symbols() -> None:
+    global hits, misses
+
+    _lookups.clear()
+    hits = 0
+    misses = 0
+
+
+def stats() -> str:
+    return 'symbol lookup cache: {} entries, {} hits, {} misses'.format(len(_lookups), hits, misses)
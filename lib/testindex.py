@@ -0,0 +1,379 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from sublime import cache_path
+from sublime import set_timeout_async
+
+from PHPUnitKit.lib.cache import stat_signature
+from PHPUnitKit.lib.configuration import load_configuration
+from PHPUnitKit.lib.tokenizer import parse_tests
+from PHPUnitKit.lib.utils import debug_message
+
+
+# Bump whenever the format of an indexed file changes.
+_VERSION = 2
+
+
+# Directories that never contain project tests.
+_IGNORED_DIRECTORY_NAMES = ('node_modules', 'vendor')
+
+
+# The number of milliseconds to wait for more changes before persisting an
+# index, so saving many files writes it once.
+_SAVE_DELAY = 5000
+
+
+_indexes = {}  # type: dict
+_indexes_lock = threading.Lock()
+
+_queue = queue.Queue()  # type: queue.Queue
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def _walk(folder: str):
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if d[0] != '.' and d not in _IGNORED_DIRECTORY_NAMES]
+        for file in files:
+            yield os.path.join(root, file)
+
+
+def find_test_files(configuration_file: str) -> list:
+    """
+    Return the test files of the test suites in {configuration_file}.
+
+    If the configuration has no test suites, every *Test.php file below the
+    working directory is a test file.
+    """
+    configuration = load_configuration(configuration_file)
+    if not configuration or not configuration.testsuites:
+        working_dir = os.path.dirname(configuration_file)
+        return sorted(f for f in _walk(working_dir) if f.endswith('Test.php'))
+
+    test_files = set()
+    for testsuite in configuration.testsuites:
+        for file in testsuite.files:
+            if testsuite.includes(file) and os.path.isfile(file):
+                test_files.add(file)
+
+        for directory in testsuite.directories:
+            for file in _walk(directory.path):
+                if testsuite.includes(file):
+                    test_files.add(file)
+
+    return sorted(test_files)
+
+
+class TestIndex():
+    """
+    An index of the tests in the test suites of a PHPUnit configuration file.
+
+    Each test file is parsed with a lightweight PHP tokenizer and stored with
+    the stat signature it was parsed at, so an update only parses the files
+    that were added or modified since the last one. The index is persisted to
+    the cache directory a few seconds after it last changed, and when the
+    plugin is unloaded, and reloaded in later sessions. The generation is
+    incremented whenever the index changes.
+    """
+
+    def __init__(self, configuration_file: str, cache_dir: str = None):
+        self.configuration_file = configuration_file
+        self.working_dir = os.path.dirname(configuration_file)
+        self.generation = 0
+        self._cache_dir = cache_dir
+        self._files = {}  # type: dict
+        self._loaded = False
+        self._dirty = False
+        self._save_token = 0
+        self._lock = threading.Lock()
+
+    def cache_file(self) -> str:
+        cache_dir = self._cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.join(cache_path(), __name__.split('.')[0], 'test-index')
+
+        key = hashlib.sha1(self.configuration_file.encode('utf-8')).hexdigest()
+
+        return os.path.join(cache_dir, key + '.json')
+
+    def load(self) -> None:
+        """Load the persisted index, once."""
+        if self._loaded:
+            return
+
+        self._loaded = True
+        try:
+            with open(self.cache_file(), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') != _VERSION or data.get('configuration_file') != self.configuration_file:
+            return
+
+        with self._lock:
+            self._files = data['files']
+            self.generation += 1
+
+    def save(self) -> None:
+        cache_file = self.cache_file()
+        with self._lock:
+            data = {
+                'version': _VERSION,
+                'configuration_file': self.configuration_file,
+                'files': dict(self._files)
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            # Write to a temporary file first so that a partially written
+            # index is never loaded.
+            with open(cache_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(cache_file + '.tmp', cache_file)
+        except OSError as e:
+            debug_message('test index: could not save \'%s\': %s', cache_file, e)
+
+    def save_later(self) -> None:
+        """Save the index on the worker thread once it has not changed for a while."""
+        with self._lock:
+            self._dirty = True
+            self._save_token += 1
+            token = self._save_token
+
+        set_timeout_async(lambda: _submit(lambda: self._save_if_unchanged(token)), _SAVE_DELAY)
+
+    def _save_if_unchanged(self, token: int) -> None:
+        with self._lock:
+            if token != self._save_token or not self._dirty:
+                return
+
+        self.save()
+
+    def save_if_dirty(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+
+        self.save()
+
+    def _parse(self, file: str, signature) -> bool:
+        try:
+            with open(file, encoding='utf-8', errors='replace') as f:
+                entry = parse_tests(f.read())
+        except OSError:
+            return self._remove(file)
+
+        entry['signature'] = list(signature)
+        with self._lock:
+            self._files[file] = entry
+
+        return True
+
+    def _remove(self, file: str) -> bool:
+        with self._lock:
+            return self._files.pop(file, None) is not None
+
+    def update(self) -> int:
+        """Incrementally update the index and return the number of files that changed."""
+        self.load()
+
+        test_files = find_test_files(self.configuration_file)
+
+        changed = 0
+        for file in set(self._files) - set(test_files):
+            changed += self._remove(file)
+
+        for file in test_files:
+            signature = stat_signature(file)
+            if signature is None:
+                changed += self._remove(file)
+                continue
+
+            entry = self._files.get(file)
+            if entry is None or entry['signature'] != list(signature):
+                changed += self._parse(file, signature)
+
+        if changed:
+            self.generation += 1
+            self.save_later()
+
+        return changed
+
+    def update_file(self, file: str) -> bool:
+        """Update a single file, if it is a test file indexed by this index."""
+        self.load()
+
+        if file not in self._files:
+            configuration = load_configuration(self.configuration_file)
+            if configuration and configuration.testsuites:
+                if not configuration.includes(file):
+                    return False
+            elif not file.endswith('Test.php'):
+                return False
+
+        signature = stat_signature(file)
+        if signature is None:
+            changed = self._remove(file)
+        else:
+            entry = self._files.get(file)
+            if entry is not None and entry['signature'] == list(signature):
+                return False
+
+            changed = self._parse(file, signature)
+
+        if changed:
+            self.generation += 1
+            self.save_later()
+
+        return changed
+
+    def files(self) -> list:
+        with self._lock:
+            return sorted(self._files)
+
+    def classes(self, file: str) -> list:
+        """Return the fully qualified names of the test classes declared in {file}."""
+        with self._lock:
+            entry = self._files.get(file)
+            if entry is None:
+                return []
+
+            return [php_class['name'] for php_class in entry['classes']]
+
+    def find_class(self, name: str) -> list:
+        """
+        Return the files that declare the class {name}.
+
+        {name} can be fully qualified or a short class name.
+        """
+        name = name.lstrip('\\')
+        files = []
+        with self._lock:
+            for file, entry in self._files.items():
+                for php_class in entry['classes']:
+                    if php_class['name'] == name or php_class['name'].rsplit('\\', 1)[-1] == name:
+                        files.append(file)
+                        break
+
+        return sorted(files)
+
+    def tests(self) -> list:
+        """
+        Return all indexed tests.
+
+        Each test is a tuple of the file, the fully qualified class name (None
+        for Pest tests), the test name and its line.
+        """
+        tests = []
+        with self._lock:
+            for file, entry in sorted(self._files.items()):
+                for php_class in entry['classes']:
+                    for name, line in php_class['tests']:
+                        tests.append((file, php_class['name'], name, line))
+
+                for test in entry['pest']:
+                    tests.append((file, None, test['name'], test['line']))
+
+        return tests
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+def get_test_index(configuration_file: str) -> TestIndex:
+    with _indexes_lock:
+        if configuration_file not in _indexes:
+            _indexes[configuration_file] = TestIndex(configuration_file)
+
+        return _indexes[configuration_file]
+
+
+def _work() -> None:
+    while True:
+        job = _queue.get()
+        if job is None:
+            return
+
+        try:
+            job()
+        except Exception as e:
+            print('PHPUnit: test index: {}'.format(e))
+
+
+def _submit(job) -> None:
+    global _worker
+
+    # The job is queued under the same lock as the check, so it is never
+    # queued for a worker that is being stopped.
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='PHPUnitKit test index', daemon=True)
+            _worker.start()
+
+        _queue.put(job)
+
+
+def _update(configuration_file: str) -> None:
+    start = time.perf_counter()
+    index = get_test_index(configuration_file)
+    changed = index.update()
+    debug_message(
+        'test index: %d file(s), %d changed, for \'%s\' in %.2fms',
+        len(index),
+        changed,
+        configuration_file,
+        (time.perf_counter() - start) * 1000)
+
+
+def update_test_index_async(configuration_file: str) -> None:
+    """Incrementally update the test index of {configuration_file} on the worker thread."""
+    if configuration_file:
+        _submit(lambda: _update(configuration_file))
+
+
+def update_test_index_file_async(configuration_file: str, file: str) -> None:
+    """Update {file} in the test index of {configuration_file} on the worker thread."""
+    if configuration_file:
+        _submit(lambda: get_test_index(configuration_file).update_file(file))
+
+
+def save_test_indexes() -> None:
+    """Save the test indexes that changed since they were last saved."""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+
+    for index in indexes:
+        index.save_if_dirty()
+
+
+def stop_test_index_worker() -> None:
+    global _worker
+
+    with _worker_lock:
+        if _worker is not None:
+            _queue.put(None)
+            _worker = None
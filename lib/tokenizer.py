@@ -0,0 +1,250 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import re
+from typing import Optional
+
+
+# A lightweight PHP tokenizer. It only distinguishes the tokens needed to find
+# declarations: comments and strings are consumed whole so braces and keywords
+# inside them are never mistaken for code.
+_TOKEN_PATTERN = re.compile(
+    '(?P<doc>/\\*\\*.*?\\*/)'
+    '|(?P<comment>/\\*.*?\\*/|//[^\\n]*|#(?!\\[)[^\\n]*)'
+    '|(?P<attribute>#\\[)'
+    '|(?P<heredoc><<<[ \\t]*(?P<heredoc_quote>[\'"]?)(?P<heredoc_label>[a-zA-Z_][a-zA-Z0-9_]*)'
+    '(?P=heredoc_quote).*?^[ \\t]*(?P=heredoc_label)\\b)'
+    '|(?P<string>\'(?:[^\'\\\\]|\\\\.)*\'|"(?:[^"\\\\]|\\\\.)*")'
+    '|(?P<variable>\\$[a-zA-Z_][a-zA-Z0-9_]*)'
+    '|(?P<name>\\\\?[a-zA-Z_][a-zA-Z0-9_]*(?:\\\\[a-zA-Z_][a-zA-Z0-9_]*)*)'
+    '|(?P<symbol>->|::|\\?->|[{}()\\[\\];,&=])',
+    re.DOTALL | re.MULTILINE)
+
+_TEST_ANNOTATION_PATTERN = re.compile('@test\\b')
+_DATA_PROVIDER_ANNOTATION_PATTERN = re.compile('@dataProvider\\s+([a-zA-Z_][a-zA-Z0-9_]*)')
+
+_CLASS_KEYWORDS = ('class', 'enum', 'interface', 'trait')
+_PEST_FUNCTIONS = ('describe', 'it', 'test')
+
+
+class Token():
+
+    __slots__ = ('kind', 'value', 'line', 'begin')
+
+    def __init__(self, kind: str, value: str, line: int, begin: int = 0):
+        self.kind = kind
+        self.value = value
+        self.line = line
+        self.begin = begin
+
+    @property
+    def end(self) -> int:
+        return self.begin + len(self.value)
+
+    def __repr__(self) -> str:
+        return 'Token({!r}, {!r}, {})'.format(self.kind, self.value, self.line)
+
+
+def tokenize(source: str) -> list:
+    """Return the tokens in {source}, skipping whitespace and anything unrecognised."""
+    tokens = []
+    line = 1
+    offset = 0
+    for match in _TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind is None or kind == 'comment':
+            continue
+
+        start = match.start()
+        line += source.count('\n', offset, start)
+        offset = start
+        tokens.append(Token(kind, match.group(kind), line, start))
+
+    return tokens
+
+
+def _string_value(token: Token) -> str:
+    return token.value[1:-1]
+
+
+def _short_name(name: str) -> str:
+    return name.rsplit('\\', 1)[-1]
+
+
+def _parse_attribute(tokens: list, i: int, annotations: dict) -> int:
+    """Read the attribute group opened at {i} and return the index after it."""
+    nesting = 1
+    i += 1
+    while i < len(tokens) and nesting:
+        token = tokens[i]
+        if token.kind == 'attribute' or token.value == '[':
+            nesting += 1
+        elif token.value == ']':
+            nesting -= 1
+        elif token.kind == 'name':
+            name = _short_name(token.value)
+            if name == 'Test':
+                annotations['test'] = True
+            elif name == 'DataProvider' and i + 2 < len(tokens) and tokens[i + 2].kind == 'string':
+                annotations['data_providers'].append(_string_value(tokens[i + 2]))
+        i += 1
+
+    return i
+
+
+def _parse_doc(token: Token, annotations: dict) -> None:
+    if _TEST_ANNOTATION_PATTERN.search(token.value):
+        annotations['test'] = True
+
+    annotations['data_providers'].extend(_DATA_PROVIDER_ANNOTATION_PATTERN.findall(token.value))
+
+
+def _new_annotations() -> dict:
+    return {'test': False, 'data_providers': []}
+
+
+def parse_tests(source: str) -> dict:
+    """
+    Return the test declarations in the PHP {source}.
+
+    The result is a JSON serialisable dict with the classes declared in the
+    source (fully qualified name, line, test methods and data providers) and
+    any Pest it() and test() declarations (name, enclosing describe() names and
+    line). A method is a test if its name starts with "test" or it is
+    annotated with @test or #[Test].
+    """
+    classes, pest = _parse(tokenize(source))
+
+    return {'classes': classes, 'pest': [{k: v for k, v in test.items() if k != 'token'} for test in pest]}
+
+
+def parse_pest_tests(source: str) -> list:
+    """
+    Return the Pest it() and test() declarations in the PHP {source}.
+
+    Each declaration is a dict with its name, enclosing describe() names, line,
+    and the offsets at which it begins and the name ends.
+    """
+    tests = _parse(tokenize(source))[1]
+    for test in tests:
+        token = test.pop('token')
+        test['begin'] = token.begin
+        test['end'] = token.end
+
+    return tests
+
+
+def _parse(tokens: list) -> tuple:
+    namespace = ''
+    classes = []  # type: list
+    pest = []  # type: list
+
+    depth = 0
+    current_class: Optional[dict] = None
+    class_depth: Optional[int] = None
+    pending_class: Optional[dict] = None
+    # A describe() block ends with the parenthesis of its call, so its tests
+    # are found by parenthesis depth rather than by indentation or braces.
+    parentheses = 0
+    describes = []  # type: list
+    annotations = _new_annotations()
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        previous = tokens[i - 1].value if i > 0 else None
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token.kind == 'doc':
+            _parse_doc(token, annotations)
+        elif token.kind == 'attribute':
+            i = _parse_attribute(tokens, i, annotations)
+            continue
+        elif token.value == '{':
+            depth += 1
+            if pending_class is not None:
+                current_class = pending_class
+                class_depth = depth
+                pending_class = None
+            annotations = _new_annotations()
+        elif token.value == '}':
+            if current_class is not None and depth == class_depth:
+                current_class = None
+            depth -= 1
+            annotations = _new_annotations()
+        elif token.value == '(':
+            parentheses += 1
+        elif token.value == ')':
+            parentheses -= 1
+            while describes and describes[-1][1] > parentheses:
+                describes.pop()
+        elif token.value == ';':
+            annotations = _new_annotations()
+        elif token.kind == 'name' and previous not in ('->', '?->', '::', '\\'):
+            keyword = token.value.lower()
+
+            if keyword == 'namespace' and following is not None:
+                namespace = following.value.lstrip('\\') if following.kind == 'name' else ''
+
+            elif keyword in _CLASS_KEYWORDS and previous != 'new' and following is not None \
+                    and following.kind == 'name':
+                name = following.value
+                pending_class = {
+                    'name': namespace + '\\' + name if namespace else name,
+                    'line': following.line,
+                    'tests': [],
+                    'data_providers': []
+                }
+                classes.append(pending_class)
+                i += 2
+                continue
+
+            elif keyword == 'function' and current_class is not None and depth == class_depth:
+                j = i + 1
+                if j < len(tokens) and tokens[j].value == '&':
+                    j += 1
+                if j < len(tokens) and tokens[j].kind == 'name':
+                    name = tokens[j].value
+                    if name.startswith('test') or annotations['test']:
+                        current_class['tests'].append([name, tokens[j].line])
+                    for data_provider in annotations['data_providers']:
+                        if data_provider not in current_class['data_providers']:
+                            current_class['data_providers'].append(data_provider)
+                    annotations = _new_annotations()
+                    i = j + 1
+                    continue
+
+            elif keyword in _PEST_FUNCTIONS and current_class is None and previous != 'function' \
+                    and following is not None and following.value == '(' \
+                    and i + 2 < len(tokens) and tokens[i + 2].kind == 'string':
+                name = _string_value(tokens[i + 2])
+                parentheses += 1
+                if keyword == 'describe':
+                    describes.append((name, parentheses))
+                else:
+                    pest.append({
+                        'name': name,
+                        'describe': [describe for describe, _ in describes],
+                        'line': token.line,
+                        'token': tokens[i + 2]
+                    })
+                i += 3
+                continue
+
+        i += 1
+
+    return classes, pest
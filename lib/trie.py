@@ -0,0 +1,125 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+
+def _split(path: str) -> list:
+    parts = os.path.normpath(path).split(os.sep)
+    if len(parts) > 1 and not parts[-1]:
+        parts.pop()
+
+    return parts
+
+
+class PathTrie():
+    """
+    A trie of paths keyed by path component.
+
+    Finding the longest stored path that is an ancestor of (or equal to) a
+    given path costs one dictionary lookup per path component, regardless of
+    how many paths are stored.
+    """
+
+    def __init__(self):
+        self._root = {}  # type: dict
+        self._len = 0
+
+    def insert(self, path: str, value) -> None:
+        node = self._root
+        for part in _split(path):
+            node = node.setdefault(part, {})
+
+        if None not in node:
+            self._len += 1
+
+        # The None key can never be a path component so it holds the entry.
+        node[None] = (path, value)
+
+    def remove(self, path: str) -> None:
+        nodes = [self._root]
+        parts = _split(path)
+        for part in parts:
+            node = nodes[-1].get(part)
+            if node is None:
+                return
+            nodes.append(node)
+
+        if None not in nodes[-1]:
+            return
+
+        del nodes[-1][None]
+        self._len -= 1
+
+        # Prune branches that no longer lead to an entry.
+        for part, node in zip(reversed(parts), reversed(nodes[:-1])):
+            if node[part]:
+                break
+            del node[part]
+
+    def get(self, path: str, default=None):
+        node = self._root
+        for part in _split(path):
+            child = node.get(part)
+            if child is None:
+                return default
+
+            node = child
+
+        if None in node:
+            return node[None][1]
+
+        return default
+
+    def longest_prefix(self, path: str):
+        """
+        Return the (path, value) of the longest stored ancestor of {path}.
+
+        A path is its own ancestor. Return None if there is no match.
+        """
+        match = None
+        node = self._root
+        for part in _split(path):
+            if None in node:
+                match = node[None]
+            child = node.get(part)
+            if child is None:
+                return match
+
+            node = child
+
+        return node.get(None, match)
+
+    def items(self) -> list:
+        items = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    items.append(child)
+                else:
+                    stack.append(child)
+
+        return items
+
+    def __contains__(self, path: str) -> bool:
+        return self.get(path, self) is not self
+
+    def __len__(self) -> int:
+        return self._len
@@ -24,14 +24,39 @@ from sublime import platform
 from sublime import status_message
 from sublime import version
 
-
-_PEST_TEST_PATTERN = '^\\s*(it|test)\\(("|\')(.*)("|\')'
+from PHPUnitKit.lib.cache import StatCache
+from PHPUnitKit.lib.composer import clear_composer_caches
+from PHPUnitKit.lib.composer import find_psr4_switchables
+from PHPUnitKit.lib.metadata import clear_views
+from PHPUnitKit.lib.metadata import get_function_index
+from PHPUnitKit.lib.metadata import get_pest_index
+from PHPUnitKit.lib.metadata import get_php_metadata
+from PHPUnitKit.lib.metadata import stats as metadata_stats
+from PHPUnitKit.lib.process import kill_process
+from PHPUnitKit.lib.settings import SETTINGS
+from PHPUnitKit.lib.settings import clear_settings
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.settings import is_any_debug
+from PHPUnitKit.lib.symbols import clear_symbols
+from PHPUnitKit.lib.symbols import lookup_symbol_in_open_files
+from PHPUnitKit.lib.symbols import lookup_symbols_in_index_async
+from PHPUnitKit.lib.symbols import stats as symbols_stats
+
+
+CONFIGURATION_FILE_NAMES = ('phpunit.xml', 'phpunit.xml.dist', 'phpunit.dist.xml')
 
 
 _session = {}  # type: dict
 
 
+_configuration_file_cache = StatCache('configuration file')
+_executable_cache = StatCache('executable')
+
+
 def debug_message(msg, *args) -> None:
+    if not is_any_debug():
+        return
+
     window = active_window()
     if not window:
         return
@@ -56,14 +81,16 @@ def is_debug(view) -> bool:
 
 
 def get_setting(view, name: str):
+    if name in SETTINGS:
+        return get_settings(view).get(name)
+
     return view.settings().get('phpunit.%s' % name)
 
 
 def debug_settings(view) -> None:
-    if int(version()) >= 4078 and is_debug(view):
-        for key, val in view.settings().to_dict().items():
-            if key.startswith('phpunit.'):
-                debug_message('setting %s = %s', key, val)
+    if is_debug(view):
+        for key, val in sorted(get_settings(view).items()):
+            debug_message('setting phpunit.%s = %s', key, val)
 
 
 def message(msg, *args) -> None:
@@ -85,6 +112,15 @@ def get_active_view(window):
     return active_view
 
 
+def clear_caches() -> None:
+    clear_settings()
+    _configuration_file_cache.clear()
+    _executable_cache.clear()
+    clear_views()
+    clear_composer_caches()
+    clear_symbols()
+
+
 def get_session(key: str):
     return _session.get(key)
 
@@ -129,9 +165,20 @@ def find_phpunit_configuration_file(file_name, folders):
     if not len(folders) > 0:
         return None
 
-    ancestor_folders = []  # type: list
     common_prefix = os.path.commonprefix(folders)
     parent = os.path.dirname(file_name)
+
+    configuration_file = _configuration_file_cache.get(
+        (parent, common_prefix),
+        lambda: _find_phpunit_configuration_file(parent, common_prefix))
+
+    debug_message('  %s', _configuration_file_cache.stats())
+
+    return configuration_file
+
+
+def _find_phpunit_configuration_file(parent: str, common_prefix: str) -> tuple:
+    ancestor_folders = []  # type: list
     while parent not in ancestor_folders and parent.startswith(common_prefix):
         ancestor_folders.append(parent)
         parent = os.path.dirname(parent)
@@ -140,18 +187,22 @@ def find_phpunit_configuration_file(file_name, folders):
 
     debug_message('  found %d possible locations %s', len(ancestor_folders), ancestor_folders)
 
-    candidate_configuration_file_names = ['phpunit.xml', 'phpunit.xml.dist', 'phpunit.dist.xml']
-    debug_message('  looking for %s ...', candidate_configuration_file_names)
+    # Adding or removing a configuration file changes the modification time
+    # of the folder that contains it, so the folders searched are the only
+    # paths the result depends on.
+    searched_folders = []
+    debug_message('  looking for %s ...', CONFIGURATION_FILE_NAMES)
     for folder in ancestor_folders:
-        for file_name in candidate_configuration_file_names:
+        searched_folders.append(folder)
+        for file_name in CONFIGURATION_FILE_NAMES:
             phpunit_configuration_file = os.path.join(folder, file_name)
             if os.path.isfile(phpunit_configuration_file):
                 debug_message('  found configuration \'%s\'', phpunit_configuration_file)
-                return phpunit_configuration_file
+                return phpunit_configuration_file, searched_folders
 
     debug_message('  no configuration found')
 
-    return None
+    return None, searched_folders
 
 
 def find_phpunit_working_directory(file_name, folders):
@@ -165,53 +216,25 @@ def is_valid_php_identifier(string: str) -> bool:
 
 
 def has_test(view) -> bool:
-    for php_class in find_php_classes(view):
-        if php_class[-4:] == 'Test':
-            return True
+    if get_php_metadata(view).has_test_class():
+        return True
 
     if get_setting(view, 'pest'):
-        has_test = view.find(_PEST_TEST_PATTERN, 0)
-        if has_test:
+        if get_pest_index(view):
             return True
 
     return False
 
 
 def find_php_classes(view, with_namespace: bool = False) -> list:
-    classes = []
+    metadata = get_php_metadata(view)
 
-    # See https://github.com/sublimehq/sublime_text/issues/5499
-    if int(version()) >= 4134:
-        namespace_selector = 'embedding.php meta.namespace meta.path'
-        class_as_regions_selector = 'embedding.php entity.name.class - meta.use'
-    else:
-        namespace_selector = 'source.php entity.name.namespace'
-        class_as_regions_selector = 'source.php entity.name.class - meta.use'
-
-    namespace = None
-    for namespace_region in view.find_by_selector(namespace_selector):
-        namespace = view.substr(namespace_region)
-        break  # TODO handle files with multiple namespaces
-
-    for class_as_region in view.find_by_selector(class_as_regions_selector):
-        class_as_string = view.substr(class_as_region)
-        if is_valid_php_identifier(class_as_string):
-            if with_namespace:
-                classes.append({
-                    'namespace': namespace,
-                    'class': class_as_string
-                })
-            else:
-                classes.append(class_as_string)
+    debug_message('  %s', metadata_stats())
 
-    if int(version()) <= 3114:  # no pragma
-        if not classes:
-            for class_as_region in view.find_by_selector('source.php entity.name.type.class - meta.use'):
-                class_as_string = view.substr(class_as_region)
-                if is_valid_php_identifier(class_as_string):
-                    classes.append(class_as_string)
+    if with_namespace:
+        return [{'namespace': namespace, 'class': name} for namespace, name, _ in metadata.classes]
 
-    return classes
+    return metadata.class_names()
 
 
 def find_nearest_tests(view) -> list:
@@ -225,34 +248,21 @@ def find_nearest_tests(view) -> list:
     method_names = []
 
     if get_setting(view, 'pest'):
+        pest_index = get_pest_index(view)
         for sel in view.sel():
-            test_pattern_start_pt = view.line(sel.b).end()
-            test = view_rmatch(view, _PEST_TEST_PATTERN, test_pattern_start_pt)
+            test = pest_index.find(view.line(sel.b).end())
             if test:
-                method_names.append(test.group(3))
+                method_names.append(test.name)
 
         return method_names
 
-    function_regions = view.find_by_selector('entity.name.function')
-    function_areas = []
-    # Only include areas that contain function declarations.
-    for function_area in view.find_by_selector('meta.function'):
-        for function_region in function_regions:
-            if function_region.intersects(function_area):
-                function_areas.append(function_area)
-
+    function_index = get_function_index(view)
     for region in view.sel():
-        for i, area in enumerate(function_areas):
-            if not area.a <= region.a <= area.b:
-                continue
-
-            if i not in function_regions and not area.intersects(function_regions[i]):
-                continue
-
-            word = view.substr(function_regions[i])
+        function_region = function_index.find(region.a)
+        if function_region:
+            word = view.substr(function_region)
             if is_valid_php_identifier(word):
                 method_names.append(word)
-            break
 
     if int(version()) <= 3114:  # no pragma
         if not method_names:
@@ -273,34 +283,6 @@ def find_nearest_tests(view) -> list:
     return [m for m in method_names if m.lower() not in ignore_methods]
 
 
-# Polyfill: There is no API to find a pattern in reverse direction.
-# @see https://github.com/SublimeTextIssues/Core/issues/245
-def view_rfind_all(view, pattern: str, start_pt: int, flags: int = 0):
-    matches = view.find_all(pattern, flags)
-    for region in matches:
-        if region.b > start_pt:
-            return reversed(matches[:matches.index(region)])
-
-    return reversed(matches)
-
-
-# Polyfill: There is no API to find a pattern in reverse direction.
-# @see https://github.com/SublimeTextIssues/Core/issues/245
-def view_rfind(view, pattern: str, start_pt: int, flags: int = 0):
-    matches = view_rfind_all(view, pattern, start_pt, flags)
-    if matches:
-        try:
-            return next(matches)
-        except StopIteration:
-            pass
-
-
-def view_rmatch(view, pattern: str, start_pt: int, flags: int = 0):
-    match = view_rfind(view, pattern, start_pt, flags)
-    if match:
-        return re.match(pattern, view.substr(match))
-
-
 class Switchable:
 
     def __init__(self, location):
@@ -316,10 +298,9 @@ class Switchable:
 
         # If the file we're switching to is already open,
         # then by default don't goto encoded position.
-        for v in window.views():
-            if v.file_name() == self.location[0]:
-                row = None
-                col = None
+        if _is_open(window, self.location[0]):
+            row = None
+            col = None
 
         # If cursor is on a symbol like a class method,
         # then try find the relating test method or vice-versa,
@@ -332,7 +313,7 @@ class Switchable:
             else:
                 symbol = 'test' + symbol[0].upper() + symbol[1:]
 
-            locations = window.lookup_symbol_in_open_files(symbol)
+            locations = lookup_symbol_in_open_files(window, symbol)
             if locations:
                 for location in locations:
                     if location[0] == self.location[0]:
@@ -349,24 +330,50 @@ class Switchable:
         return file + encoded_postion
 
 
-def _get_switchable_lookup_symbols(window, classes: list) -> list:
-    locations = []  # type: list
+def _is_open(window, file: str) -> bool:
+    # Window.find_open_file() is a single lookup in Sublime Text 4.
+    if hasattr(window, 'find_open_file'):
+        return window.find_open_file(file) is not None
+
+    for v in window.views():
+        if v.file_name() == file:
+            return True
+
+    return False
+
+
+def _get_switchable_lookup_symbols(window, classes: list, callback) -> None:
+    symbols = []
     for _class in classes:
         if _class['class'][-4:] == 'Test':
-            symbol = _class['class'][:-4]
+            symbols.append(_class['class'][:-4])
         else:
-            symbol = _class['class'] + 'Test'
-
-        locations += window.lookup_symbol_in_index(symbol)
-
-    locations = _unique_lookup_symbols(locations)
+            symbols.append(_class['class'] + 'Test')
 
-    return locations
+    lookup_symbols_in_index_async(window, symbols, lambda locations: callback(_unique_lookup_symbols(locations)))
 
 
 def find_switchable(view, on_select) -> None:
     window = view.window()
 
+    # Resolve switchables from the composer.json PSR-4 autoload map first, it
+    # doesn't depend on the symbol index, which may not be ready.
+    psr4_switchables = find_psr4_switchables(view.file_name())
+    if psr4_switchables:
+        debug_message('found %d psr-4 switchable(s): %s', len(psr4_switchables), psr4_switchables)
+
+        def _on_select_psr4(index: int) -> None:
+            if index >= 0:
+                file = psr4_switchables[index]
+                on_select(Switchable((file, file, _find_class_position(file))))
+
+        if len(psr4_switchables) == 1:
+            _on_select_psr4(0)
+        else:
+            window.show_quick_panel(psr4_switchables, _on_select_psr4)
+
+        return
+
     classes = find_php_classes(view, with_namespace=True)
     debug_message('found %s class(s): %s in %s', len(classes), classes, view.file_name() if view.file_name() else view)
 
@@ -374,29 +381,60 @@ def find_switchable(view, on_select) -> None:
         message('Could not find a class in %s', view.file_name() if view.file_name() else view)
         return
 
-    lookup_symbols = _get_switchable_lookup_symbols(window, classes)
-    debug_message('found %s lookup symbol(s): %s', len(lookup_symbols), lookup_symbols)
+    file_name = view.file_name()
+    switchable_rules = get_setting(view, 'switchable_rules')
 
-    if not len(lookup_symbols):
-        message('Could not find a switchable for %s', view.file_name() if view.file_name() else view)
-        return
+    # The symbol index can be slow in large projects so the lookup runs off
+    # the UI thread and the quick panel is shown when the results arrive.
+    def _on_lookup_symbols(lookup_symbols: list) -> None:
+        debug_message('found %s lookup symbol(s): %s', len(lookup_symbols), lookup_symbols)
+        debug_message('  %s', symbols_stats())
 
-    def _on_select(index: int) -> None:
-        if index >= 0:
-            on_select(Switchable(lookup_symbols[index]))
+        if not len(lookup_symbols):
+            message('Could not find a switchable for %s', file_name if file_name else view)
+            return
 
-    if len(lookup_symbols) == 1:
-        _on_select(0)
-        return
+        def _on_select(index: int) -> None:
+            if index >= 0:
+                on_select(Switchable(lookup_symbols[index]))
 
-    lookup_symbols, is_exact = _find_switchable_in_lookup_symbols(view.file_name(), lookup_symbols)
+        if len(lookup_symbols) == 1:
+            _on_select(0)
+            return
 
-    debug_message('found %d lookup symbol(s): %s', len(lookup_symbols), lookup_symbols)
+        lookup_symbols, is_exact = _find_switchable_in_lookup_symbols(file_name, lookup_symbols, switchable_rules)
 
-    if is_exact and len(lookup_symbols) == 1:
-        return _on_select(0)
+        debug_message('found %d lookup symbol(s): %s', len(lookup_symbols), lookup_symbols)
 
-    window.show_quick_panel(['{}:{}'.format(loc[1], loc[2][0]) for loc in lookup_symbols], _on_select)
+        if is_exact and len(lookup_symbols) == 1:
+            return _on_select(0)
+
+        window.show_quick_panel(['{}:{}'.format(loc[1], loc[2][0]) for loc in lookup_symbols], _on_select)
+
+    _get_switchable_lookup_symbols(window, classes, _on_lookup_symbols)
+
+
+def _find_class_position(file: str) -> tuple:
+    """Return the (row, col) of the declaration of the class named after {file}, or (None, None)."""
+    name = os.path.splitext(os.path.basename(file))[0]
+    pattern = re.compile(
+        '^[ \\t]*(?:(?:abstract|final|readonly)[ \\t]+)*(?:class|interface|trait|enum)[ \\t]+({})\\b'.format(
+            re.escape(name)),
+        re.MULTILINE)
+
+    try:
+        with open(file, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    except OSError:
+        return (None, None)
+
+    match = pattern.search(text)
+    if not match:
+        return (None, None)
+
+    line_start = text.rfind('\n', 0, match.start(1)) + 1
+
+    return (text.count('\n', 0, match.start(1)) + 1, match.start(1) - line_start + 1)
 
 
 def _unique_lookup_symbols(locations: list) -> list:
@@ -410,11 +448,11 @@ def _unique_lookup_symbols(locations: list) -> list:
     return locs
 
 
-def _find_switchable_in_lookup_symbols(file, lookup_symbols: list) -> tuple:
+def _find_switchable_in_lookup_symbols(file, lookup_symbols: list, rules=None) -> tuple:
     if not file:
         return lookup_symbols, False
 
-    switchable_targets, switchable_targets_are_tests = _get_switchable_targets(file)
+    switchable_targets, switchable_targets_are_tests = _get_switchable_targets(file, rules)
 
     debug_message('switchable_targets=%s', switchable_targets)
 
@@ -452,60 +490,124 @@ def _find_switchable_in_lookup_symbols(file, lookup_symbols: list) -> tuple:
     return lookup_symbols, False
 
 
-def _get_switchable_targets(file: str) -> tuple:
-    switchable_files = []
+class SwitchableRule():
+    """A compiled rewrite of a test file path to a source file path, or vice versa."""
+
+    def __init__(self, pattern: str, replacement):
+        self.pattern = re.compile(pattern)
+        self.replacement = replacement
+
+    def apply(self, file: str) -> str:
+        return self.pattern.sub(self.replacement, file, count=1)
+
+
+# The built-in rules, in order of preference. Test file names have already had
+# their Test suffix removed, and source file names have had it added.
+_TEST_TO_SOURCE_RULES = (
+    SwitchableRule('(\\/)?[tT]ests\\/([uU]nit\\/)?', '/'),
+    SwitchableRule('(\\/)?[tT]ests\\/Unit/', '/app/'),
+    SwitchableRule('(\\/)?[tT]ests\\/Integration/', '/app/'),
+    SwitchableRule('(\\/)?[tT]ests\\/', '/src/'),
+)
+
+_SOURCE_TO_TEST_RULES = (
+    # app/
+    SwitchableRule('app\\/(?!.*app\\/)', 'tests/'),
+    SwitchableRule('app\\/(?!.*app\\/)', 'tests/Unit/'),
+    SwitchableRule('app\\/(?!.*app\\/)', 'tests/Integration/'),
+    SwitchableRule('app\\/(?!.*app\\/)', ''),
+    SwitchableRule('app\\/(?!.*app\\/)', 'test/'),
+    # src/
+    SwitchableRule('(\\/)?src\\/', '/'),
+    SwitchableRule('(\\/)?src\\/', '/test/'),
+)
+
+
+_MAX_SWITCHABLE_TARGETS = 256
+
+
+_switchable_rules = {}  # type: dict
+_switchable_targets = {}  # type: dict
+
+
+def _compile_glob_rule(pattern: str, replacement: str) -> SwitchableRule:
+    # Each * in the pattern matches one path segment, and is substituted for
+    # the * in the same position of the replacement.
+    regex = '([^/]+)'.join(re.escape(part) for part in pattern.split('*'))
+    parts = replacement.split('*')
+
+    def _replace(match) -> str:
+        groups = match.groups()
+        replaced = parts[0]
+        for i, part in enumerate(parts[1:]):
+            replaced += (groups[i] if i < len(groups) else '') + part
+
+        return replaced
+
+    return SwitchableRule(regex, _replace)
+
+
+def _compile_switchable_rules(rules) -> tuple:
+    """
+    Return the compiled (test to source, source to test) rules.
+
+    {rules} is a list of [test path, source path] pairs that take precedence
+    over the built-in rules, for example ["modules/*/tests/", "modules/*/src/"].
+    """
+    key = repr(rules)
+    if key not in _switchable_rules:
+        test_to_source = []
+        source_to_test = []
+        for rule in rules or []:
+            try:
+                test_path, source_path = rule
+            except (TypeError, ValueError):
+                print('PHPUnit: invalid switchable rule: {}'.format(rule))
+                continue
+            test_to_source.append(_compile_glob_rule(test_path, source_path))
+            source_to_test.append(_compile_glob_rule(source_path, test_path))
+
+        _switchable_rules[key] = (
+            tuple(test_to_source) + _TEST_TO_SOURCE_RULES,
+            tuple(source_to_test) + _SOURCE_TO_TEST_RULES)
+
+    return _switchable_rules[key]
+
+
+def _get_switchable_targets(file: str, rules=None) -> tuple:
+    key = (file, repr(rules))
+    if key not in _switchable_targets:
+        if len(_switchable_targets) >= _MAX_SWITCHABLE_TARGETS:
+            _switchable_targets.clear()
+
+        _switchable_targets[key] = _find_switchable_targets(file, rules)
+
+    switchable_files, is_test = _switchable_targets[key]
+
+    return list(switchable_files), is_test
+
+
+def _find_switchable_targets(file: str, rules) -> tuple:
+    test_to_source, source_to_test = _compile_switchable_rules(rules)
 
     if file.endswith('Test.php'):
         is_test = True
         file = file.replace('Test.php', '.php')
-
-        switchable_file = re.sub('(\\/)?[tT]ests\\/([uU]nit\\/)?', '/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('(\\/)?[tT]ests\\/Unit/', '/app/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('(\\/)?[tT]ests\\/Integration/', '/app/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('(\\/)?[tT]ests\\/', '/src/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-
+        switchable_rules = test_to_source
     else:
         is_test = False
         file = file.replace('.php', 'Test.php')
+        switchable_rules = source_to_test
 
-        # app/
-        switchable_file = re.sub('app\\/(?!.*app\\/)', 'tests/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('app\\/(?!.*app\\/)', 'tests/Unit/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('app\\/(?!.*app\\/)', 'tests/Integration/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('app\\/(?!.*app\\/)', '', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('app\\/(?!.*app\\/)', 'test/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-
-        # src/
-        switchable_file = re.sub('(\\/)?src\\/', '/', file, count=1)
-        if switchable_file not in switchable_files:
-            switchable_files.append(switchable_file)
-        switchable_file = re.sub('(\\/)?src\\/', '/test/', file, count=1)
-        if switchable_file not in switchable_files:
+    switchable_files = []
+    seen = set()
+    # The 1:1 target is always the last candidate.
+    for switchable_file in [rule.apply(file) for rule in switchable_rules] + [file]:
+        if switchable_file not in seen:
+            seen.add(switchable_file)
             switchable_files.append(switchable_file)
 
-    # 1:1
-    if file not in switchable_files:
-        switchable_files.append(file)
-
-    return switchable_files, is_test
+    return tuple(switchable_files), is_test
 
 
 def put_views_side_by_side(view_a, view_b) -> None:
@@ -609,39 +711,83 @@ def _get_vendor_executable(working_dir: str, name: str) -> str:
 
 
 def get_phpunit_executable(view, working_dir: str) -> list:
+    executable = get_setting(view, 'executable')
+    key = (
+        working_dir,
+        platform(),
+        repr(executable),
+        bool(get_setting(view, 'paratest')),
+        bool(get_setting(view, 'artisan')),
+        bool(get_setting(view, 'pest')),
+        bool(get_setting(view, 'composer')),
+        os.environ.get('PATH')
+    )
+
+    phpunit_executable = _executable_cache.get(key, lambda: _resolve_phpunit_executable(view, working_dir))
+
+    debug_message('%s', _executable_cache.stats())
+
+    return list(phpunit_executable)
+
+
+def _resolve_phpunit_executable(view, working_dir: str) -> tuple:
+    # The result can only change if vendor/bin, the working directory (the
+    # artisan script), or the composer lock file change, or if the resolved
+    # executable is removed.
+    depends_on = [
+        working_dir,
+        os.path.join(working_dir, 'vendor', 'bin'),
+        os.path.join(working_dir, 'composer.lock')
+    ]
+
     executable = get_setting(view, 'executable')
     if executable:
         executable = filter_path(executable)
-        return executable if isinstance(executable, list) else [executable]
+        return (executable if isinstance(executable, list) else [executable]), []
 
     if get_setting(view, 'paratest'):
         paratest_executable = _get_vendor_executable(working_dir, 'paratest')
         if paratest_executable:
-            return [paratest_executable]
+            return [paratest_executable], depends_on + [paratest_executable]
 
     if get_setting(view, 'artisan'):
         artisan_executable = _get_executable(working_dir, 'artisan')
         if artisan_executable:
-            return [artisan_executable, 'test']
+            return [artisan_executable, 'test'], depends_on + [artisan_executable]
 
     if get_setting(view, 'pest') and get_setting(view, 'composer'):
         pest_executable = _get_vendor_executable(working_dir, 'pest')
         if pest_executable:
-            return [pest_executable]
+            return [pest_executable], depends_on + [pest_executable]
 
     if get_setting(view, 'composer'):
         executable = _get_vendor_executable(working_dir, 'phpunit')
         if executable:
-            return [executable]
+            return [executable], depends_on + [executable]
 
     executable = shutil.which('phpunit')
     if executable:
-        return [executable]
+        return [executable], depends_on + [executable]
 
     raise ValueError('phpunit not found')
 
 
 def get_php_executable(view, working_dir: str):
+    key = (
+        working_dir,
+        platform(),
+        get_setting(view, 'php_versions_path'),
+        get_setting(view, 'php_executable')
+    )
+
+    php_executable = _executable_cache.get(('php',) + key, lambda: _resolve_php_executable(view, working_dir))
+
+    debug_message('%s', _executable_cache.stats())
+
+    return php_executable
+
+
+def _resolve_php_executable(view, working_dir: str) -> tuple:
     php_versions_path = get_setting(view, 'php_versions_path')
     php_executable = get_setting(view, 'php_executable')
     php_version_file = os.path.join(working_dir, '.php-version')
@@ -669,18 +815,20 @@ def get_php_executable(view, working_dir: str):
 
         debug_message('using php executable version found in %s', php_version_file)
 
-        return php_executable
+        return php_executable, [php_version_file, php_executable]
 
     if php_executable:
         php_executable = filter_path(php_executable)
         if not file_exists_and_is_executable(php_executable):
             raise ValueError("'phpunit.php_executable' '%s' is not an executable file" % php_executable)
 
-        return php_executable
+        return php_executable, [php_version_file, php_executable]
+
+    return None, [php_version_file]
 
 
 def kill_any_running_tests(window) -> None:
-    window.run_command('exec', {'kill': True})
+    kill_process(window)
 
 
 def get_osx_term_script_path() -> str:
@@ -740,46 +888,6 @@ def resolve_working_dir(view, working_dir) -> str:
     return working_dir
 
 
-def resolve_path_mapping(view, paths: str, command_params: list) -> list:
-    path_mappings = get_setting(view, paths)
-    if not path_mappings:
-        return command_params
-
-    match = _find_matching_path(path_mappings, command_params)
-    if match:
-        command_params = _apply_path_mapping(match, command_params)
-
-    return command_params
-
-
-def _find_matching_path(path_mappings: dict, command_params: list):
-    for local_path, remote_path in path_mappings.items():
-        filtered_local_path = filter_path(local_path)
-        for param in command_params:
-            if isinstance(param, str) and param.startswith(filtered_local_path):
-                return filtered_local_path, remote_path
-
-    return None
-
-
-def _apply_path_mapping(match: tuple, command_params: list) -> list:
-    filtered_local_path, remote_path = match
-
-    def replace_param(param):
-        if not isinstance(param, str):
-            return param
-
-        if filtered_local_path in param:
-            param = param.replace(filtered_local_path, remote_path)
-
-        if '{working_dir}' in param:
-            param = param.replace('{working_dir}', remote_path)
-
-        return param
-
-    return [replace_param(param) for param in command_params]
-
-
 def toggle_on_post_save(view, item: str) -> None:
     on_post_save = view.settings().get('phpunit.on_post_save')
     if not isinstance(on_post_save, list):
@@ -0,0 +1,361 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import queue
+import threading
+from typing import Optional
+
+from PHPUnitKit.lib.cache import stat_signature
+from PHPUnitKit.lib.trie import PathTrie
+from PHPUnitKit.lib.utils import CONFIGURATION_FILE_NAMES
+from PHPUnitKit.lib.utils import debug_message
+from PHPUnitKit.lib.utils import find_phpunit_configuration_file
+
+
+# Directories that never contain a project PHPUnit configuration file.
+_IGNORED_DIRECTORY_NAMES = ('node_modules', 'vendor')
+
+
+# The owner of roots found in the ancestors of the window folders.
+_ANCESTORS = ''
+
+
+_indexes = {}  # type: dict
+
+_queue = queue.Queue()  # type: queue.Queue
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def _find_configuration_file_in(folder: str, file_names: list):
+    for file_name in CONFIGURATION_FILE_NAMES:
+        if file_name in file_names:
+            return os.path.join(folder, file_name)
+
+
+def _scan(folder: str):
+    """Yield each directory in {folder} with its configuration file, or None if it has none."""
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if d[0] != '.' and d not in _IGNORED_DIRECTORY_NAMES]
+        yield root, _find_configuration_file_in(root, files)
+
+
+class WorkspaceIndex():
+    """
+    An index of the PHPUnit configuration files in a window.
+
+    The index covers every folder in the window, and the folders between them
+    and their common prefix, which is the same search space used by
+    find_phpunit_configuration_file(). Configuration files are stored in a
+    trie keyed by their directory so resolving a file to its working
+    directory is a single longest-prefix lookup.
+
+    The stat signature of every indexed directory is recorded. A lookup
+    revalidates the indexed ancestors of the file, so a configuration file
+    created or removed outside of Sublime Text is noticed straight away
+    without rescanning the folders. Directories that are not scanned, such as
+    vendor packages, are not indexed and are left to the ancestor walk of
+    find_phpunit_configuration_file().
+    """
+
+    def __init__(self):
+        self.folders: Optional[list] = None
+        self._trie = PathTrie()
+        self._signatures = {}  # type: dict
+        self._lock = threading.Lock()
+        self._updating = False
+        self._pending_folders: Optional[list] = None
+
+    def is_ready(self, folders: list) -> bool:
+        return self.folders == folders
+
+    def update(self, folders: list) -> None:
+        """Incrementally update the index to cover {folders}."""
+        with self._lock:
+            if self._updating:
+                # The folders changed during an update, which is run again
+                # for them when it finishes.
+                self._pending_folders = list(folders)
+                return
+
+            if self.folders == folders:
+                return
+
+            self._updating = True
+            indexed_folders = self.folders or []
+
+        try:
+            for folder in indexed_folders:
+                if folder not in folders:
+                    debug_message('workspace index: removing folder %s', folder)
+                    self._remove_owner(folder)
+                    self._forget_signatures(folder, folders)
+
+            for folder in folders:
+                if folder not in indexed_folders:
+                    debug_message('workspace index: scanning folder %s', folder)
+                    for directory, configuration_file in _scan(folder):
+                        self._record_signature(directory)
+                        if configuration_file:
+                            self.add(configuration_file, folder)
+
+            self._remove_owner(_ANCESTORS)
+            common_prefix = os.path.commonprefix(folders)
+            for folder in folders:
+                parent = os.path.dirname(folder)
+                while parent.startswith(common_prefix) and parent != os.path.dirname(parent):
+                    self._record_signature(parent)
+                    try:
+                        configuration_file = _find_configuration_file_in(parent, os.listdir(parent))
+                    except OSError:
+                        configuration_file = None
+
+                    if configuration_file:
+                        self.add(configuration_file, _ANCESTORS)
+
+                    parent = os.path.dirname(parent)
+
+            debug_message('workspace index: %d configuration file(s) in %d folder(s)', len(self._trie), len(folders))
+        finally:
+            with self._lock:
+                self.folders = list(folders)
+                self._updating = False
+                pending_folders = self._pending_folders
+                self._pending_folders = None
+
+        if pending_folders is not None:
+            self.update(pending_folders)
+
+    def add(self, configuration_file: str, owner: str) -> None:
+        directory = os.path.dirname(configuration_file)
+        with self._lock:
+            entry = self._trie.get(directory)
+            if entry is None:
+                entry = {}
+                self._trie.insert(directory, entry)
+
+            entry[owner] = configuration_file
+
+    def _record_signature(self, directory: str) -> None:
+        signature = stat_signature(directory)
+        with self._lock:
+            self._signatures[directory] = signature
+
+    def _forget_signatures(self, folder: str, folders: list) -> None:
+        """Forget the signatures of the directories in {folder}, except those still in one of {folders}."""
+        def _in(directory: str, folder: str) -> bool:
+            return directory == folder or directory.startswith(folder + os.sep)
+
+        with self._lock:
+            for directory in [d for d in self._signatures if _in(d, folder) and not any(_in(d, f) for f in folders)]:
+                del self._signatures[directory]
+
+    def _owner(self, directory: str) -> str:
+        for folder in self.folders or []:
+            if directory == folder or directory.startswith(folder + os.sep):
+                return folder
+
+        return _ANCESTORS
+
+    def _refresh(self, directory: str) -> None:
+        try:
+            configuration_file = _find_configuration_file_in(directory, os.listdir(directory))
+        except OSError:
+            configuration_file = None
+
+        debug_message('workspace index: %s changed, configuration \'%s\'', directory, configuration_file)
+
+        with self._lock:
+            if configuration_file:
+                entry = self._trie.get(directory)
+                if entry is None:
+                    self._trie.insert(directory, {self._owner(directory): configuration_file})
+                else:
+                    for owner in entry:
+                        entry[owner] = configuration_file
+            elif directory in self._trie:
+                self._trie.remove(directory)
+
+    def _revalidate_directory(self, directory: str) -> bool:
+        signature = stat_signature(directory)
+        with self._lock:
+            changed = self._signatures.get(directory) != signature
+            self._signatures[directory] = signature
+
+        if changed:
+            self._refresh(directory)
+
+        return changed
+
+    def _indexed_ancestors(self, file_name: str) -> list:
+        """Return the indexed ancestors of {file_name}, nearest first, or none if its directory is not indexed."""
+        ancestors = []
+        directory = os.path.dirname(file_name)
+        with self._lock:
+            while directory in self._signatures:
+                ancestors.append(directory)
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+
+                directory = parent
+
+        return ancestors
+
+    def configuration_files(self) -> list:
+        with self._lock:
+            entries = [entry for directory, entry in self._trie.items()]
+
+        return sorted(set(f for entry in entries for f in entry.values()))
+
+    def _remove_owner(self, owner: str) -> None:
+        with self._lock:
+            for directory, entry in self._trie.items():
+                if entry.pop(owner, None) and not entry:
+                    self._trie.remove(directory)
+
+    def _match(self, file_name: str):
+        with self._lock:
+            match = self._trie.longest_prefix(os.path.dirname(file_name))
+            if match:
+                return match[0], list(match[1].values())
+
+    def find_configuration_file(self, file_name: str):
+        # A file in a directory that was not scanned, for example in a vendor
+        # package with its own configuration file, may not belong to the
+        # nearest indexed configuration file.
+        ancestors = self._indexed_ancestors(file_name)
+        if not ancestors:
+            return None
+
+        # The ancestors may have changed outside of Sublime Text, for example
+        # if a configuration file was created or removed in one of them.
+        for directory in ancestors:
+            self._revalidate_directory(directory)
+
+        match = self._match(file_name)
+        if match:
+            for configuration_file in match[1]:
+                # The index may still be stale, in which case fallback to a
+                # full search.
+                if os.path.isfile(configuration_file):
+                    return configuration_file
+
+
+def get_workspace_index(window) -> WorkspaceIndex:
+    index = _indexes.get(window.id())
+    if index is None:
+        index = _indexes[window.id()] = WorkspaceIndex()
+
+    return index
+
+
+def _work() -> None:
+    while True:
+        job = _queue.get()
+        if job is None:
+            return
+
+        try:
+            job()
+        except Exception as e:
+            print('PHPUnit: workspace index: {}'.format(e))
+
+
+def _submit(job) -> None:
+    global _worker
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='PHPUnitKit workspace index', daemon=True)
+            _worker.start()
+
+        _queue.put(job)
+
+
+def update_workspace_index(window, callback=None) -> None:
+    """
+    Update the index of {window} on the worker thread if its folders changed.
+
+    {callback} is called on the worker thread once the index is up to date.
+    """
+    index = get_workspace_index(window)
+    folders = window.folders()
+    if not index.is_ready(folders):
+        _submit(lambda: index.update(folders))
+
+    if callback:
+        _submit(callback)
+
+
+def stop_workspace_index_worker() -> None:
+    global _worker
+
+    with _worker_lock:
+        if _worker is not None:
+            _queue.put(None)
+            _worker = None
+
+
+def add_to_workspace_index(window, configuration_file: str) -> None:
+    index = get_workspace_index(window)
+    if index.folders is None:
+        return
+
+    directory = os.path.dirname(configuration_file)
+    try:
+        # Prefer the configuration file that PHPUnit itself would use.
+        configuration_file = _find_configuration_file_in(directory, os.listdir(directory))
+    except OSError:
+        return
+
+    if not configuration_file:
+        return
+
+    owner = _ANCESTORS
+    for folder in index.folders:
+        if configuration_file.startswith(folder + os.sep):
+            owner = folder
+            break
+
+    index.add(configuration_file, owner)
+
+
+def remove_workspace_index(window) -> None:
+    _indexes.pop(window.id(), None)
+
+
+def find_configuration_file(window, file_name):
+    if file_name and window:
+        index = get_workspace_index(window)
+        if index.is_ready(window.folders()):
+            configuration_file = index.find_configuration_file(file_name)
+            if configuration_file:
+                debug_message('workspace index: found configuration \'%s\'', configuration_file)
+                return configuration_file
+        else:
+            update_workspace_index(window)
+
+    return find_phpunit_configuration_file(file_name, window.folders() if window else None)
+
+
+def find_working_directory(window, file_name):
+    configuration_file = find_configuration_file(window, file_name)
+    if configuration_file:
+        return os.path.dirname(configuration_file)
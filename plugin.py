@@ -15,13 +15,33 @@
 # You should have received a copy of the GNU General Public License
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
+import sublime
 import sublime_plugin
 
 from PHPUnitKit.lib.events import Listener
+from PHPUnitKit.lib.prewarm import prewarm_async
+from PHPUnitKit.lib.process import kill_all_processes
 from PHPUnitKit.lib.runner import PHPUnit
+from PHPUnitKit.lib.ssh import stop_ssh_masters
+from PHPUnitKit.lib.testindex import save_test_indexes
+from PHPUnitKit.lib.testindex import stop_test_index_worker
+from PHPUnitKit.lib.workspace import stop_workspace_index_worker
 from PHPUnitKit.lib.utils import toggle_on_post_save
 
 
+def plugin_loaded():
+    for window in sublime.windows():
+        prewarm_async(window)
+
+
+def plugin_unloaded():
+    kill_all_processes()
+    stop_test_index_worker()
+    stop_workspace_index_worker()
+    save_test_indexes()
+    stop_ssh_masters()
+
+
 class PhpunitTestSuiteCommand(sublime_plugin.WindowCommand):
 
     def run(self, **options):
@@ -34,6 +54,12 @@ class PhpunitTestFileCommand(sublime_plugin.WindowCommand):
         PHPUnit(self.window).run_file(options=options)
 
 
+class PhpunitTestShardedCommand(sublime_plugin.WindowCommand):
+
+    def run(self, **options):
+        PHPUnit(self.window).run_sharded(options=options)
+
+
 class PhpunitTestLastCommand(sublime_plugin.WindowCommand):
 
     def run(self):
@@ -46,12 +72,48 @@ class PhpunitTestNearestCommand(sublime_plugin.WindowCommand):
         PHPUnit(self.window).run_nearest(options=options)
 
 
+class PhpunitTestPickCommand(sublime_plugin.WindowCommand):
+
+    def run(self, **options):
+        PHPUnit(self.window).pick(options=options)
+
+
+class PhpunitTestFailedCommand(sublime_plugin.WindowCommand):
+
+    def run(self):
+        PHPUnit(self.window).run_failed()
+
+
+class PhpunitNextFailureCommand(sublime_plugin.WindowCommand):
+
+    def run(self):
+        PHPUnit(self.window).goto_failure(1)
+
+
+class PhpunitPreviousFailureCommand(sublime_plugin.WindowCommand):
+
+    def run(self):
+        PHPUnit(self.window).goto_failure(-1)
+
+
 class PhpunitTestResultsCommand(sublime_plugin.WindowCommand):
 
     def run(self):
         PHPUnit(self.window).show()
 
 
+class PhpunitExecCommand(sublime_plugin.WindowCommand):
+    """
+    Run a command in the PHPUnit output panel with the native test runner.
+
+    It takes the cmd, env, working_dir and kill arguments of the exec
+    command, and remote paths in the output are mapped back to local paths.
+    """
+
+    def run(self, cmd=None, env=None, working_dir=None, kill=False):
+        PHPUnit(self.window).execute(cmd, env, working_dir, kill)
+
+
 class PhpunitTestCancelCommand(sublime_plugin.WindowCommand):
 
     def run(self):
@@ -84,8 +146,23 @@ class PhpunitTestCoverageCommand(sublime_plugin.WindowCommand):
 
 class PhpunitListener(sublime_plugin.EventListener):
 
-    def on_post_save(self, view):
-        Listener().on_post_save(view)
+    def on_load_project_async(self, window):
+        Listener().on_load_project_async(window)
+
+    def on_pre_close_window(self, window):
+        Listener().on_pre_close_window(window)
+
+    def on_activated_async(self, view):
+        Listener().on_activated_async(view)
+
+    def on_load(self, view):
+        Listener().on_load(view)
+
+    def on_close(self, view):
+        Listener().on_close(view)
+
+    def on_post_save_async(self, view):
+        Listener().on_post_save_async(view)
 
 
 class PhpunitToggleCommand(sublime_plugin.WindowCommand):
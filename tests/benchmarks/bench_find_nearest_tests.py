@@ -0,0 +1,119 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark find_nearest_tests() on synthetic large test classes.
+
+Compares the interval index against the previous nested loop implementation
+for increasingly large classes, with a cursor in every method. When the size
+doubles, the time of an O(n log n) implementation roughly doubles and the
+time of an O(n^2) implementation roughly quadruples.
+
+Run from the Sublime Text console:
+
+    from PHPUnitKit.tests.benchmarks import bench_find_nearest_tests; bench_find_nearest_tests.run()
+"""
+
+import time
+
+from sublime import Region
+from sublime import active_window
+from sublime import find_resources
+
+from PHPUnitKit.lib.metadata import forget_view
+from PHPUnitKit.lib.utils import find_nearest_tests
+
+
+def _fixture(methods: int) -> str:
+    lines = ['<?php', '', 'class GeneratedTest extends TestCase', '{']
+    for i in range(methods):
+        lines += [
+            '    public function testMethod{}()'.format(i),
+            '    {',
+            '        $this->assertSame({0}, {0});'.format(i),
+            '        $this->assertTrue(true);',
+            '    }',
+            ''
+        ]
+    lines.append('}')
+
+    return '\n'.join(lines)
+
+
+def _nested_loop(view) -> list:
+    # The implementation of find_nearest_tests() before the interval index.
+    method_names = []
+    function_regions = view.find_by_selector('entity.name.function')
+    function_areas = []
+    for function_area in view.find_by_selector('meta.function'):
+        for function_region in function_regions:
+            if function_region.intersects(function_area):
+                function_areas.append(function_area)
+
+    for region in view.sel():
+        for i, area in enumerate(function_areas):
+            if not area.a <= region.a <= area.b:
+                continue
+
+            if not area.intersects(function_regions[i]):
+                continue
+
+            method_names.append(view.substr(function_regions[i]))
+            break
+
+    return method_names
+
+
+def _interval_index(view) -> list:
+    forget_view(view)
+
+    return find_nearest_tests(view)
+
+
+def _time(func, view) -> float:
+    start = time.perf_counter()
+    func(view)
+
+    return time.perf_counter() - start
+
+
+def run(sizes=(125, 250, 500, 1000, 2000)) -> None:
+    view = active_window().new_file()
+    view.set_scratch(True)
+    view.set_syntax_file(find_resources('PHP.sublime-syntax')[0])
+    view.settings().set('phpunit.pest', False)
+
+    try:
+        previous = {}  # type: dict
+        for size in sizes:
+            view.run_command('select_all')
+            view.run_command('right_delete')
+            view.run_command('append', {'characters': _fixture(size)})
+
+            # A cursor inside every test method.
+            view.sel().clear()
+            for region in view.find_all('assertTrue'):
+                view.sel().add(Region(region.begin()))
+
+            for name, func in (('nested loop', _nested_loop), ('interval index', _interval_index)):
+                seconds = _time(func, view)
+                growth = seconds / previous[name] if name in previous else float('nan')
+                previous[name] = seconds
+                print('PHPUnit: {} methods, {}: {:.2f}ms (x{:.1f})'.format(size, name, seconds * 1000, growth))
+    finally:
+        view.close()
@@ -0,0 +1,90 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark writing a huge test output to the output panel.
+
+Pipes synthetic output of 500,000 lines, in the batches the process reader
+delivers, from a background thread through the throttled panel writer.
+Reports the time until the last append, the number of appends and the
+resulting panel size, with and without the output cap.
+
+Run from the Sublime Text console:
+
+    from PHPUnitKit.tests.benchmarks import bench_output_panel; bench_output_panel.run()
+"""
+
+import threading
+import time
+
+from sublime import active_window
+from sublime import set_timeout
+
+from PHPUnitKit.lib.panel import PanelWriter
+
+
+_PANEL_NAME = 'phpunit_benchmark'
+
+# The number of lines per batch, roughly one 64KB read of progress output.
+_BATCH_LINES = 2000
+
+
+def _output(lines: int) -> list:
+    batches = []
+    for start in range(0, lines, _BATCH_LINES):
+        batch = []
+        for i in range(start, min(lines, start + _BATCH_LINES)):
+            batch.append('Deprecated: Function example() is deprecated in /app/src/Example{}.php on line {}'.format(
+                i % 100, i))
+        batches.append('\n'.join(batch) + '\n')
+
+    batches.append('\nThere was 1 failure:\n\n1) ExampleTest::testExample\nFailed asserting that false is true.\n\n'
+                   '/app/tests/ExampleTest.php:12\n\nFAILURES!\nTests: 1, Assertions: 1, Failures: 1.\n')
+
+    return batches
+
+
+def _bench(window, batches: list, max_lines: int, on_done) -> None:
+    panel = window.create_output_panel(_PANEL_NAME)
+    writer = PanelWriter(panel, max_lines=max_lines)
+    start = time.perf_counter()
+
+    def _read() -> None:
+        for batch in batches:
+            writer.write(batch)
+        writer.close()
+        set_timeout(_wait, 0)
+
+    def _wait() -> None:
+        if writer._scheduled or writer._pending:
+            set_timeout(_wait, 10)
+            return
+
+        elapsed = time.perf_counter() - start
+        print('PHPUnit: output panel max_lines={}: {:.2f}s, {} appends, {} lines in panel, {} folded'.format(
+            max_lines, elapsed, writer.flushes, panel.rowcol(panel.size())[0], writer.elided))
+        window.destroy_output_panel(_PANEL_NAME)
+        on_done()
+
+    threading.Thread(target=_read).start()
+
+
+def run(lines: int = 500000) -> None:
+    window = active_window()
+    batches = _output(lines)
+
+    _bench(window, batches, 20000, lambda: _bench(window, batches, 0, lambda: None))
@@ -0,0 +1,73 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark reading the results of a huge test run.
+
+Parses a synthetic TeamCity log of 50,000 tests, 1% of them failing, in the
+chunks a log is read in while tests run, and reports the parse time and the
+peak memory allocated while parsing.
+
+Run from the Sublime Text console:
+
+    from PHPUnitKit.tests.benchmarks import bench_results; bench_results.run()
+"""
+
+import time
+import tracemalloc
+
+from PHPUnitKit.lib.results import TeamCityParser
+from PHPUnitKit.lib.results import TestResults
+
+
+# The size of each chunk, roughly what is written between two polls.
+_CHUNK_SIZE = 65536
+
+
+def _log(tests: int) -> str:
+    lines = []
+    for i in range(tests):
+        file = '/app/tests/Example{}Test.php'.format(i % 500)
+        location = 'php_qn://{}::\\App\\Example{}Test::test{}'.format(file, i % 500, i)
+        lines.append("##teamcity[testStarted name='test{}' locationHint='{}' flowId='1']".format(i, location))
+        if i % 100 == 0:
+            lines.append("##teamcity[testFailed name='test{}' message='Failed asserting that false is true.'"
+                         " details='{}:{}|n' duration='1' flowId='1']".format(i, file, i % 200))
+        lines.append("##teamcity[testFinished name='test{}' duration='1' flowId='1']".format(i))
+
+    return '\n'.join(lines) + '\n'
+
+
+def run(tests: int = 50000) -> None:
+    log = _log(tests)
+    chunks = [log[i:i + _CHUNK_SIZE] for i in range(0, len(log), _CHUNK_SIZE)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    results = TestResults('/app')
+    parser = TeamCityParser(results)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print('PHPUnit: results of {} tests ({:.1f}MB log): {:.2f}s, {:.2f}MB peak, {}'.format(
+        tests, len(log) / 1048576, elapsed, peak / 1048576, results.summary()))
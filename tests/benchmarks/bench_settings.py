@@ -0,0 +1,58 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark the cost of the settings lookups made by a test run.
+
+Run from the Sublime Text console:
+
+    from PHPUnitKit.tests.benchmarks import bench_settings; bench_settings.run()
+"""
+
+import timeit
+
+from sublime import active_window
+
+from PHPUnitKit.lib.settings import get_settings
+
+
+# The settings looked up by a single "sublime" strategy test run.
+_RUN_LOOKUPS = (
+    'debug', 'strategy', 'prepend_cmd', 'strategy', 'strategy', 'strategy', 'strategy', 'strategy', 'ssh',
+    'docker', 'ssh', 'docker', 'save_all_on_run', 'strategy', 'php_versions_path', 'php_executable',
+    'executable', 'paratest', 'artisan', 'pest', 'composer', 'options', 'strategy', 'pest', 'artisan',
+    'strategy', 'debug', 'font_size',
+)
+
+
+def _before(view) -> None:
+    for name in _RUN_LOOKUPS:
+        view.settings().get('phpunit.' + name)
+
+
+def _after(view) -> None:
+    settings = get_settings(view)
+    for name in _RUN_LOOKUPS:
+        settings.get(name)
+
+
+def run(number: int = 10000) -> None:
+    view = active_window().active_view()
+    for name, func in (('before (view.settings().get)', _before), ('after (snapshot)', _after)):
+        seconds = min(timeit.repeat(lambda: func(view), number=number, repeat=3))
+        print('PHPUnit: settings per run {}: {:.2f}us'.format(name, seconds / number * 1e6))
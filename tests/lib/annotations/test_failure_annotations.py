@@ -0,0 +1,158 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import sublime
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.annotations import FailureAnnotations
+from PHPUnitKit.lib.results import TestResult
+
+
+def _failure(file: str, line: int, message: str = 'Failed') -> TestResult:
+    return TestResult('FooTest::test{}'.format(line), 'failed', 0.0, message, file, line)
+
+
+def _view(id: int, file: str):
+    view = unittest.mock.Mock()
+    view.id.return_value = id
+    view.file_name.return_value = file
+    view.is_loading.return_value = False
+    view.text_point.side_effect = lambda row, col: row * 100
+    view.line.side_effect = lambda pt: sublime.Region(pt, pt + 10)
+
+    return view
+
+
+@unittest.mock.patch('PHPUnitKit.lib.annotations.sublime.PhantomSet')
+@unittest.mock.patch('PHPUnitKit.lib.annotations.sublime.set_timeout')
+class TestFailureAnnotations(unittest.TestCase):
+
+    def setUp(self):
+        self.views = [_view(1, '/app/tests/FooTest.php')]
+        self.window = unittest.mock.Mock()
+        self.window.views.side_effect = lambda: self.views
+
+    def flush(self, set_timeout) -> None:
+        while set_timeout.call_count:
+            calls = set_timeout.call_args_list
+            set_timeout.reset_mock()
+            for call in calls:
+                call[0][0]()
+
+    def test_failures_are_drawn_in_one_update_per_view(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/FooTest.php', 3), _failure('/app/tests/FooTest.php', 5)])
+        annotations.add([_failure('/app/tests/FooTest.php', 5)])
+
+        self.assertEqual(1, set_timeout.call_count)
+        self.flush(set_timeout)
+
+        view = self.views[0]
+        self.assertEqual(1, annotations.updates)
+        view.add_regions.assert_called_once()
+        self.assertEqual([sublime.Region(200, 210), sublime.Region(400, 410)], view.add_regions.call_args[0][1])
+        self.assertEqual(2, len(PhantomSet.return_value.update.call_args[0][0]))
+
+    def test_updates_are_batched_across_frames(self, set_timeout, PhantomSet):
+        for i in range(20):
+            file = '/app/tests/Foo{}Test.php'.format(i)
+            self.views.append(_view(i + 10, file))
+
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/Foo{}Test.php'.format(i), 1) for i in range(20) for _ in range(100)])
+
+        set_timeout.call_args[0][0]()
+        self.assertEqual(8, annotations.updates)
+
+        self.flush(set_timeout)
+        self.assertEqual(20, annotations.updates)
+
+    def test_files_that_are_not_open_are_drawn_when_loaded(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/BarTest.php', 7)])
+        self.flush(set_timeout)
+        self.assertEqual(0, annotations.updates)
+
+        view = _view(2, '/app/tests/BarTest.php')
+        annotations.on_load(view)
+
+        self.assertEqual([sublime.Region(600, 610)], view.add_regions.call_args[0][1])
+
+    def test_clear(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/FooTest.php', 3)])
+        self.flush(set_timeout)
+
+        annotations.clear()
+
+        view = self.views[0]
+        view.erase_regions.assert_called_once_with('phpunit_failures')
+        PhantomSet.return_value.update.assert_called_with([])
+
+        annotations.on_load(view)
+        self.assertEqual(1, annotations.updates)
+
+    def test_clear_working_dir(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/FooTest.php', 3), _failure('/other/tests/BarTest.php', 3)])
+        self.flush(set_timeout)
+
+        annotations.clear('/other')
+
+        self.views[0].erase_regions.assert_not_called()
+        view = _view(2, '/other/tests/BarTest.php')
+        annotations.on_load(view)
+        view.add_regions.assert_not_called()
+
+    def test_every_view_of_a_file_is_drawn_and_cleared(self, set_timeout, PhantomSet):
+        self.views.append(_view(2, '/app/tests/FooTest.php'))
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/FooTest.php', 3)])
+        self.flush(set_timeout)
+
+        self.assertEqual(2, annotations.updates)
+        for view in self.views:
+            view.add_regions.assert_called_once()
+
+        annotations.clear()
+
+        for view in self.views:
+            view.erase_regions.assert_called_once_with('phpunit_failures')
+
+    def test_closed_views_are_forgotten(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        annotations.add([_failure('/app/tests/FooTest.php', 3)])
+        self.flush(set_timeout)
+        self.assertIn(1, annotations._phantom_sets)
+
+        annotations.on_close(self.views[0])
+
+        self.assertNotIn(1, annotations._phantom_sets)
+
+    def test_render_collapsed_and_expanded(self, set_timeout, PhantomSet):
+        annotations = FailureAnnotations(self.window)
+        failures = [_failure('/app/tests/FooTest.php', 3, 'Failed asserting that two strings are equal.\n--- a\n+++ b')]
+
+        collapsed = annotations._render('/app/tests/FooTest.php', 3, failures)
+        self.assertIn('Failed asserting that two strings are equal.', collapsed)
+        self.assertNotIn('+++ b', collapsed)
+        self.assertIn('href="toggle"', collapsed)
+
+        annotations._toggle('/app/tests/FooTest.php', 3)
+        expanded = annotations._render('/app/tests/FooTest.php', 3, failures)
+        self.assertIn('--- a<br>+++ b', expanded)
@@ -0,0 +1,77 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.cache import StatCache
+from PHPUnitKit.lib.cache import stat_signature
+
+
+class TestStatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = StatCache('test')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stat_signature_of_missing_path_is_none(self):
+        self.assertIsNone(stat_signature(os.path.join(self.tmp_dir, 'foobar')))
+
+    def test_caches_value_until_a_dependent_path_changes(self):
+        compute = unittest.mock.Mock(return_value=('x', [self.tmp_dir]))
+
+        self.assertEqual('x', self.cache.get('key', compute))
+        self.assertEqual('x', self.cache.get('key', compute))
+        self.assertEqual(1, compute.call_count)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+        open(os.path.join(self.tmp_dir, 'phpunit.xml'), 'w').close()
+        os.utime(self.tmp_dir, ns=(0, 0))
+
+        self.assertEqual('x', self.cache.get('key', compute))
+        self.assertEqual(2, compute.call_count)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_caches_none(self):
+        compute = unittest.mock.Mock(return_value=(None, [self.tmp_dir]))
+
+        self.assertIsNone(self.cache.get('key', compute))
+        self.assertIsNone(self.cache.get('key', compute))
+        self.assertEqual(1, compute.call_count)
+
+    def test_exceptions_are_not_cached(self):
+        compute = unittest.mock.Mock(side_effect=ValueError('foobar'))
+
+        with self.assertRaises(ValueError):
+            self.cache.get('key', compute)
+
+        self.assertEqual(0, len(self.cache))
+
+    def test_clear(self):
+        compute = unittest.mock.Mock(return_value=('x', []))
+        self.cache.get('key', compute)
+        self.cache.clear()
+        self.cache.get('key', compute)
+        self.assertEqual(2, compute.call_count)
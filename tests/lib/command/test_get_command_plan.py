@@ -0,0 +1,122 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.command import get_command_plan
+from PHPUnitKit.lib.ssh import get_ssh_master
+
+
+class TestGetCommandPlan(unittest.ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.working_dir = unittest.fixtures_path('working_dir')
+        self.view.settings().set('phpunit.strategy', 'sublime')
+        self.view.settings().set('phpunit.prepend_cmd', [])
+        self.view.settings().set('phpunit.ssh', False)
+        self.view.settings().set('phpunit.ssh_control_master', False)
+        self.view.settings().set('phpunit.docker', False)
+
+    def plan(self, options=None, php_executable=None):
+        return get_command_plan(
+            self.view,
+            self.working_dir,
+            php_executable,
+            ['vendor/bin/phpunit'],
+            options if options is not None else {})
+
+    def test_build(self):
+        plan = self.plan({'no-coverage': True})
+        self.assertEqual(['vendor/bin/phpunit', '--no-coverage'], plan.build())
+        self.assertEqual(
+            ['vendor/bin/phpunit', '--no-coverage', '--filter', '::testFoo', os.path.join('tests', 'FooTest.php')],
+            plan.build(os.path.join(self.working_dir, 'tests', 'FooTest.php'), {'filter': '::testFoo'}))
+
+    def test_build_with_a_list_of_files(self):
+        self.assertEqual(
+            ['vendor/bin/phpunit', os.path.join('tests', 'BarTest.php'), os.path.join('tests', 'FooTest.php')],
+            self.plan().build([
+                os.path.join(self.working_dir, 'tests', 'BarTest.php'),
+                os.path.join(self.working_dir, 'tests', 'FooTest.php')
+            ]))
+
+    def test_build_keeps_the_order_of_the_options(self):
+        options = {'filter': '::testFoo', 'no-coverage': True, 'colors=never': True}
+        self.assertEqual(
+            ['vendor/bin/phpunit', '--filter', '::testFoo', '--no-coverage', '--colors=never'],
+            self.plan(options).build(None, options))
+
+        options = {'no-coverage': True, 'filter': '::testFoo', 'colors=never': True}
+        self.assertEqual(
+            ['vendor/bin/phpunit', '--no-coverage', '--filter', '::testFoo', '--colors=never'],
+            self.plan(options).build(None, options))
+
+    def test_env(self):
+        php = os.path.join(os.sep, 'php', 'bin', 'php')
+        plan = self.plan(php_executable=php)
+        self.assertTrue(plan.env['PATH'].startswith(os.path.dirname(php) + os.pathsep))
+        self.assertEqual({}, self.plan().env)
+
+    def test_plan_is_reused_for_different_files_and_filters(self):
+        self.assertIs(self.plan({'filter': 'a'}), self.plan({'filter': 'b'}))
+
+    def test_plan_is_recompiled_when_options_change(self):
+        self.assertIsNot(self.plan({'no-coverage': True}), self.plan({'no-coverage': False}))
+
+    def test_plan_is_recompiled_when_settings_change(self):
+        plan = self.plan()
+        self.view.settings().set('phpunit.prepend_cmd', ['fizz'])
+        self.assertIsNot(plan, self.plan())
+        self.assertEqual(['fizz', 'vendor/bin/phpunit'], self.plan().build())
+
+    def test_ssh(self):
+        self.view.settings().set('phpunit.ssh', True)
+        self.view.settings().set('phpunit.ssh_options', {'-p': '22', '-tt': True})
+        self.view.settings().set('phpunit.ssh_user', 'vagrant')
+        self.view.settings().set('phpunit.ssh_host', 'homestead.test')
+        self.view.settings().set('phpunit.ssh_paths', {self.working_dir: '/home/vagrant/code'})
+        self.assertEqual([
+            'ssh', '-p', '22', '-tt', 'vagrant@homestead.test', 'cd /home/vagrant/code;', 'vendor/bin/phpunit'
+        ], self.plan().build())
+
+    def test_ssh_working_dir_is_the_remote_path_of_its_mapping(self):
+        self.view.settings().set('phpunit.ssh', True)
+        self.view.settings().set('phpunit.ssh_options', {})
+        self.view.settings().set('phpunit.ssh_user', 'vagrant')
+        self.view.settings().set('phpunit.ssh_host', 'homestead.test')
+        self.view.settings().set('phpunit.ssh_paths', {os.path.dirname(self.working_dir): '/home/vagrant/code'})
+        self.assertEqual([
+            'ssh', 'vagrant@homestead.test', 'cd /home/vagrant/code;', 'vendor/bin/phpunit'
+        ], self.plan().build())
+
+    @unittest.skipIf(os.name == 'nt', 'ssh connection multiplexing is not supported on Windows')
+    def test_ssh_control_master(self):
+        self.view.settings().set('phpunit.ssh', True)
+        self.view.settings().set('phpunit.ssh_control_master', True)
+        self.view.settings().set('phpunit.ssh_options', {'-p': '22', '-tt': True})
+        self.view.settings().set('phpunit.ssh_user', 'vagrant')
+        self.view.settings().set('phpunit.ssh_host', 'homestead.test')
+        self.view.settings().set('phpunit.ssh_paths', {self.working_dir: '/home/vagrant/code'})
+        control_path = get_ssh_master('vagrant', 'homestead.test', {'-p': '22', '-tt': True}).control_path
+        self.assertEqual([
+            'ssh', '-p', '22', '-tt', '-o', 'ControlMaster=no', '-o', 'ControlPath=' + control_path,
+            'vagrant@homestead.test', 'cd /home/vagrant/code;', 'vendor/bin/phpunit'
+        ], self.plan().build())
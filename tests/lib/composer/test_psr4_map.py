@@ -0,0 +1,103 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import shutil
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.composer import clear_composer_caches
+from PHPUnitKit.lib.composer import find_psr4_switchables
+from PHPUnitKit.lib.composer import get_psr4_map
+
+
+class TestPsr4Map(unittest.TestCase):
+
+    def setUp(self):
+        clear_composer_caches()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, *path) -> str:
+        return os.path.join(self.dir, *path)
+
+    def touch(self, *path) -> str:
+        file = self.path(*path)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'w') as f:
+            f.write('<?php\n')
+
+        return file
+
+    def composer(self, autoload: dict, autoload_dev: dict) -> str:
+        file = self.path('composer.json')
+        with open(file, 'w') as f:
+            json.dump({'autoload': {'psr-4': autoload}, 'autoload-dev': {'psr-4': autoload_dev}}, f)
+
+        return file
+
+    def test_laravel(self):
+        self.composer({'App\\': 'app/'}, {'Tests\\': 'tests/'})
+        source = self.touch('app', 'Models', 'User.php')
+        unit = self.touch('tests', 'Unit', 'Models', 'UserTest.php')
+        feature = self.touch('tests', 'Feature', 'Models', 'UserTest.php')
+
+        self.assertEqual([feature, unit], find_psr4_switchables(source))
+        self.assertEqual([source], find_psr4_switchables(unit))
+        self.assertEqual([source], find_psr4_switchables(feature))
+
+    def test_symfony(self):
+        self.composer({'App\\': 'src/'}, {'App\\Tests\\': 'tests/'})
+        source = self.touch('src', 'Controller', 'HomeController.php')
+        test = self.touch('tests', 'Controller', 'HomeControllerTest.php')
+
+        self.assertEqual([test], find_psr4_switchables(source))
+        self.assertEqual([source], find_psr4_switchables(test))
+
+    def test_multiple_paths_per_prefix(self):
+        self.composer({'Acme\\': ['lib/', 'src/']}, {'Acme\\Tests\\': 'tests/'})
+        source = self.touch('src', 'Foo.php')
+        test = self.touch('tests', 'FooTest.php')
+
+        self.assertEqual([test], find_psr4_switchables(source))
+        self.assertEqual([source], find_psr4_switchables(test))
+
+    def test_files_outside_of_psr4_roots(self):
+        self.composer({'App\\': 'app/'}, {'Tests\\': 'tests/'})
+
+        self.assertEqual([], find_psr4_switchables(self.touch('bin', 'Foo.php')))
+        self.assertEqual([], find_psr4_switchables(self.touch('app', 'Foo.php')))
+
+    def test_no_composer_file(self):
+        self.assertEqual([], find_psr4_switchables(self.touch('app', 'Foo.php')))
+        self.assertIsNone(get_psr4_map(None))
+
+    def test_is_invalidated_when_composer_json_changes(self):
+        composer_file = self.composer({'App\\': 'app/'}, {'Tests\\': 'tests/'})
+        psr4_map = get_psr4_map(composer_file)
+        self.assertIs(psr4_map, get_psr4_map(composer_file))
+
+        self.composer({'App\\': 'src/'}, {'App\\Tests\\': 'tests/'})
+        os.utime(composer_file, ns=(0, 0))
+
+        self.assertIsNot(psr4_map, get_psr4_map(composer_file))
+        self.assertEqual([('App\\', self.path('src'))], get_psr4_map(composer_file).source_roots)
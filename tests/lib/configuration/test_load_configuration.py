@@ -0,0 +1,74 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.configuration import load_configuration
+
+
+class TestLoadConfiguration(unittest.TestCase):
+
+    def setUp(self):
+        self.configuration = load_configuration(unittest.fixtures_path('configuration', 'phpunit.xml'))
+
+    def path(self, *parts) -> str:
+        return unittest.fixtures_path('configuration', *parts)
+
+    def test_none(self):
+        self.assertIsNone(load_configuration(None))
+        self.assertIsNone(load_configuration(self.path('foobar.xml')))
+        self.assertIsNone(load_configuration(self.path('invalid.xml')))
+
+    def test_is_cached(self):
+        self.assertIs(self.configuration, load_configuration(self.path('phpunit.xml')))
+
+    def test_bootstrap(self):
+        self.assertEqual('vendor/autoload.php', self.configuration.bootstrap)
+
+    def test_testsuites(self):
+        self.assertEqual(['unit', 'integration'], self.configuration.testsuite_names())
+
+        unit, integration = self.configuration.testsuites
+        self.assertEqual([self.path('tests', 'Unit')], [d.path for d in unit.directories])
+        self.assertEqual('Test.php', unit.directories[0].suffix)
+        self.assertEqual([self.path('tests', 'Unit', 'Excluded')], unit.excludes)
+        self.assertEqual('.phpt', integration.directories[0].suffix)
+        self.assertEqual('it_', integration.directories[0].prefix)
+        self.assertEqual([self.path('tests', 'SmokeTest.php')], integration.files)
+
+    def test_groups(self):
+        self.assertEqual(['fast'], self.configuration.groups)
+        self.assertEqual(['slow'], self.configuration.exclude_groups)
+
+    def test_includes(self):
+        self.assertTrue(self.configuration.includes(self.path('tests', 'Unit', 'FooTest.php')))
+        self.assertTrue(self.configuration.includes(self.path('tests', 'Unit', 'Foo', 'BarTest.php')))
+        self.assertTrue(self.configuration.includes(self.path('tests', 'Integration', 'it_foo.phpt')))
+        self.assertTrue(self.configuration.includes(self.path('tests', 'SmokeTest.php')))
+
+        self.assertFalse(self.configuration.includes(self.path('tests', 'Unit', 'Foo.php')))
+        self.assertFalse(self.configuration.includes(self.path('tests', 'Unit', 'Excluded', 'FooTest.php')))
+        self.assertFalse(self.configuration.includes(self.path('tests', 'Integration', 'FooTest.php')))
+        self.assertFalse(self.configuration.includes(self.path('src', 'FooTest.php')))
+        self.assertFalse(self.configuration.includes(os.path.join(os.sep, 'tmp', 'FooTest.php')))
+
+    def test_find_testsuites(self):
+        testsuites = self.configuration.find_testsuites(self.path('tests', 'SmokeTest.php'))
+        self.assertEqual(['integration'], [t.name for t in testsuites])
@@ -0,0 +1,81 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.mapping import get_output_path_mapping
+from PHPUnitKit.lib.mapping import get_output_path_mappings
+
+
+class TestOutputPathMapping(unittest.TestCase):
+
+    def setUp(self):
+        self.mapping = get_output_path_mapping([
+            {'/code/app': '/var/www/app', '/code/lib': '/var/www/app/vendor/acme/lib'},
+            {'/code/other': '/srv/other/'}
+        ])
+
+    def test_none(self):
+        self.assertIsNone(get_output_path_mapping([]))
+
+    def test_translate(self):
+        self.assertEqual(
+            '1) FooTest::testBar\n/code/app/tests/FooTest.php:12\n',
+            self.mapping.translate('1) FooTest::testBar\n/var/www/app/tests/FooTest.php:12\n'))
+
+    def test_translate_uses_longest_remote_path(self):
+        self.assertEqual(
+            '/code/lib/src/Foo.php:3',
+            self.mapping.translate('/var/www/app/vendor/acme/lib/src/Foo.php:3'))
+        self.assertEqual('/code/app/vendor/x.php:3', self.mapping.translate('/var/www/app/vendor/x.php:3'))
+
+    def test_translate_many_paths(self):
+        self.assertEqual(
+            '/code/app/a.php:1 /code/other/b.php on line 2',
+            self.mapping.translate('/var/www/app/a.php:1 /srv/other/b.php on line 2'))
+
+    def test_translate_applies_mappings_in_order(self):
+        mapping = get_output_path_mapping([{'/vagrant': '/app'}, {'/code': '/vagrant'}])
+        self.assertEqual('/code/tests/FooTest.php:3', mapping.translate('/app/tests/FooTest.php:3'))
+
+    def test_translate_only_matches_whole_path_components(self):
+        self.assertEqual('/var/www/application/a.php:1', self.mapping.translate('/var/www/application/a.php:1'))
+
+    def test_translate_only_matches_at_the_start_of_a_path(self):
+        mapping = get_output_path_mapping([{'/Users/me/proj': '/app'}])
+        self.assertEqual('/usr/src/app/vendor/x.php:3', mapping.translate('/usr/src/app/vendor/x.php:3'))
+        self.assertEqual('./app/x.php:3', mapping.translate('./app/x.php:3'))
+        self.assertEqual(
+            'at /Users/me/proj/x.php:3 (/Users/me/proj/y.php)',
+            mapping.translate('at /app/x.php:3 (/app/y.php)'))
+
+
+class TestGetOutputPathMappings(unittest.ViewTestCase):
+
+    def test_none_when_not_remote(self):
+        self.view.settings().set('phpunit.ssh', False)
+        self.view.settings().set('phpunit.docker', False)
+        self.view.settings().set('phpunit.docker_paths', {'/code': '/app'})
+        self.assertEqual([], get_output_path_mappings(self.view))
+
+    def test_docker_and_ssh(self):
+        self.view.settings().set('phpunit.ssh', True)
+        self.view.settings().set('phpunit.ssh_paths', {'/code': '/vagrant'})
+        self.view.settings().set('phpunit.docker', True)
+        self.view.settings().set('phpunit.docker_paths', {'/vagrant': '/app'})
+        self.assertEqual([{'/vagrant': '/app'}, {'/code': '/vagrant'}], get_output_path_mappings(self.view))
@@ -0,0 +1,86 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.mapping import PathMapping
+from PHPUnitKit.lib.mapping import get_path_mapping
+from PHPUnitKit.lib.mapping import resolve_path_mapping
+
+
+class TestPathMapping(unittest.TestCase):
+
+    def setUp(self):
+        self.mapping = PathMapping({
+            '/code/app': '/var/www/app',
+            '/code/app/vendor': '/opt/vendor',
+            '/code/shared/': '/shared',
+        })
+
+    def test_translate(self):
+        self.assertEqual('/var/www/app', self.mapping.translate('/code/app'))
+        self.assertEqual('/var/www/app/tests/FooTest.php', self.mapping.translate('/code/app/tests/FooTest.php'))
+        self.assertEqual('/shared/src', self.mapping.translate('/code/shared/src'))
+
+    def test_translate_uses_longest_prefix(self):
+        self.assertEqual('/opt/vendor/bin/phpunit', self.mapping.translate('/code/app/vendor/bin/phpunit'))
+
+    def test_translate_only_matches_whole_path_components(self):
+        self.assertEqual('/code/application', self.mapping.translate('/code/application'))
+        self.assertEqual('tests/code/app', self.mapping.translate('tests/code/app'))
+
+    def test_translate_paths_inside_params(self):
+        self.assertEqual(
+            '--bootstrap=/opt/vendor/autoload.php',
+            self.mapping.translate('--bootstrap=/code/app/vendor/autoload.php'))
+        self.assertEqual(
+            'include_path=/shared:/var/www/app/lib',
+            self.mapping.translate('include_path=/code/shared:/code/app/lib'))
+
+    def test_translate_params(self):
+        self.assertEqual(
+            ['ssh', 'cd /var/www/app;', '/opt/vendor/bin/phpunit', '-d', 'include_path=/shared', 1],
+            self.mapping.translate_params(
+                ['ssh', 'cd {working_dir};', '/code/app/vendor/bin/phpunit', '-d', 'include_path=/code/shared', 1],
+                '/code/app'))
+
+    def test_translate_params_working_dir_is_the_remote_path_of_its_mapping(self):
+        self.assertEqual(
+            ['cd /var/www/app;', '/var/www/app/tests'],
+            self.mapping.translate_params(['cd {working_dir};', '/code/app/tests'], '/code/app/tests'))
+        self.assertEqual(['cd {working_dir};'], self.mapping.translate_params(['cd {working_dir};'], '/other'))
+
+    def test_get_path_mapping_is_cached(self):
+        self.assertIs(get_path_mapping({'/a': '/b'}), get_path_mapping({'/a': '/b'}))
+        self.assertIsNot(get_path_mapping({'/a': '/b'}), get_path_mapping({'/a': '/c'}))
+
+
+class TestResolvePathMapping(unittest.ViewTestCase):
+
+    def test_no_mappings(self):
+        self.view.settings().set('phpunit.docker_paths', {})
+        self.assertEqual(['/code/app'], resolve_path_mapping(self.view, 'docker_paths', ['/code/app']))
+
+    def test_multiple_mappings(self):
+        self.view.settings().set('phpunit.docker_paths', {'/code/app': '/app', '/code/lib': '/lib'})
+        self.assertEqual(
+            ['/app/vendor/bin/phpunit', '--bootstrap=/lib/bootstrap.php'],
+            resolve_path_mapping(
+                self.view,
+                'docker_paths',
+                ['/code/app/vendor/bin/phpunit', '--bootstrap=/code/lib/bootstrap.php']))
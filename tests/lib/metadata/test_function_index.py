@@ -0,0 +1,48 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from sublime import Region
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.metadata import FunctionIndex
+
+
+class TestFunctionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FunctionIndex(
+            [Region(10, 50), Region(20, 30), Region(60, 90), Region(100, 120), Region(130, 150)],
+            [Region(18, 22), Region(65, 70), Region(135, 140)])
+
+    def test_areas_without_a_function_name_are_not_indexed(self):
+        self.assertEqual(3, len(self.index))
+
+    def test_find(self):
+        self.assertIsNone(self.index.find(0))
+        self.assertEqual(Region(18, 22), self.index.find(10))
+        self.assertEqual(Region(18, 22), self.index.find(25))
+        self.assertEqual(Region(18, 22), self.index.find(50))
+        self.assertIsNone(self.index.find(55))
+        self.assertEqual(Region(65, 70), self.index.find(89))
+        self.assertIsNone(self.index.find(110))
+        self.assertEqual(Region(135, 140), self.index.find(150))
+        self.assertIsNone(self.index.find(151))
+
+    def test_empty(self):
+        self.assertIsNone(FunctionIndex([], []).find(0))
@@ -0,0 +1,97 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.metadata import PestIndex
+from PHPUnitKit.lib.metadata import get_pest_index
+
+
+class TestPestIndex(unittest.TestCase):
+
+    def test_empty(self):
+        index = PestIndex('<?php\n')
+        self.assertEqual(0, len(index))
+        self.assertIsNone(index.find(6))
+
+    def test_find(self):
+        text = "<?php\n\nit('fizz', function () {\n});\n\ntest(\"buzz\", function () {\n});\n"
+        index = PestIndex(text)
+
+        self.assertEqual(['fizz', 'buzz'], [test.name for test in index.tests])
+        self.assertIsNone(index.find(text.index('it(')))
+        self.assertEqual('fizz', index.find(text.index('{')).name)
+        self.assertEqual('fizz', index.find(text.index('test(')).name)
+        self.assertEqual('buzz', index.find(len(text)).name)
+
+    def test_describe(self):
+        text = (
+            "<?php\n"
+            "describe('sum', function () {\n"
+            "    it('adds', function () {\n"
+            "    });\n"
+            "    describe('negative', function () {\n"
+            "        it('subtracts', function () {\n"
+            "        });\n"
+            "    });\n"
+            "    it('carries', function () {\n"
+            "    });\n"
+            "});\n"
+            "it('top', function () {\n"
+            "});\n")
+        index = PestIndex(text)
+
+        self.assertEqual([
+            ('adds', ('sum',)),
+            ('subtracts', ('sum', 'negative')),
+            ('carries', ('sum',)),
+            ('top', ()),
+        ], [(test.name, test.describe) for test in index.tests])
+
+    def test_describe_does_not_depend_on_formatting(self):
+        text = (
+            "<?php\n"
+            "describe('sum', function () {\n"
+            "it('adds', function () {});\n"
+            "        describe('negative', fn () => it('subtracts', fn () => true));\n"
+            "  it('carries', function () {\n"
+            "  // it('is commented out', function () {});\n"
+            "  });\n"
+            "}); it('top', function () {});\n")
+        index = PestIndex(text)
+
+        self.assertEqual([
+            ('adds', ('sum',)),
+            ('subtracts', ('sum', 'negative')),
+            ('carries', ('sum',)),
+            ('top', ()),
+        ], [(test.name, test.describe) for test in index.tests])
+        self.assertEqual('subtracts', index.find(text.index('fn () => true')).name)
+
+
+class TestGetPestIndex(unittest.ViewTestCase):
+
+    def test_is_memoized_until_the_view_changes(self):
+        self.fixture("<?php\nit('fizz', function () {\n});\n")
+        index = get_pest_index(self.view)
+        self.assertIs(index, get_pest_index(self.view))
+        self.assertEqual(1, len(index))
+
+        self.view.run_command('append', {'characters': "it('buzz', function () {\n});\n"})
+        self.assertIsNot(index, get_pest_index(self.view))
+        self.assertEqual(2, len(get_pest_index(self.view)))
@@ -0,0 +1,76 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.metadata import get_php_metadata
+from PHPUnitKit.lib.metadata import stats
+
+
+class TestGetPhpMetadata(unittest.ViewTestCase):
+
+    def test_metadata(self):
+        self.fixture("""<?php
+namespace Fizz\\Buzz;
+
+use PHPUnit\\Framework\\Attributes\\DataProvider;
+use PHPUnit\\Framework\\Attributes\\Test;
+
+class FizzTest extends TestCase
+{
+    public function testFizz() {}
+
+    /**
+     * @test
+     * @dataProvider provideBuzz
+     */
+    public function buzz() {}
+
+    #[Test]
+    #[DataProvider('provideFizzBuzz')]
+    public function fizzBuzz() {}
+
+    public function provideBuzz() {}
+
+    public function provideFizzBuzz() {}
+
+    public function setUp(): void {}
+}
+""")
+        metadata = get_php_metadata(self.view)
+
+        self.assertEqual('Fizz\\Buzz', metadata.namespace)
+        self.assertEqual(['FizzTest'], metadata.class_names())
+        self.assertTrue(metadata.has_test_class())
+
+    def test_no_test_class(self):
+        self.fixture("<?php\nclass Fizz {}\n")
+        metadata = get_php_metadata(self.view)
+
+        self.assertIsNone(metadata.namespace)
+        self.assertEqual(['Fizz'], metadata.class_names())
+        self.assertFalse(metadata.has_test_class())
+
+    def test_is_memoized_until_the_view_changes(self):
+        self.fixture("<?php\nclass FizzTest {}\n")
+        metadata = get_php_metadata(self.view)
+        self.assertIs(metadata, get_php_metadata(self.view))
+        self.assertIn('1 hits', stats())
+
+        self.view.run_command('append', {'characters': "class BuzzTest {}\n"})
+        self.assertEqual(['FizzTest', 'BuzzTest'], get_php_metadata(self.view).class_names())
@@ -0,0 +1,142 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.panel import PanelWriter
+
+
+def _lines(start: int, stop: int) -> str:
+    return ''.join('{}\n'.format(i) for i in range(start, stop))
+
+
+class FakePanel():
+
+    def __init__(self):
+        self.text = ''
+        self.folds = []  # type: list
+
+    def size(self) -> int:
+        return len(self.text)
+
+    def run_command(self, command: str, args: dict) -> None:
+        if command == 'append':
+            self.text += args['characters']
+
+    def fold(self, region) -> None:
+        # Like Sublime Text, a fold replaces the folds it overlaps.
+        self.folds = [f for f in self.folds if f.end() < region.begin() or f.begin() > region.end()]
+        self.folds.append(region)
+
+    def folded_text(self) -> list:
+        return [self.text[f.begin():f.end()] for f in self.folds]
+
+
+@unittest.mock.patch('PHPUnitKit.lib.panel.set_timeout')
+class TestPanelWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.view = FakePanel()
+
+    def output(self) -> str:
+        return self.view.text
+
+    def flush(self, set_timeout) -> None:
+        for call in set_timeout.call_args_list:
+            call[0][0]()
+        set_timeout.reset_mock()
+
+    def test_writes_are_coalesced(self, set_timeout):
+        writer = PanelWriter(self.view)
+        writer.write('a\n')
+        writer.write('b\n')
+        writer.write('c\n')
+
+        self.assertEqual(1, set_timeout.call_count)
+        self.flush(set_timeout)
+
+        self.assertEqual(1, writer.flushes)
+        self.assertEqual('a\nb\nc\n', self.output())
+
+    def test_flushes_are_throttled(self, set_timeout):
+        writer = PanelWriter(self.view, frame_interval=10)
+        writer.write('a\n')
+        self.assertEqual(0, set_timeout.call_args[0][1])
+        self.flush(set_timeout)
+
+        writer.write('b\n')
+        self.assertGreater(set_timeout.call_args[0][1], 9000)
+
+    def test_max_lines_folds_the_middle(self, set_timeout):
+        writer = PanelWriter(self.view, max_lines=10)
+        writer.write(_lines(0, 3))
+        writer.write(_lines(3, 50))
+        writer.write(_lines(50, 100))
+        self.flush(set_timeout)
+
+        self.assertEqual(_lines(0, 100), self.output())
+        self.assertEqual([_lines(5, 95)], self.view.folded_text())
+
+        writer.write('summary\n')
+        writer.close()
+        writer.write('ignored\n')
+        self.flush(set_timeout)
+
+        self.assertEqual(91, writer.elided)
+        self.assertEqual(_lines(0, 100) + 'summary\n', self.output())
+        self.assertEqual([_lines(5, 96)], self.view.folded_text())
+
+    def test_max_lines_shows_a_rolling_tail(self, set_timeout):
+        writer = PanelWriter(self.view, max_lines=10)
+        writer.write(_lines(0, 8))
+        self.flush(set_timeout)
+
+        self.assertEqual(_lines(0, 8), self.output())
+        self.assertEqual([], self.view.folded_text())
+
+        writer.write(_lines(8, 12))
+        self.flush(set_timeout)
+
+        self.assertEqual([_lines(5, 7)], self.view.folded_text())
+
+        writer.write(_lines(12, 14))
+        self.flush(set_timeout)
+
+        self.assertEqual(_lines(0, 14), self.output())
+        self.assertEqual([_lines(5, 9)], self.view.folded_text())
+
+    def test_max_lines_counts_lines_split_across_writes(self, set_timeout):
+        self.view.text = 'cmd\n'
+        writer = PanelWriter(self.view, max_lines=4)
+        writer.write('0\n1')
+        writer.write('\n2\n3')
+        writer.write('\n4\n5\n')
+        self.flush(set_timeout)
+
+        self.assertEqual('cmd\n' + _lines(0, 6), self.output())
+        self.assertEqual([_lines(2, 4)], self.view.folded_text())
+
+    def test_max_lines_not_reached(self, set_timeout):
+        writer = PanelWriter(self.view, max_lines=10)
+        writer.write(_lines(0, 8))
+        writer.close()
+        self.flush(set_timeout)
+
+        self.assertEqual(0, writer.elided)
+        self.assertEqual(_lines(0, 8), self.output())
+        self.assertEqual([], self.view.folded_text())
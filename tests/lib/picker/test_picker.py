@@ -0,0 +1,58 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.picker import PickedTest
+from PHPUnitKit.lib.picker import build_pick_filter_option
+from PHPUnitKit.lib.picker import get_picker_items
+
+
+class TestBuildPickFilterOption(unittest.TestCase):
+
+    def test_classes(self):
+        expected = '^(App\\\\FooTest::testFoo|App\\\\BarTest::testBar)( with data set .+)?$'
+        self.assertEqual(expected, build_pick_filter_option([
+            PickedTest('/app/phpunit.xml', '/app/tests/FooTest.php', 'App\\FooTest', 'testFoo', 3),
+            PickedTest('/app/phpunit.xml', '/app/tests/BarTest.php', 'App\\BarTest', 'testBar', 5),
+        ]))
+
+    def test_pest(self):
+        self.assertEqual('(does\\ a|adds)', build_pick_filter_option([
+            PickedTest('/app/phpunit.xml', '/app/tests/FooTest.php', None, 'does a', 3),
+            PickedTest('/app/phpunit.xml', '/app/tests/FooTest.php', None, 'adds', 5),
+        ]))
+
+
+class TestGetPickerItems(unittest.TestCase):
+
+    @unittest.mock.patch('PHPUnitKit.lib.picker.get_test_index')
+    def test_items_are_cached_until_the_index_changes(self, get_test_index):
+        index = get_test_index.return_value
+        index.configuration_file = '/app/phpunit.xml'
+        index.generation = 1
+        index.tests.return_value = [('/app/tests/FooTest.php', 'App\\FooTest', 'testFoo', 3)]
+
+        tests, items = get_picker_items(['/app/phpunit.xml'])
+        self.assertEqual([['FooTest::testFoo', 'tests/FooTest.php:3']], items)
+        self.assertIs(items, get_picker_items(['/app/phpunit.xml'])[1])
+        self.assertEqual(1, index.tests.call_count)
+
+        index.generation = 2
+        self.assertIsNot(items, get_picker_items(['/app/phpunit.xml'])[1])
+        self.assertEqual(2, index.tests.call_count)
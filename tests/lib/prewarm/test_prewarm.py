@@ -0,0 +1,54 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.prewarm import prewarm
+
+
+class TestPrewarm(unittest.ViewTestCase):
+
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.update_test_index_async')
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.strategy._get_color_scheme')
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.get_phpunit_executable')
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.get_php_executable')
+    @unittest.mock.patch('sublime.Window.folders')
+    def test_resolves_executables_for_each_working_dir(self, folders, php, phpunit, color_scheme, test_index):
+        folders.return_value = [unittest.fixtures_path('common_prefix_parent', 'has_phpunit_xml')]
+
+        prewarm(self.view.window())
+
+        working_dir = unittest.fixtures_path('common_prefix_parent', 'has_phpunit_xml')
+        php.assert_called_once_with(self.view, working_dir)
+        phpunit.assert_called_once_with(self.view, working_dir)
+        color_scheme.assert_called_once_with(self.view)
+        test_index.assert_called_once_with(os.path.join(working_dir, 'phpunit.xml'))
+
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.update_test_index_async')
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.strategy._get_color_scheme')
+    @unittest.mock.patch('PHPUnitKit.lib.prewarm.get_phpunit_executable')
+    @unittest.mock.patch('sublime.Window.folders')
+    def test_executable_errors_are_ignored(self, folders, phpunit, color_scheme, test_index):
+        folders.return_value = [unittest.fixtures_path('common_prefix_parent', 'has_phpunit_xml')]
+        phpunit.side_effect = ValueError('phpunit not found')
+
+        prewarm(self.view.window())
+
+        color_scheme.assert_called_once_with(self.view)
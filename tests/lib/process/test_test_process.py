@@ -0,0 +1,173 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.process import ProcessListener
+from PHPUnitKit.lib.process import TestProcess
+from PHPUnitKit.lib.process import get_processes
+from PHPUnitKit.lib.process import kill_process
+from PHPUnitKit.lib.process import start_process
+
+
+class RecordingListener(ProcessListener):
+
+    def __init__(self):
+        self.events = []  # type: list
+        self.lines = []  # type: list
+
+    def on_spawned(self, process):
+        self.events.append('spawned')
+
+    def on_first_byte(self, process):
+        self.events.append('first_byte')
+
+    def on_lines(self, process, lines):
+        self.lines.extend(lines)
+
+    def on_exit(self, process, returncode):
+        self.events.append(('exit', returncode))
+
+
+@unittest.skipIf(os.name == 'nt', 'requires a POSIX shell')
+class TestTestProcess(unittest.TestCase):
+
+    def run_process(self, cmd: list, env=None) -> tuple:
+        listener = RecordingListener()
+        process = TestProcess(cmd, env or {}, os.getcwd(), listener)
+        process.start()
+        process.wait(10)
+
+        return process, listener
+
+    def test_lifecycle_events(self):
+        process, listener = self.run_process(['sh', '-c', 'printf "a\\r\\nb\\nc"; exit 3'])
+
+        self.assertEqual(['spawned', 'first_byte', ('exit', 3)], listener.events)
+        self.assertEqual(['a', 'b', 'c'], listener.lines)
+        self.assertIsNotNone(process.first_byte_time)
+        self.assertGreaterEqual(process.elapsed(), 0)
+
+    def test_carriage_returns_are_line_breaks(self):
+        _, listener = self.run_process(['sh', '-c', 'printf "1/3\\r2/3\\r"; sleep 0.1; printf "\\n3/3\\r\\nok\\r"'])
+
+        self.assertEqual(['1/3', '2/3', '3/3', 'ok'], listener.lines)
+
+    def test_no_output(self):
+        _, listener = self.run_process(['sh', '-c', 'exit 0'])
+
+        self.assertEqual(['spawned', ('exit', 0)], listener.events)
+        self.assertEqual([], listener.lines)
+
+    def test_stderr_is_merged(self):
+        _, listener = self.run_process(['sh', '-c', 'echo out; echo err 1>&2'])
+
+        self.assertEqual(['out', 'err'], sorted(listener.lines, reverse=True))
+
+    def test_env(self):
+        _, listener = self.run_process(['sh', '-c', 'echo $PHPUNITKIT_TEST'], {'PHPUNITKIT_TEST': 'fizz'})
+
+        self.assertEqual(['fizz'], listener.lines)
+
+    def test_many_lines(self):
+        _, listener = self.run_process(['sh', '-c', 'i=0; while [ $i -lt 5000 ]; do echo line $i; i=$((i+1)); done'])
+
+        self.assertEqual(5000, len(listener.lines))
+        self.assertEqual('line 4999', listener.lines[-1])
+
+    def test_kill(self):
+        listener = RecordingListener()
+        process = TestProcess(['sh', '-c', 'sleep 10'], {}, os.getcwd(), listener)
+        process.start()
+        self.assertTrue(process.poll())
+
+        process.kill()
+        process.wait(10)
+
+        self.assertTrue(process.killed)
+        self.assertFalse(process.poll())
+        self.assertEqual('exit', listener.events[-1][0])
+
+    def test_command_not_found(self):
+        _, listener = self.run_process(['phpunitkit-command-not-found'])
+
+        self.assertEqual([('exit', None)], listener.events)
+        self.assertEqual(1, len(listener.lines))
+
+
+@unittest.skipIf(os.name == 'nt', 'requires a POSIX shell')
+class TestStartProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.window = unittest.mock.Mock()
+        self.window.id.return_value = -1
+
+    def tearDown(self):
+        kill_process(self.window)
+
+    @unittest.mock.patch('PHPUnitKit.lib.process._MAX_RUNNING', 2)
+    def test_runs_in_different_working_dirs_are_concurrent(self):
+        a = start_process(self.window, ['sh', '-c', 'sleep 10'], {}, '/', RecordingListener())
+        b = start_process(self.window, ['sh', '-c', 'sleep 10'], {}, '/tmp', RecordingListener())
+
+        self.assertTrue(a.poll())
+        self.assertTrue(b.poll())
+        self.assertEqual([('/', a), ('/tmp', b)], get_processes(self.window))
+
+        kill_process(self.window, '/')
+        a.wait(10)
+
+        self.assertTrue(a.killed)
+        self.assertTrue(b.poll())
+        self.assertEqual([('/tmp', b)], get_processes(self.window))
+
+    def test_run_in_same_working_dir_replaces_the_running_one(self):
+        a = start_process(self.window, ['sh', '-c', 'sleep 10'], {}, '/', RecordingListener())
+        b = start_process(self.window, ['sh', '-c', 'sleep 10'], {}, '/', RecordingListener())
+        a.wait(10)
+
+        self.assertTrue(a.killed)
+        self.assertTrue(b.poll())
+        self.assertEqual([('/', b)], get_processes(self.window))
+
+    @unittest.mock.patch('PHPUnitKit.lib.process._MAX_RUNNING', 1)
+    def test_runs_beyond_the_maximum_are_queued(self):
+        a = start_process(self.window, ['sh', '-c', 'echo a'], {}, '/', RecordingListener())
+        listener = RecordingListener()
+        b = start_process(self.window, ['sh', '-c', 'echo b'], {}, '/tmp', listener)
+
+        a.wait(10)
+        b.wait(10)
+
+        self.assertFalse(b.queued)
+        self.assertEqual(['b'], listener.lines)
+        self.assertEqual([], get_processes(self.window))
+
+    @unittest.mock.patch('PHPUnitKit.lib.process._MAX_RUNNING', 1)
+    def test_queued_runs_can_be_killed(self):
+        start_process(self.window, ['sh', '-c', 'sleep 10'], {}, '/', RecordingListener())
+        listener = RecordingListener()
+        b = start_process(self.window, ['sh', '-c', 'echo b'], {}, '/tmp', listener)
+        self.assertTrue(b.queued)
+
+        kill_process(self.window)
+
+        self.assertTrue(b.killed)
+        self.assertEqual([('exit', None)], listener.events)
@@ -0,0 +1,195 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.results import JUnitParser
+from PHPUnitKit.lib.results import TeamCityParser
+from PHPUnitKit.lib.results import TestResults
+from PHPUnitKit.lib.results import build_failures_filter_option
+from PHPUnitKit.lib.results import create_results_log
+
+
+_TEAMCITY = """PHPUnit 10.5.0 by Sebastian Bergmann and contributors.
+##teamcity[testCount count='4' flowId='1']
+##teamcity[testSuiteStarted name='App\\FooTest' locationHint='php_qn:///app/tests/FooTest.php::\\App\\FooTest' flowId='1']
+##teamcity[testStarted name='testOk' locationHint='php_qn:///app/tests/FooTest.php::\\App\\FooTest::testOk' flowId='1']
+##teamcity[testFinished name='testOk' duration='12' flowId='1']
+##teamcity[testStarted name='testFail' locationHint='php_qn:///app/tests/FooTest.php::\\App\\FooTest::testFail' flowId='1']
+##teamcity[testFailed name='testFail' message='Failed asserting that |'a|' is |'b|'.' details='/app/src/Foo.php:7|n/app/tests/FooTest.php:21|n' duration='3' flowId='1']
+##teamcity[testFinished name='testFail' duration='3' flowId='1']
+##teamcity[testStarted name='testData with data set #1' locationHint='php_qn:///app/tests/FooTest.php::\\App\\FooTest::testData with data set #1' flowId='1']
+##teamcity[testFailed name='testData with data set #1' message='x' details='/app/tests/FooTest.php:30|n' duration='0' flowId='1']
+##teamcity[testFinished name='testData with data set #1' duration='0' flowId='1']
+##teamcity[testStarted name='testSkip' locationHint='php_qn:///app/tests/FooTest.php::\\App\\FooTest::testSkip' flowId='1']
+##teamcity[testIgnored name='testSkip' message='skipped' details='' duration='0' flowId='1']
+##teamcity[testFinished name='testSkip' duration='0' flowId='1']
+##teamcity[testSuiteFinished name='App\\FooTest' flowId='1']
+"""  # noqa: E501
+
+
+_JUNIT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="App\\FooTest" file="/app/tests/FooTest.php" tests="3">
+    <testcase name="testOk" file="/app/tests/FooTest.php" line="10" class="App\\FooTest" time="0.5"/>
+    <testcase name="testFail" file="/app/tests/FooTest.php" line="20" class="App\\FooTest" time="0.25">
+      <failure type="PHPUnit\\Framework\\ExpectationFailedException">App\\FooTest::testFail
+Failed asserting that false is true.
+
+/app/tests/FooTest.php:21</failure>
+    </testcase>
+    <testcase name="testError" file="/app/tests/FooTest.php" line="30" class="App\\FooTest" time="0">
+      <error type="Exception">App\\FooTest::testError
+Exception: boom
+
+/app/tests/FooTest.php:31</error>
+    </testcase>
+    <testcase name="testSkip" file="/app/tests/FooTest.php" line="40" class="App\\FooTest" time="0">
+      <skipped/>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+class TestTeamCityParser(unittest.TestCase):
+
+    def test_parse(self):
+        results = TestResults('/app')
+        parser = TeamCityParser(results)
+        parser.feed(_TEAMCITY)
+        parser.close()
+
+        self.assertEqual({'passed': 1, 'failed': 2, 'error': 0, 'skipped': 1}, results.counts)
+        self.assertEqual('4 tests, 2 failed, 1 skipped', results.summary())
+
+        failures = results.failures()
+        self.assertEqual(2, len(failures))
+        self.assertEqual('App\\FooTest::testFail', failures[0].id)
+        self.assertEqual('failed', failures[0].status)
+        self.assertEqual(0.003, failures[0].duration)
+        self.assertEqual('Failed asserting that \'a\' is \'b\'.', failures[0].message)
+        self.assertEqual(('/app/tests/FooTest.php', 21), (failures[0].file, failures[0].line))
+        self.assertEqual('App\\FooTest::testData with data set #1', failures[1].id)
+        self.assertEqual(30, failures[1].line)
+        self.assertAlmostEqual(0.015, results.file_durations['/app/tests/FooTest.php'])
+
+    def test_parse_in_chunks(self):
+        results = TestResults('/app')
+        parser = TeamCityParser(results)
+        for i in range(0, len(_TEAMCITY), 7):
+            parser.feed(_TEAMCITY[i:i + 7])
+
+        self.assertEqual(4, results.total())
+        self.assertEqual(2, len(results.failures()))
+
+    def test_relative_pest_location(self):
+        results = TestResults('/app')
+        parser = TeamCityParser(results)
+        parser.feed(
+            "##teamcity[testStarted name='it works' locationHint='pest_qn://tests/Unit/ExampleTest.php::it works']\n"
+            "##teamcity[testFailed name='it works' message='nope' details='at tests/Unit/ExampleTest.php:5']\n"
+            "##teamcity[testFinished name='it works' duration='1']\n")
+
+        failure = results.failures()[0]
+        self.assertEqual('it works', failure.id)
+        self.assertEqual(os.path.join('/app', 'tests/Unit/ExampleTest.php'), failure.file)
+
+    def test_next_failure(self):
+        results = TestResults('/app')
+        self.assertIsNone(results.next_failure())
+
+        parser = TeamCityParser(results)
+        parser.feed(_TEAMCITY)
+
+        self.assertEqual(21, results.next_failure().line)
+        self.assertEqual(30, results.next_failure().line)
+        self.assertEqual(21, results.next_failure().line)
+        self.assertEqual(30, results.next_failure(-1).line)
+
+
+class TestJUnitParser(unittest.TestCase):
+
+    def test_parse_in_chunks(self):
+        results = TestResults('/app')
+        parser = JUnitParser(results)
+        data = _JUNIT.encode('utf-8')
+        for i in range(0, len(data), 11):
+            parser.feed(data[i:i + 11])
+        parser.close()
+
+        self.assertEqual({'passed': 1, 'failed': 1, 'error': 1, 'skipped': 1}, results.counts)
+
+        failures = results.failures()
+        self.assertEqual('App\\FooTest::testFail', failures[0].id)
+        self.assertEqual('failed', failures[0].status)
+        self.assertEqual(0.25, failures[0].duration)
+        self.assertEqual(('/app/tests/FooTest.php', 21), (failures[0].file, failures[0].line))
+        self.assertEqual('error', failures[1].status)
+        self.assertEqual(31, failures[1].line)
+        self.assertEqual(0.75, results.file_durations['/app/tests/FooTest.php'])
+
+
+class TestResultsLog(unittest.TestCase):
+
+    def test_reads_log_incrementally_and_removes_it(self):
+        log = create_results_log('teamcity', tempfile.gettempdir(), {})
+        self.assertEqual(['log-teamcity'], list(log.options().keys()))
+
+        log.poll()
+        lines = _TEAMCITY.splitlines(True)
+        with open(log.path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:5])
+            f.flush()
+            log.poll()
+            self.assertEqual(1, log.results.total())
+
+            f.writelines(lines[5:])
+
+        log.close()
+
+        self.assertTrue(log.results.finished)
+        self.assertEqual(4, log.results.total())
+        self.assertFalse(os.path.exists(log.path))
+
+    def test_configured_log_is_kept(self):
+        log = create_results_log('junit', '/app', {'log-junit': 'build/junit.xml'})
+
+        self.assertEqual('/app/build/junit.xml', log.path)
+        self.assertEqual({}, log.options())
+        self.assertFalse(log.owned)
+
+
+class TestBuildFailuresFilterOption(unittest.TestCase):
+
+    def test_phpunit(self):
+        results = TestResults('/app')
+        TeamCityParser(results).feed(_TEAMCITY)
+
+        self.assertEqual(
+            '^(App\\\\FooTest::testFail|App\\\\FooTest::testData)( with data set .+)?$',
+            build_failures_filter_option(results.failures()))
+
+    def test_pest(self):
+        results = TestResults('/app')
+        results.add('it works', 'failed')
+        results.add('it fails', 'failed')
+
+        self.assertEqual('(it\\ works|it\\ fails)', build_failures_filter_option(results.failures()))
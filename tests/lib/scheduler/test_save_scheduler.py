@@ -0,0 +1,119 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.scheduler import SaveScheduler
+
+
+@unittest.mock.patch('PHPUnitKit.lib.scheduler.get_test_index')
+@unittest.mock.patch('PHPUnitKit.lib.scheduler.set_timeout')
+class TestSaveScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.run = unittest.mock.Mock()
+        self.scheduler = SaveScheduler(unittest.mock.Mock(), run=self.run)
+
+    def fire(self, set_timeout) -> None:
+        # Only fire the callbacks scheduled so far: firing them can schedule
+        # more, such as the poll for the exit of a run that others wait for.
+        for call in list(set_timeout.call_args_list):
+            call[0][0]()
+
+    def test_saves_are_debounced(self, set_timeout, get_test_index):
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/FooTest.php', 100)
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/FooTest.php', 100)
+
+        self.assertEqual(100, set_timeout.call_args[0][1])
+        self.fire(set_timeout)
+
+        self.run.assert_called_once_with(working_dir='/app', file='/app/tests/FooTest.php', options={})
+        self.assertEqual(1, self.scheduler.runs)
+
+    def test_saved_files_are_run_together(self, set_timeout, get_test_index):
+        get_test_index.return_value.classes.side_effect = lambda file: {
+            '/app/tests/Unit/FooTest.php': ['App\\FooTest'],
+            '/app/tests/Unit/Bar/BarTest.php': ['App\\Bar\\BarTest'],
+        }[file]
+
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/FooTest.php')
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/Bar/BarTest.php')
+        self.fire(set_timeout)
+
+        self.run.assert_called_once_with(
+            working_dir='/app',
+            file='/app/tests/Unit',
+            options={'filter': '^(App\\\\FooTest|App\\\\Bar\\\\BarTest)::'})
+
+    def test_files_that_are_not_indexed_are_run_one_at_a_time(self, set_timeout, get_test_index):
+        get_test_index.return_value.classes.side_effect = lambda file: {
+            '/app/tests/Unit/FooTest.php': ['App\\FooTest'],
+            '/app/tests/Unit/BarTest.php': ['App\\BarTest'],
+        }.get(file, [])
+        process = unittest.mock.Mock(killed=False, exit_time=None)
+        self.run.return_value = process
+
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/FooTest.php')
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/BarTest.php')
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/PestTest.php')
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Feature/PestTest.php')
+        self.fire(set_timeout)
+
+        self.run.assert_called_once_with(
+            working_dir='/app',
+            file='/app/tests/Unit',
+            options={'filter': '^(App\\\\FooTest|App\\\\BarTest)::'})
+
+        poll = set_timeout.call_args[0][0]
+        set_timeout.reset_mock()
+        poll()
+        self.assertEqual(1, self.run.call_count)
+
+        process.exit_time = 1.0
+        set_timeout.call_args[0][0]()
+        self.assertEqual(unittest.mock.call(
+            working_dir='/app', file='/app/tests/Unit/PestTest.php', options={}), self.run.call_args)
+
+        set_timeout.reset_mock()
+        process.killed = True
+        poll()
+        self.assertEqual(2, self.run.call_count)
+        set_timeout.assert_not_called()
+
+    def test_next_run_is_started_when_a_run_cannot_be_started(self, set_timeout, get_test_index):
+        get_test_index.return_value.classes.return_value = []
+        self.run.return_value = None
+
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/FooTest.php')
+        self.scheduler.add('/app/phpunit.xml', '/app/tests/Unit/BarTest.php')
+        self.fire(set_timeout)
+
+        self.assertEqual([
+            unittest.mock.call(working_dir='/app', file='/app/tests/Unit/FooTest.php', options={}),
+            unittest.mock.call(working_dir='/app', file='/app/tests/Unit/BarTest.php', options={}),
+        ], self.run.call_args_list)
+        self.assertEqual(2, self.scheduler.runs)
+
+    def test_one_run_per_working_directory(self, set_timeout, get_test_index):
+        self.scheduler.add('/a/phpunit.xml', '/a/tests/FooTest.php')
+        self.scheduler.add('/b/phpunit.xml', '/b/tests/BarTest.php')
+        self.fire(set_timeout)
+
+        self.assertEqual([
+            unittest.mock.call(working_dir='/a', file='/a/tests/FooTest.php', options={}),
+            unittest.mock.call(working_dir='/b', file='/b/tests/BarTest.php', options={}),
+        ], self.run.call_args_list)
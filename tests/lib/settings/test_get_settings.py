@@ -0,0 +1,60 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.settings import forget_settings
+from PHPUnitKit.lib.settings import get_settings
+from PHPUnitKit.lib.settings import is_any_debug
+from PHPUnitKit.lib.utils import get_setting
+
+
+class TestGetSettings(unittest.ViewTestCase):
+
+    def test_snapshot_is_reused(self):
+        self.assertIs(get_settings(self.view), get_settings(self.view))
+
+    def test_snapshot_is_refreshed_when_settings_change(self):
+        self.view.settings().set('phpunit.strategy', 'kitty')
+        snapshot = get_settings(self.view)
+        self.assertEqual('kitty', snapshot.get('strategy'))
+
+        self.view.settings().set('phpunit.strategy', 'xterm')
+        self.assertIsNot(snapshot, get_settings(self.view))
+        self.assertEqual('xterm', get_settings(self.view).get('strategy'))
+        self.assertEqual('kitty', snapshot.get('strategy'))
+
+    def test_fingerprint_changes_when_settings_change(self):
+        fingerprint = get_settings(self.view).fingerprint
+        self.assertEqual(fingerprint, get_settings(self.view).fingerprint)
+        self.view.settings().set('phpunit.ssh', not get_setting(self.view, 'ssh'))
+        self.assertNotEqual(fingerprint, get_settings(self.view).fingerprint)
+
+    def test_forget_settings(self):
+        snapshot = get_settings(self.view)
+        forget_settings(self.view)
+        self.assertIsNot(snapshot, get_settings(self.view))
+
+    def test_is_any_debug(self):
+        self.view.settings().set('phpunit.debug', True)
+        get_settings(self.view)
+        self.assertTrue(is_any_debug())
+
+    def test_get_setting_not_in_snapshot(self):
+        self.view.settings().set('phpunit.foobar', 'fizz')
+        self.assertEqual('fizz', get_setting(self.view, 'foobar'))
@@ -0,0 +1,74 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.shards import get_shard_count
+from PHPUnitKit.lib.shards import load_durations
+from PHPUnitKit.lib.shards import plan_shards
+from PHPUnitKit.lib.shards import record_durations
+
+
+class TestPlanShards(unittest.TestCase):
+
+    def test_longest_processing_time_first(self):
+        durations = {'a': 7.0, 'b': 5.0, 'c': 4.0, 'd': 3.0, 'e': 2.0, 'f': 2.0}
+
+        self.assertEqual([
+            (9.0, ['a', 'f']),
+            (7.0, ['b', 'e']),
+            (7.0, ['c', 'd']),
+        ], plan_shards(sorted(durations), durations, 3))
+
+    def test_files_without_durations_are_estimated_at_the_mean(self):
+        shards = plan_shards(['a', 'b', 'c'], {'a': 4.0, 'b': 2.0}, 2)
+
+        self.assertEqual([(4.0, ['a']), (5.0, ['b', 'c'])], shards)
+
+    def test_no_durations(self):
+        self.assertEqual([(2.0, ['a', 'c']), (1.0, ['b'])], plan_shards(['a', 'b', 'c'], {}, 2))
+
+    def test_never_more_shards_than_files(self):
+        self.assertEqual([(1.0, ['a'])], plan_shards(['a'], {}, 8))
+
+
+class TestDurations(unittest.TestCase):
+
+    def test_record_and_load(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with unittest.mock.patch('PHPUnitKit.lib.shards.cache_path', return_value=cache_dir):
+                record_durations('/app', {'/app/tests/FooTest.php': 2.0})
+                record_durations('/app', {'/app/tests/FooTest.php': 4.0, '/app/tests/BarTest.php': 1.0})
+
+                self.assertEqual({'/app/tests/FooTest.php': 3.0, '/app/tests/BarTest.php': 1.0}, load_durations('/app'))
+
+            with unittest.mock.patch('PHPUnitKit.lib.shards._durations', {}):
+                with unittest.mock.patch('PHPUnitKit.lib.shards.cache_path', return_value=cache_dir):
+                    self.assertEqual(3.0, load_durations('/app')['/app/tests/FooTest.php'])
+
+
+class TestGetShardCount(unittest.TestCase):
+
+    def test_count(self):
+        self.assertEqual(3, get_shard_count(3))
+
+    @unittest.mock.patch('PHPUnitKit.lib.shards.os.cpu_count', return_value=6)
+    def test_defaults_to_cpu_count(self, cpu_count):
+        self.assertEqual(6, get_shard_count(0))
+        self.assertEqual(6, get_shard_count(None))
@@ -0,0 +1,140 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.ssh import SshMaster
+
+
+# A stand-in for ssh and the sshd it connects to. A master "connection" is the
+# control socket file, which is created when a master is started, checked by
+# "-O check" and removed by "-O exit". Every invocation is logged.
+_FAKE_SSH = r'''#!/bin/sh
+echo "$*" >> "$(dirname "$0")/log"
+control_path=
+master=
+command=
+while [ $# -gt 1 ]; do
+    case "$1" in
+        -o)
+            case "$2" in
+                ControlPath=*) control_path="${2#ControlPath=}" ;;
+                ControlMaster=yes) master=yes ;;
+            esac
+            shift ;;
+        -O) command="$2"; shift ;;
+    esac
+    shift
+done
+[ "$1" = "vagrant@homestead.test" ] || exit 255
+case "$command" in
+    check) [ -e "$control_path" ] ;;
+    exit) rm -f "$control_path" ;;
+    *) [ "$master" = yes ] && touch "$control_path" ;;
+esac
+'''
+
+
+@unittest.skipIf(os.name == 'nt', 'ssh connection multiplexing is not supported on Windows')
+class TestSshMaster(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.ssh = os.path.join(self.tmp, 'ssh')
+        with open(self.ssh, 'w') as f:
+            f.write(_FAKE_SSH)
+        os.chmod(self.ssh, 0o755)
+        self.control_path = os.path.join(self.tmp, 'sockets', 'master')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def master(self, destination='vagrant@homestead.test'):
+        return SshMaster(destination, ['-p', '22'], self.control_path, ssh=self.ssh)
+
+    def log(self) -> list:
+        with open(os.path.join(self.tmp, 'log')) as f:
+            return f.read().splitlines()
+
+    def test_options(self):
+        self.assertEqual([
+            '-o', 'ControlMaster=no', '-o', 'ControlPath=' + self.control_path
+        ], self.master().options())
+
+    def test_starts_on_first_use(self):
+        master = self.master()
+        self.assertFalse(master.is_alive())
+        self.assertTrue(master.ensure())
+        self.assertTrue(master.is_alive())
+        self.assertEqual(1, master.starts)
+        self.assertIn(
+            '-p 22 -o BatchMode=yes -o ControlMaster=yes -o ControlPath={} -o ControlPersist=600 -f -N '
+            'vagrant@homestead.test'.format(self.control_path), self.log())
+
+    def test_is_health_checked_and_reused(self):
+        master = self.master()
+        master.ensure()
+        master.ensure()
+        master.ensure()
+        self.assertEqual(1, master.starts)
+        self.assertEqual(2, self.log().count(
+            '-p 22 -o ControlPath={} -O check vagrant@homestead.test'.format(self.control_path)))
+
+    def test_restarts_when_the_connection_is_gone(self):
+        master = self.master()
+        master.ensure()
+        os.remove(self.control_path)
+        self.assertTrue(master.ensure())
+        self.assertEqual(2, master.starts)
+
+    def test_stop(self):
+        master = self.master()
+        master.ensure()
+        master.stop()
+        self.assertFalse(os.path.exists(self.control_path))
+        self.assertIn('-p 22 -o ControlPath={} -O exit vagrant@homestead.test'.format(self.control_path), self.log())
+
+    def test_stop_when_not_started(self):
+        master = self.master()
+        master.stop()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'log')))
+
+    def test_connection_failure(self):
+        master = self.master('vagrant@unreachable.test')
+        self.assertFalse(master.ensure())
+        self.assertFalse(master.is_alive())
+
+    def test_is_not_restarted_until_the_retry_delay_after_a_failure(self):
+        master = self.master('vagrant@unreachable.test')
+        self.assertFalse(master.ensure())
+        self.assertFalse(master.ensure())
+        self.assertEqual(1, master.starts)
+        self.assertTrue(master.is_retry_delayed())
+
+        with unittest.mock.patch('PHPUnitKit.lib.ssh._RETRY_DELAY', 0):
+            self.assertFalse(master.is_retry_delayed())
+            self.assertFalse(master.ensure())
+            self.assertEqual(2, master.starts)
+
+    def test_missing_ssh_executable(self):
+        master = SshMaster('vagrant@homestead.test', [], self.control_path, ssh=os.path.join(self.tmp, 'missing'))
+        self.assertFalse(master.ensure())
@@ -19,43 +19,48 @@ import sublime
 
 from PHPUnitKit.tests import unittest
 
-from PHPUnitKit.lib.strategy import _create_exec_output_panel
+from PHPUnitKit.lib.strategy import _create_output_panel
 
 
-class TestCreateExecOutputPanel(unittest.ViewTestCase):
+class TestCreateOutputPanel(unittest.ViewTestCase):
 
     def setUp(self):
         super().setUp()
-        self.view.window().destroy_output_panel('exec')  # type: ignore[union-attr]
+        self.view.window().destroy_output_panel('phpunit')  # type: ignore[union-attr]
 
-    def getExecOutputPanel(self):
-        return self.view.window().find_output_panel('exec')  # type: ignore[union-attr]
+    def getOutputPanel(self):
+        return self.view.window().find_output_panel('phpunit')  # type: ignore[union-attr]
 
-    def getExecOutputPanelContent(self) -> str:
-        view = self.view.window().find_output_panel('exec')  # type: ignore[union-attr]
+    def getOutputPanelContent(self) -> str:
+        view = self.view.window().find_output_panel('phpunit')  # type: ignore[union-attr]
 
         return view.substr(sublime.Region(0, view.size()))  # type: ignore[union-attr]
 
-    def test_basic_exec_output_panel(self):
+    def test_basic_output_panel(self):
         font_size = self.view.settings().get('font_size')
         color_scheme = self.view.settings().get('color_scheme')
-        self.assertIsNone(_create_exec_output_panel(self.view, {
-            'envx': 'envy'}, 'thecmd'))  # type: ignore[func-returns-value]
-        view = self.getExecOutputPanel()
-        self.assertEqual('', self.getExecOutputPanelContent())
+        panel = _create_output_panel(self.view, {'envx': 'envy'}, 'thecmd')
+        view = self.getOutputPanel()
+        self.assertEqual(panel.id(), view.id())  # type: ignore[union-attr]
+        self.assertEqual('', self.getOutputPanelContent())
         self.assertFalse(view.settings().get('highlight_line'))
         self.assertEqual([], view.settings().get('rulers'))
         self.assertEqual(font_size, view.settings().get('font_size'))
         self.assertEqual(color_scheme, view.settings().get('color_scheme'))
 
-    def test_can_set_exec_output_panel_font_size(self):
+    def test_can_set_output_panel_font_size(self):
         font_size = self.view.settings().get('font_size')
         font_size_config = font_size + 1  # type: ignore[operator]
         self.view.settings().set('phpunit.font_size', font_size_config)
-        _create_exec_output_panel(self.view, {'envx': 'envy'}, 'thecmd')
-        self.assertEqual(font_size_config, self.getExecOutputPanel().settings().get('font_size'))
+        _create_output_panel(self.view, {'envx': 'envy'}, 'thecmd')
+        self.assertEqual(font_size_config, self.getOutputPanel().settings().get('font_size'))
 
-    def test_can_debug_exec_output(self):
+    def test_can_debug_output(self):
         self.view.settings().set('phpunit.debug', True)
-        _create_exec_output_panel(self.view, {'x': 'y'}, 'thecmd')
-        self.assertEqual('env: {\'x\': \'y\'}\nt h e c m d\n\n', self.getExecOutputPanelContent())
+        _create_output_panel(self.view, {'x': 'y'}, 'thecmd')
+        self.assertEqual('env: {\'x\': \'y\'}\nt h e c m d\n\n', self.getOutputPanelContent())
+
+    def test_result_navigation(self):
+        _create_output_panel(self.view, {}, ['phpunit'], '/tmp/working/dir')
+        self.assertEqual('/tmp/working/dir', self.getOutputPanel().settings().get('result_base_dir'))
+        self.assertTrue(self.getOutputPanel().settings().get('result_file_regex'))
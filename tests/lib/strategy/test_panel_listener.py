@@ -0,0 +1,45 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.strategy import _PanelListener
+
+
+@unittest.mock.patch('PHPUnitKit.lib.panel.set_timeout', lambda callback, delay: callback())
+class TestPanelListener(unittest.ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.panel = unittest.mock.Mock()
+        self.process = unittest.mock.Mock(killed=False)
+        self.process.elapsed.return_value = 1.5
+
+    def output(self) -> str:
+        return ''.join(call[0][1]['characters'] for call in self.panel.run_command.call_args_list)
+
+    def test_finished(self):
+        _PanelListener(self.view, self.panel).on_exit(self.process, 0)
+        self.assertEqual('[Finished in 1.5s]\n', self.output())
+
+    def test_finished_with_exit_code(self):
+        _PanelListener(self.view, self.panel).on_exit(self.process, 2)
+        self.assertEqual('[Finished in 1.5s with exit code 2]\n', self.output())
+
+    def test_process_that_could_not_be_started(self):
+        _PanelListener(self.view, self.panel).on_exit(self.process, None)
+        self.assertEqual('[Could not start the test process]\n', self.output())
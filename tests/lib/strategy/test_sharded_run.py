@@ -0,0 +1,74 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.results import TestResults
+from PHPUnitKit.lib.strategy import _ShardedRun
+
+
+def _shard(*failures) -> TestResults:
+    results = TestResults('/app')
+    results.add('App\\PassTest::testPass', 'passed', 1.0, file='/app/tests/PassTest.php')
+    for id, line in failures:
+        results.add(id, 'failed', 0.5, 'Failed asserting that false is true.', '/app/tests/FooTest.php', line)
+
+    return results
+
+
+@unittest.mock.patch('PHPUnitKit.lib.strategy.status_message')
+@unittest.mock.patch('PHPUnitKit.lib.strategy.record_durations')
+@unittest.mock.patch('PHPUnitKit.lib.panel.set_timeout', lambda callback, delay: callback())
+class TestShardedRun(unittest.TestCase):
+
+    def setUp(self):
+        self.panel = unittest.mock.Mock()
+        self.process = unittest.mock.Mock(killed=False)
+        self.process.elapsed.return_value = 1.5
+
+    def output(self) -> str:
+        return ''.join(call[0][1]['characters'] for call in self.panel.run_command.call_args_list)
+
+    def test_results_are_merged_and_reported_when_all_shards_exit(self, record_durations, status_message):
+        results = TestResults('/app')
+        run = _ShardedRun(self.panel, results, 2)
+
+        run.shard_exited(1, self.process, _shard(('App\\FooTest::testFoo', 12)), 1, [])
+        self.assertFalse(results.finished)
+
+        run.shard_exited(0, self.process, _shard(), 0, [])
+
+        self.assertTrue(results.finished)
+        self.assertEqual({'passed': 2, 'failed': 1, 'error': 0, 'skipped': 0}, results.counts)
+        self.assertEqual(2.0, results.file_durations['/app/tests/PassTest.php'])
+        record_durations.assert_called_once_with('/app', results.file_durations)
+        status_message.assert_called_once_with('PHPUnit: 3 tests, 1 failed')
+
+        output = self.output()
+        self.assertIn('Shard 2/2: 2 tests, 1 failed in 1.5s with exit code 1\n', output)
+        self.assertIn('Shard 1/2: 1 tests in 1.5s\n', output)
+        self.assertIn(
+            '1) App\\FooTest::testFoo\nFailed asserting that false is true.\n\n/app/tests/FooTest.php:12\n', output)
+        self.assertIn('FAILURES!\nTests: 3, Failures: 1, Errors: 0, Skipped: 0.\n', output)
+
+    def test_output_of_shards_that_fail_without_results_is_shown(self, record_durations, status_message):
+        run = _ShardedRun(self.panel, TestResults('/app'), 1)
+
+        run.shard_exited(0, self.process, TestResults('/app'), 255, ['PHP Fatal error:  Uncaught Error'])
+
+        self.assertIn('exit code 255\n\nPHP Fatal error:  Uncaught Error\n', self.output())
+        self.assertIn('FAILURES!', self.output())
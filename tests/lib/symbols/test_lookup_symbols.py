@@ -0,0 +1,78 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.symbols import clear_symbols
+from PHPUnitKit.lib.symbols import invalidate_open_file_symbols
+from PHPUnitKit.lib.symbols import invalidate_symbols
+from PHPUnitKit.lib.symbols import lookup_symbol_in_open_files
+from PHPUnitKit.lib.symbols import lookup_symbols_in_index
+
+
+class TestLookupSymbols(unittest.TestCase):
+
+    def setUp(self):
+        clear_symbols()
+        self.window = unittest.mock.Mock()
+        self.window.id.return_value = 1
+        self.window.lookup_symbol_in_index.side_effect = lambda symbol: [('/{}.php'.format(symbol), symbol, (1, 1))]
+        self.window.lookup_symbol_in_open_files.side_effect = lambda symbol: [('/Foo.php', symbol, (3, 5))]
+
+    def test_lookups_are_batched(self):
+        self.assertEqual([
+            ('/Foo.php', 'Foo', (1, 1)),
+            ('/Bar.php', 'Bar', (1, 1))
+        ], lookup_symbols_in_index(self.window, ['Foo', 'Bar', 'Foo']))
+        self.assertEqual(2, self.window.lookup_symbol_in_index.call_count)
+
+    def test_lookups_are_cached_per_generation(self):
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        self.assertEqual(1, self.window.lookup_symbol_in_index.call_count)
+        self.window.views.assert_not_called()
+        self.assertEqual(1, self.window.lookup_symbol_in_open_files.call_count)
+
+        invalidate_symbols()
+
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        self.assertEqual(2, self.window.lookup_symbol_in_index.call_count)
+        self.assertEqual(2, self.window.lookup_symbol_in_open_files.call_count)
+
+    def test_empty_lookups_are_not_cached(self):
+        self.window.lookup_symbol_in_index.side_effect = lambda symbol: []
+        self.window.lookup_symbol_in_open_files.side_effect = lambda symbol: []
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        self.assertEqual(2, self.window.lookup_symbol_in_index.call_count)
+        self.assertEqual(2, self.window.lookup_symbol_in_open_files.call_count)
+
+    def test_open_file_lookups_are_invalidated_by_the_edit_generation(self):
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        invalidate_open_file_symbols()
+        lookup_symbol_in_open_files(self.window, 'Foo')
+        lookup_symbols_in_index(self.window, ['Foo'])
+        lookup_symbols_in_index(self.window, ['Foo'])
+        self.assertEqual(2, self.window.lookup_symbol_in_open_files.call_count)
+        self.assertEqual(1, self.window.lookup_symbol_in_index.call_count)
+        self.window.views.assert_not_called()
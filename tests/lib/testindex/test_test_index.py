@@ -0,0 +1,146 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.configuration import _configuration_cache
+from PHPUnitKit.lib.testindex import TestIndex
+
+
+_CONFIGURATION = """<?xml version="1.0" encoding="UTF-8"?>
+<phpunit>
+    <testsuites>
+        <testsuite name="unit">
+            <directory>tests</directory>
+        </testsuite>
+    </testsuites>
+</phpunit>
+"""
+
+
+class TestTestIndex(unittest.TestCase):
+
+    def setUp(self):
+        _configuration_cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.dir, 'cache')
+        self.configuration_file = os.path.join(self.dir, 'phpunit.xml')
+        self.write('phpunit.xml', _CONFIGURATION)
+        self.write('tests/FooTest.php', '<?php\nclass FooTest {\n    function testFoo() {}\n}\n')
+        self.write('tests/Helper.php', '<?php\nclass Helper {}\n')
+        self.write('vendor/tests/VendorTest.php', '<?php\nclass VendorTest {}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, file: str, text: str) -> str:
+        file = os.path.join(self.dir, file)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'w') as f:
+            f.write(text)
+
+        return file
+
+    def index(self) -> TestIndex:
+        return TestIndex(self.configuration_file, cache_dir=self.cache_dir)
+
+    def test_update(self):
+        index = self.index()
+
+        self.assertEqual(1, index.update())
+        self.assertEqual([os.path.join(self.dir, 'tests', 'FooTest.php')], index.files())
+        self.assertEqual([(os.path.join(self.dir, 'tests', 'FooTest.php'), 'FooTest', 'testFoo', 3)], index.tests())
+        self.assertEqual([os.path.join(self.dir, 'tests', 'FooTest.php')], index.find_class('FooTest'))
+        self.assertEqual([], index.find_class('Helper'))
+
+    def test_update_is_incremental(self):
+        index = self.index()
+        index.update()
+        generation = index.generation
+
+        self.assertEqual(0, index.update())
+        self.assertEqual(generation, index.generation)
+
+        self.write('tests/BarTest.php', '<?php\nclass BarTest {\n    function testBar() {}\n}\n')
+        foo = self.write('tests/FooTest.php', '<?php\nclass FooTest {\n    function testFizz() {}\n}\n')
+        os.utime(foo, ns=(0, 0))
+
+        self.assertEqual(2, index.update())
+        self.assertGreater(index.generation, generation)
+        self.assertEqual(['testBar', 'testFizz'], [test[2] for test in index.tests()])
+
+        os.remove(foo)
+
+        self.assertEqual(1, index.update())
+        self.assertEqual(['testBar'], [test[2] for test in index.tests()])
+
+    @unittest.mock.patch('PHPUnitKit.lib.testindex.set_timeout_async')
+    def test_is_persisted(self, set_timeout_async):
+        self.index().update()
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+        with unittest.mock.patch('PHPUnitKit.lib.testindex._submit', side_effect=lambda job: job()):
+            set_timeout_async.call_args[0][0]()
+
+        index = self.index()
+        index.load()
+
+        self.assertEqual(1, len(index))
+        self.assertEqual(0, index.update())
+
+    def test_update_file(self):
+        index = self.index()
+        index.update()
+
+        bar = self.write('tests/BarTest.php', '<?php\nclass BarTest {\n    function testBar() {}\n}\n')
+        helper = self.write('src/BarTest.php', '<?php\nclass BarTest {}\n')
+
+        self.assertTrue(index.update_file(bar))
+        self.assertFalse(index.update_file(bar))
+        self.assertFalse(index.update_file(helper))
+        self.assertEqual(2, len(index))
+
+    @unittest.mock.patch('PHPUnitKit.lib.testindex.set_timeout_async')
+    def test_saves_are_debounced(self, set_timeout_async):
+        index = self.index()
+        index.update()
+        index.update_file(self.write('tests/BarTest.php', '<?php\nclass BarTest {}\n'))
+        index.update_file(self.write('tests/BazTest.php', '<?php\nclass BazTest {}\n'))
+        self.assertEqual(3, set_timeout_async.call_count)
+
+        with unittest.mock.patch.object(index, 'save') as save:
+            with unittest.mock.patch('PHPUnitKit.lib.testindex._submit', side_effect=lambda job: job()):
+                for call in set_timeout_async.call_args_list:
+                    call[0][0]()
+
+            save.assert_called_once_with()
+
+    @unittest.mock.patch('PHPUnitKit.lib.testindex.set_timeout_async')
+    def test_save_if_dirty(self, set_timeout_async):
+        index = self.index()
+        index.update()
+        index.save_if_dirty()
+        self.assertTrue(os.path.isfile(index.cache_file()))
+
+        os.remove(index.cache_file())
+        index.save_if_dirty()
+        self.assertFalse(os.path.isfile(index.cache_file()))
@@ -0,0 +1,117 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.tokenizer import parse_tests
+
+
+class TestParseTests(unittest.TestCase):
+
+    def test_classes(self):
+        tests = parse_tests("""<?php
+namespace App\\Tests;
+
+use PHPUnit\\Framework\\Attributes\\DataProvider;
+use PHPUnit\\Framework\\Attributes\\Test;
+
+final class FooTest extends TestCase
+{
+    private $map = ['}' => "{$x}"];
+
+    // public function testCommentedOut() {}
+
+    public function testOne(): void
+    {
+        $fn = function () {};
+    }
+
+    /**
+     * @test
+     * @dataProvider provideTwo
+     */
+    public function two() {}
+
+    #[Test]
+    #[DataProvider('provideThree')]
+    public function three()
+    {
+        $text = <<<EOT
+        } public function testInHeredoc() {
+        EOT;
+    }
+
+    public function helper()
+    {
+        return new class { public function testAnonymous() {} };
+    }
+}
+""")
+
+        self.assertEqual({'classes': [{
+            'name': 'App\\Tests\\FooTest',
+            'line': 7,
+            'tests': [['testOne', 13], ['two', 22], ['three', 26]],
+            'data_providers': ['provideTwo', 'provideThree']
+        }], 'pest': []}, tests)
+
+    def test_global_namespace(self):
+        tests = parse_tests("<?php\nclass FooTest {\n    function testFoo() {}\n}\n")
+
+        self.assertEqual('FooTest', tests['classes'][0]['name'])
+        self.assertEqual([['testFoo', 3]], tests['classes'][0]['tests'])
+
+    def test_test_prefix_is_case_sensitive(self):
+        tests = parse_tests("<?php\nclass FooTest {\n    function TestFoo() {}\n    function testBar() {}\n}\n")
+
+        self.assertEqual([['testBar', 4]], tests['classes'][0]['tests'])
+
+    def test_class_constants_are_not_classes(self):
+        tests = parse_tests("<?php\n$a = FooTest::class;\n")
+
+        self.assertEqual([], tests['classes'])
+
+    def test_pest(self):
+        tests = parse_tests("""<?php
+uses(Tests\\TestCase::class);
+
+it('does a', function () {
+    expect(true)->toBeTrue();
+});
+
+describe('sum', function () {
+    test("adds", function () {});
+
+    describe('negative', function () {
+        it('subtracts', fn () => true);
+    });
+
+    it('carries')->skip();
+});
+
+test('top', function () {});
+""")
+
+        self.assertEqual([], tests['classes'])
+        self.assertEqual([
+            {'name': 'does a', 'describe': [], 'line': 4},
+            {'name': 'adds', 'describe': ['sum'], 'line': 9},
+            {'name': 'subtracts', 'describe': ['sum', 'negative'], 'line': 12},
+            {'name': 'carries', 'describe': ['sum'], 'line': 15},
+            {'name': 'top', 'describe': [], 'line': 18},
+        ], tests['pest'])
@@ -0,0 +1,69 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.trie import PathTrie
+
+
+def path(*parts) -> str:
+    return os.sep + os.path.join(*parts)
+
+
+class TestPathTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = PathTrie()
+        self.trie.insert(path('code'), 'code')
+        self.trie.insert(path('code', 'project'), 'project')
+        self.trie.insert(path('code', 'project', 'vendor', 'lib'), 'lib')
+
+    def test_len(self):
+        self.assertEqual(3, len(self.trie))
+        self.trie.insert(path('code'), 'code')
+        self.assertEqual(3, len(self.trie))
+
+    def test_get(self):
+        self.assertEqual('project', self.trie.get(path('code', 'project')))
+        self.assertIsNone(self.trie.get(path('code', 'project', 'vendor')))
+        self.assertIsNone(self.trie.get(path('foobar')))
+        self.assertIn(path('code'), self.trie)
+        self.assertNotIn(path('code', 'project', 'vendor'), self.trie)
+
+    def test_longest_prefix(self):
+        self.assertEqual(
+            (path('code', 'project'), 'project'),
+            self.trie.longest_prefix(path('code', 'project', 'tests', 'FooTest.php')))
+        self.assertEqual(
+            (path('code', 'project', 'vendor', 'lib'), 'lib'),
+            self.trie.longest_prefix(path('code', 'project', 'vendor', 'lib', 'src', 'Foo.php')))
+        self.assertEqual((path('code', 'project'), 'project'), self.trie.longest_prefix(path('code', 'project')))
+        self.assertEqual((path('code'), 'code'), self.trie.longest_prefix(path('code', 'projects')))
+        self.assertIsNone(self.trie.longest_prefix(path('foobar', 'code')))
+
+    def test_remove(self):
+        self.trie.remove(path('code', 'project'))
+        self.assertEqual(2, len(self.trie))
+        self.assertEqual((path('code'), 'code'), self.trie.longest_prefix(path('code', 'project', 'Foo.php')))
+        self.assertEqual('lib', self.trie.get(path('code', 'project', 'vendor', 'lib')))
+
+        self.trie.remove(path('code', 'project', 'vendor', 'lib'))
+        self.trie.remove(path('foobar'))
+        self.assertEqual([(path('code'), 'code')], self.trie.items())
@@ -15,9 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import shutil
+import tempfile
+
 from PHPUnitKit.tests import unittest
 
+from PHPUnitKit.lib.utils import _find_class_position
 from PHPUnitKit.lib.utils import _find_switchable_in_lookup_symbols
+from PHPUnitKit.lib.utils import _get_switchable_targets
 from PHPUnitKit.lib.utils import Switchable
 
 
@@ -162,3 +168,83 @@ class TestRefineSwitchableLocations(unittest.TestCase):
         self.assertEqual(([
             ('/home/code/x/a/app/tests/Integration/Models/AccountTest.php', 'app/tests/Integration/Models/AccountTest.php', (15, 13))  # noqa: E501
         ], True), actual)
+
+
+class TestGetSwitchableTargets(unittest.TestCase):
+
+    def test_laravel(self):
+        targets, is_test = _get_switchable_targets('/app/tests/Unit/Models/UserTest.php')
+        self.assertTrue(is_test)
+        self.assertIn('/app/app/Models/User.php', targets)
+
+        targets, is_test = _get_switchable_targets('/app/app/Models/User.php')
+        self.assertFalse(is_test)
+        self.assertIn('/app/tests/Unit/Models/UserTest.php', targets)
+        self.assertIn('/app/tests/Integration/Models/UserTest.php', targets)
+
+    def test_symfony(self):
+        targets, is_test = _get_switchable_targets('/proj/tests/Controller/HomeControllerTest.php')
+        self.assertTrue(is_test)
+        self.assertIn('/proj/src/Controller/HomeController.php', targets)
+
+    def test_monorepo(self):
+        rules = [['modules/*/tests/', 'modules/*/src/']]
+
+        targets, _ = _get_switchable_targets('/mono/modules/billing/tests/InvoiceTest.php', rules)
+        self.assertEqual('/mono/modules/billing/src/Invoice.php', targets[0])
+
+        targets, _ = _get_switchable_targets('/mono/modules/billing/src/Invoice.php', rules)
+        self.assertEqual('/mono/modules/billing/tests/InvoiceTest.php', targets[0])
+
+    def test_monorepo_with_multiple_wildcards(self):
+        rules = [['packages/*/*/tests/Unit/', 'packages/*/*/lib/']]
+
+        targets, _ = _get_switchable_targets('/mono/packages/acme/billing/tests/Unit/InvoiceTest.php', rules)
+        self.assertEqual('/mono/packages/acme/billing/lib/Invoice.php', targets[0])
+
+        targets, _ = _get_switchable_targets('/mono/packages/acme/billing/lib/Invoice.php', rules)
+        self.assertEqual('/mono/packages/acme/billing/tests/Unit/InvoiceTest.php', targets[0])
+
+    def test_targets_are_unique(self):
+        targets, _ = _get_switchable_targets('/x/Foo.php')
+        self.assertEqual(['/x/FooTest.php'], targets)
+
+    def test_invalid_rules_are_ignored(self):
+        targets, _ = _get_switchable_targets('/x/Foo.php', [['a/'], 'b'])
+        self.assertEqual(['/x/FooTest.php'], targets)
+
+    def test_switchable_in_lookup_symbols_with_rules(self):
+        expected = ('/mono/modules/billing/tests/InvoiceTest.php', 'modules/billing/tests/InvoiceTest.php', (3, 7))
+        actual = _find_switchable_in_lookup_symbols('/mono/modules/billing/src/Invoice.php', [
+            expected,
+            ('/mono/modules/shipping/tests/InvoiceTest.php', 'modules/shipping/tests/InvoiceTest.php', (3, 7))
+        ], [['modules/*/tests/', 'modules/*/src/']])
+
+        self.assertEqual(([expected], True), actual)
+
+
+class TestFindClassPosition(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def file(self, name: str, text: str) -> str:
+        file = os.path.join(self.tmp, name)
+        with open(file, 'w') as f:
+            f.write(text)
+
+        return file
+
+    def test_class(self):
+        file = self.file('FooTest.php', "<?php\n\nnamespace App;\n\nfinal class FooTest extends TestCase\n{\n}\n")
+        self.assertEqual((5, 13), _find_class_position(file))
+
+    def test_ignores_other_classes(self):
+        file = self.file('Foo.php', "<?php\n// class Foo\nclass FooBar {}\nclass Foo {}\n")
+        self.assertEqual((4, 7), _find_class_position(file))
+
+    def test_not_found(self):
+        file = self.file('Foo.php', "<?php\nfunction foo() {}\n")
+        self.assertEqual((None, None), _find_class_position(file))
+        self.assertEqual((None, None), _find_class_position(os.path.join(self.tmp, 'Missing.php')))
@@ -16,6 +16,8 @@
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
 
 from PHPUnitKit.tests import unittest
 
@@ -129,3 +131,17 @@ class TestFinders(unittest.TestCase):
 
         expected = os.path.dirname(expected)
         self.assertEqual(expected, find_phpunit_working_directory(file, folders))
+
+    def test_find_is_invalidated_when_a_configuration_file_is_added(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, 'src'))
+        file = os.path.join(tmp_dir, 'src', 'File.php')
+
+        self.assertIsNone(find_phpunit_configuration_file(file, [tmp_dir]))
+
+        expected = os.path.join(tmp_dir, 'phpunit.xml')
+        open(expected, 'w').close()
+        os.utime(tmp_dir, ns=(0, 0))
+
+        self.assertEqual(expected, find_phpunit_configuration_file(file, [tmp_dir]))
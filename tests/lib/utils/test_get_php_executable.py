@@ -16,6 +16,8 @@
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
 
 import sublime
 
@@ -95,3 +97,16 @@ class TestGetPHPExecutable(unittest.ViewTestCase):
                 get_php_executable(
                     self.view,
                     unittest.fixtures_path(os.path.join('get_php_executable', 'not_executable')))
+
+    def test_php_version_file_changes_invalidate_the_cached_executable(self):
+        working_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_dir)
+        self.view.settings().set('phpunit.php_versions_path', self.versions_path)
+
+        self.assertIsNone(get_php_executable(self.view, working_dir))
+
+        with open(os.path.join(working_dir, '.php-version'), 'w') as f:
+            f.write('foobar')
+
+        with self.assertRaisesRegex(ValueError, 'not a valid version number'):
+            get_php_executable(self.view, working_dir)
@@ -16,6 +16,8 @@
 # along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
 
 import sublime
 
@@ -195,3 +197,24 @@ class TestGetPHPUnitExecutable(unittest.ViewTestCase):
         self.assertEqual([unittest.fixtures_path(os.path.join(working_dir, 'vendor', 'bin', 'paratest.bat'))],
                          get_phpunit_executable(self.view, working_dir))
         self.assertEqual(shutil_which.call_count, 0)
+
+    @unittest.skipIf(sublime.platform() == 'windows', 'requires executable permissions')
+    def test_composer_executable_is_cached_until_vendor_bin_changes(self):
+        working_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_dir)
+        vendor_bin = os.path.join(working_dir, 'vendor', 'bin')
+        os.makedirs(vendor_bin)
+
+        with unittest.mock.patch('shutil.which') as shutil_which:
+            shutil_which.return_value = 'shutil_which_executable'
+            self.assertEqual(['shutil_which_executable'], get_phpunit_executable(self.view, working_dir))
+            self.assertEqual(['shutil_which_executable'], get_phpunit_executable(self.view, working_dir))
+            self.assertEqual(shutil_which.call_count, 1)
+
+            expected = os.path.join(vendor_bin, 'phpunit')
+            open(expected, 'w').close()
+            os.chmod(expected, 0o755)
+            os.utime(vendor_bin, ns=(0, 0))
+
+            self.assertEqual([expected], get_phpunit_executable(self.view, working_dir))
+            self.assertEqual(shutil_which.call_count, 1)
@@ -0,0 +1,139 @@
+# Copyright (C) 2023 Gerard Roche
+#
+# This file is part of PHPUnitKit.
+#
+# PHPUnitKit is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PHPUnitKit is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PHPUnitKit.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+
+from PHPUnitKit.tests import unittest
+
+from PHPUnitKit.lib.workspace import WorkspaceIndex
+
+
+class TestWorkspaceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = WorkspaceIndex()
+        self.base_dir = unittest.fixtures_path('common_prefix_parent')
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.base_dir, *parts)
+
+    def test_is_not_ready_until_updated(self):
+        self.assertFalse(self.index.is_ready([self.base_dir]))
+        self.index.update([self.base_dir])
+        self.assertTrue(self.index.is_ready([self.base_dir]))
+        self.assertFalse(self.index.is_ready([self.base_dir, self.path('valid')]))
+
+    def test_find_configuration_file(self):
+        self.index.update([self.base_dir])
+
+        self.assertEqual(
+            self.path('has_phpunit_xml', 'phpunit.xml'),
+            self.index.find_configuration_file(self.path('has_phpunit_xml', 'src', 'Has', 'PHPUnitXml.php')))
+        self.assertEqual(
+            self.path('has_phpunit_xml_dist', 'phpunit.xml.dist'),
+            self.index.find_configuration_file(self.path('has_phpunit_xml_dist', 'src', 'Has', 'PHPUnitXmlDist.php')))
+        self.assertEqual(
+            self.path('has_phpunit_dist_xml', 'phpunit.dist.xml'),
+            self.index.find_configuration_file(self.path('has_phpunit_dist_xml', 'src', 'Has', 'PHPUnitDistXml.php')))
+        self.assertEqual(
+            self.path('phpunit.xml.dist'),
+            self.index.find_configuration_file(self.path('valid', 'file.php')))
+
+    def test_only_indexes_as_far_as_the_nearest_common_prefix_of_folders(self):
+        folders = [
+            self.path('common_prefix', 'folder_a'),
+            self.path('common_prefix', 'folder_b')
+        ]
+
+        self.index.update(folders)
+        self.assertIsNone(self.index.find_configuration_file(self.path('common_prefix', 'folder_a', 'FileA.php')))
+
+        self.index.update(folders + [self.base_dir])
+        self.assertEqual(
+            self.path('phpunit.xml.dist'),
+            self.index.find_configuration_file(self.path('common_prefix', 'folder_a', 'FileA.php')))
+
+    def test_removing_folders_removes_their_configuration_files(self):
+        self.index.update([self.base_dir, self.path('has_phpunit_xml')])
+        self.index.update([self.path('has_phpunit_xml')])
+
+        self.assertIsNone(self.index.find_configuration_file(self.path('valid', 'file.php')))
+        self.assertEqual(
+            self.path('has_phpunit_xml', 'phpunit.xml'),
+            self.index.find_configuration_file(self.path('has_phpunit_xml', 'src', 'Has', 'PHPUnitXml.php')))
+
+    def test_notices_configuration_files_created_and_removed_outside_of_sublime(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        os.makedirs(os.path.join(base_dir, 'package', 'src'))
+        with open(os.path.join(base_dir, 'phpunit.xml'), 'w'):
+            pass
+
+        self.index.update([base_dir])
+        file_name = os.path.join(base_dir, 'package', 'src', 'File.php')
+        self.assertEqual(os.path.join(base_dir, 'phpunit.xml'), self.index.find_configuration_file(file_name))
+
+        with open(os.path.join(base_dir, 'package', 'phpunit.xml.dist'), 'w'):
+            pass
+        self.assertEqual(
+            os.path.join(base_dir, 'package', 'phpunit.xml.dist'), self.index.find_configuration_file(file_name))
+
+        os.remove(os.path.join(base_dir, 'package', 'phpunit.xml.dist'))
+        self.assertEqual(os.path.join(base_dir, 'phpunit.xml'), self.index.find_configuration_file(file_name))
+
+    def test_lookups_only_revalidate_the_ancestors_of_the_file(self):
+        self.index.update([self.base_dir])
+
+        with unittest.mock.patch('PHPUnitKit.lib.workspace.stat_signature', return_value=None) as stat_signature:
+            self.index.find_configuration_file(self.path('has_phpunit_xml', 'src', 'Has', 'PHPUnitXml.php'))
+
+        self.assertEqual([
+            unittest.mock.call(self.path('has_phpunit_xml', 'src', 'Has')),
+            unittest.mock.call(self.path('has_phpunit_xml', 'src')),
+            unittest.mock.call(self.path('has_phpunit_xml')),
+            unittest.mock.call(self.base_dir),
+        ], stat_signature.call_args_list)
+
+    def test_files_in_directories_that_are_not_scanned_are_not_resolved(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        os.makedirs(os.path.join(base_dir, 'vendor', 'package', 'src'))
+        with open(os.path.join(base_dir, 'phpunit.xml'), 'w'):
+            pass
+        with open(os.path.join(base_dir, 'vendor', 'package', 'phpunit.xml'), 'w'):
+            pass
+
+        self.index.update([base_dir])
+
+        file_name = os.path.join(base_dir, 'vendor', 'package', 'src', 'File.php')
+        self.assertIsNone(self.index.find_configuration_file(file_name))
+
+    def test_folders_changed_during_an_update_are_updated_when_it_finishes(self):
+        folders = [self.path('has_phpunit_xml')]
+
+        def _scan(folder):
+            if folder == self.path('has_phpunit_xml'):
+                self.index.update([self.base_dir])
+            return iter(())
+
+        with unittest.mock.patch('PHPUnitKit.lib.workspace._scan', side_effect=_scan):
+            self.index.update(folders)
+
+        self.assertTrue(self.index.is_ready([self.base_dir]))
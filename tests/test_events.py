@@ -21,34 +21,78 @@ from PHPUnitKit.tests import unittest
 
 class TestEvents(unittest.ViewTestCase):
 
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.set_timeout', lambda callback, delay: callback())
+    @unittest.mock.patch('PHPUnitKit.lib.events.find_configuration_file')
+    @unittest.mock.patch('PHPUnitKit.lib.events.has_test')
     @unittest.mock.patch('sublime.View.file_name')
-    @unittest.mock.patch('PHPUnitKit.plugin.PHPUnit.run_file')
-    def test_can_run_test_file_on_post_save(self, phpunit, file_name):
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit.run')
+    def test_can_run_test_file_on_post_save(self, phpunit, file_name, has_test, conf):
         file_name.return_value = '/tmp/fizz.php'
+        has_test.return_value = True
+        conf.return_value = None
         self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
-        PhpunitListener().on_post_save(self.view)
+        PhpunitListener().on_post_save_async(self.view)
         phpunit.assert_called()
 
     @unittest.mock.patch('sublime.View.file_name')
-    @unittest.mock.patch('PHPUnitKit.plugin.PHPUnit')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit')
     def test_on_post_save_event_does_not_run_if_file_is_not_a_real_file_on_disk(self, phpunit, file_name):
         file_name.return_value = None
         self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
-        PhpunitListener().on_post_save(self.view)
+        PhpunitListener().on_post_save_async(self.view)
         self.assertMockNotCalled(phpunit)
 
     @unittest.mock.patch('sublime.View.file_name')
-    @unittest.mock.patch('PHPUnitKit.plugin.PHPUnit')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit')
     def test_on_post_save_event_does_not_run_for_non_php_files(self, phpunit, file_name):
         file_name.return_value = '/tmp/fizz.txt'
         self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
-        PhpunitListener().on_post_save(self.view)
+        PhpunitListener().on_post_save_async(self.view)
         self.assertMockNotCalled(phpunit)
 
     @unittest.mock.patch('sublime.View.file_name')
-    @unittest.mock.patch('PHPUnitKit.plugin.PHPUnit')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit')
     def test_on_post_save_event_does_not_run_if_no_event_set(self, phpunit, file_name):
         file_name.return_value = '/tmp/fizz.php'
         self.view.settings().set('phpunit.on_post_save', [])
-        PhpunitListener().on_post_save(self.view)
+        PhpunitListener().on_post_save_async(self.view)
         self.assertMockNotCalled(phpunit)
+
+    @unittest.mock.patch('PHPUnitKit.lib.events.find_configuration_file')
+    @unittest.mock.patch('PHPUnitKit.lib.events.has_test')
+    @unittest.mock.patch('sublime.View.file_name')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit')
+    def test_on_post_save_event_does_not_run_tests_outside_of_testsuites(self, phpunit, file_name, has_test, conf):
+        file_name.return_value = unittest.fixtures_path('configuration', 'tests', 'Unit', 'Excluded', 'FooTest.php')
+        has_test.return_value = True
+        conf.return_value = unittest.fixtures_path('configuration', 'phpunit.xml')
+        self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
+        PhpunitListener().on_post_save_async(self.view)
+        self.assertMockNotCalled(phpunit)
+
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.set_timeout', lambda callback, delay: callback())
+    @unittest.mock.patch('PHPUnitKit.lib.events.find_configuration_file')
+    @unittest.mock.patch('PHPUnitKit.lib.events.has_test')
+    @unittest.mock.patch('sublime.View.file_name')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit.run')
+    def test_on_post_save_event_runs_tests_in_testsuites(self, phpunit, file_name, has_test, conf):
+        file_name.return_value = unittest.fixtures_path('configuration', 'tests', 'Unit', 'FooTest.php')
+        has_test.return_value = True
+        conf.return_value = unittest.fixtures_path('configuration', 'phpunit.xml')
+        self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
+        PhpunitListener().on_post_save_async(self.view)
+        phpunit.assert_called()
+
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.set_timeout', lambda callback, delay: callback())
+    @unittest.mock.patch('PHPUnitKit.lib.events.find_configuration_file')
+    @unittest.mock.patch('PHPUnitKit.lib.events.has_test')
+    @unittest.mock.patch('sublime.View.file_name')
+    @unittest.mock.patch('PHPUnitKit.lib.scheduler.PHPUnit.run')
+    def test_on_post_save_event_does_not_run_if_view_has_not_changed(self, phpunit, file_name, has_test, conf):
+        file_name.return_value = '/tmp/fizz.php'
+        has_test.return_value = True
+        conf.return_value = None
+        self.view.settings().set('phpunit.on_post_save', ['phpunit_test_file'])
+        PhpunitListener().on_post_save_async(self.view)
+        PhpunitListener().on_post_save_async(self.view)
+        self.assertEqual(1, phpunit.call_count)
@@ -25,6 +25,8 @@ from unittest import skipIf  # noqa: F401
 from sublime import find_resources
 from sublime import active_window
 
+from PHPUnitKit.lib.utils import clear_caches
+
 
 def fixtures_path(*path) -> str:
     if path is None:
@@ -36,6 +38,7 @@ def fixtures_path(*path) -> str:
 class ViewTestCase(TestCase):
 
     def setUp(self) -> None:
+        clear_caches()
         self.view = active_window().new_file()
         self.view.set_syntax_file(find_resources('PHP.sublime-syntax')[0])
 